@@ -1,4 +1,18 @@
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class NegotiationResult(NamedTuple):
+    # Process chosen in each property-rights scenario; the two negotiation-cost scenarios are
+    # None unless their cost was given. format_negotiation gives the Excel text.
+    socially_efficient: str
+    beneficiary_not_liable: str
+    beneficiary_liable: str
+    beneficiary_not_liable_with_cost: str
+    beneficiary_liable_with_cost: str
+    cost_neg_affected: float
+    cost_neg_beneficiary: float
 
 def Negotiation(df, cost_neg_beneficiary=None, cost_neg_affected=None):
     if df is None:
@@ -65,18 +79,32 @@ def Negotiation(df, cost_neg_beneficiary=None, cost_neg_affected=None):
     else:
         chosen_when_beneficiary_liable_with_beneficiary_cost = None
 
+    return NegotiationResult(
+        socially_efficient=socially_efficient_process,
+        beneficiary_not_liable=chosen_when_beneficiary_not_liable_zero_cost,
+        beneficiary_liable=chosen_when_beneficiary_liable_zero_cost,
+        beneficiary_not_liable_with_cost=chosen_when_beneficiary_not_liable_with_affected_cost,
+        beneficiary_liable_with_cost=chosen_when_beneficiary_liable_with_beneficiary_cost,
+        cost_neg_affected=cost_neg_affected,
+        cost_neg_beneficiary=cost_neg_beneficiary,
+    )
+
+def format_negotiation(result):
+    if not isinstance(result, NegotiationResult):
+        return result
+
     # Build output string
     output = []
-    output.append(f"Socially Efficient to adopt: {socially_efficient_process}")
-    output.append(f"Beneficiary has full rights (Not liable) (negotiation costs are negligible), Process Chosen: {chosen_when_beneficiary_not_liable_zero_cost}")
-    output.append(f"AffectedPerson has full rights (Beneficiary liable) (negotiation costs are negligible), Process Chosen: {chosen_when_beneficiary_liable_zero_cost}")
-    
-    if chosen_when_beneficiary_not_liable_with_affected_cost is not None:
-        output.append(f"  - Beneficiary has full rights (Not liable) (negotiation costs for Affected Entity = {cost_neg_affected}), Process Chosen: {chosen_when_beneficiary_not_liable_with_affected_cost}")
-        
-    if chosen_when_beneficiary_liable_with_beneficiary_cost is not None:
-        output.append(f"  - AffectedPerson has full rights (Beneficiary liable) (negotiation costs for Beneficiary = {cost_neg_beneficiary}), Process Chosen: {chosen_when_beneficiary_liable_with_beneficiary_cost}")
+    output.append(f"Socially Efficient to adopt: {result.socially_efficient}")
+    output.append(f"Beneficiary has full rights (Not liable) (negotiation costs are negligible), Process Chosen: {result.beneficiary_not_liable}")
+    output.append(f"AffectedPerson has full rights (Beneficiary liable) (negotiation costs are negligible), Process Chosen: {result.beneficiary_liable}")
+
+    if result.beneficiary_not_liable_with_cost is not None:
+        output.append(f"  - Beneficiary has full rights (Not liable) (negotiation costs for Affected Entity = {result.cost_neg_affected}), Process Chosen: {result.beneficiary_not_liable_with_cost}")
+
+    if result.beneficiary_liable_with_cost is not None:
+        output.append(f"  - AffectedPerson has full rights (Beneficiary liable) (negotiation costs for Beneficiary = {result.cost_neg_beneficiary}), Process Chosen: {result.beneficiary_liable_with_cost}")
 
     return "\n".join(output)
 
-Negotiation(arg1, arg2, arg3)
\ No newline at end of file
+format_negotiation(remember(Negotiation, arg1, arg2, arg3))
\ No newline at end of file
@@ -0,0 +1,180 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market, parse_equation, compile_curve, solve_bracketed) to run first
+
+class PigouvianResult(NamedTuple):
+    # Market outcome, social optimum and the per-unit tax on sellers that gets the market there;
+    # format_pigouvian gives the Excel text
+    market_price: float
+    market_quantity: float
+    social_quantity: float
+    buyer_price: float
+    seller_price: float
+    tax: float
+    tax_revenue: float
+    consumer_surplus: float
+    producer_surplus: float
+    market_damage: float
+    social_damage: float
+    DWL_removed: float
+
+@lru_cache(maxsize=32)
+def parse_damage(damage_eq):
+    # damage_eq is the marginal external damage per unit, e.g. "MED = 10 + 0.5Q" or
+    # "MED = a + bQ^2" with parameters a and b. Returns the parameter names and
+    # (MED, dMED/dQ, total damage ∫0 to Q MED) as numpy functions of (Q, *parameters).
+    # Parsed and compiled like the market's curves (parse_equation, compile_curve); only the
+    # parameters need more: "bQ" and "2b" are products too, while "1e-1Q" stays a number
+    import sympy as sp
+    Q = sp.Symbol('Q', real=True)
+    rhs = parse_equation(damage_eq if '=' in damage_eq else f"MED = {damage_eq}", 'Q')
+    rhs = re.sub(r'(?<=[A-Za-z_])(?=Q\b)', '*', rhs)
+    rhs = re.sub(r'(?<=[\d.])(?![eE][+-]?\d)(?=[A-Za-z_])', '*', rhs)
+    expr = sp.sympify(rhs, {'Q': Q})
+    parameters = sorted(expr.free_symbols - {Q}, key=str)
+    total = sp.integrate(expr, Q)
+    total = total - total.subs(Q, 0)
+    return ([str(parameter) for parameter in parameters],
+            tuple(compile_curve(f, Q, *parameters) for f in (expr, expr.diff(Q), total)))
+
+def damage_parameters(names, parameters):
+    # {name: array} for every parameter of the damage equation, broadcast to one shape.
+    # parameters is a dict of numbers or lists/arrays, or an Excel range with one column per
+    # parameter, headers in the first row, and one row per scenario.
+    if parameters is None:
+        parameters = {}
+    elif isinstance(parameters, pd.DataFrame):
+        rows = parameters.iloc[1:]
+        parameters = {str(header).strip(): pd.to_numeric(rows.iloc[:, j], errors='coerce').to_numpy(dtype=float)
+                      for j, header in enumerate(parameters.iloc[0])}
+    missing = [name for name in names if name not in parameters]
+    if missing:
+        raise ValueError(f"The damage equation needs values for {missing}.")
+    unknown = [name for name in parameters if name not in names]
+    if unknown:
+        raise ValueError(f"Unknown parameters {unknown}; the damage equation has {names}.")
+    values = np.broadcast_arrays(*(np.asarray(parameters[name], dtype=float) for name in names))
+    return dict(zip(names, values))
+
+def Pigouvian(demand_eq, supply_eq, damage_eq, parameters=None):
+    # demand_eq and supply_eq are strings like "Q = 3040 - 25P" (supply is the private supply)
+    # damage_eq is the marginal external damage of the Q-th unit, e.g. "MED = 10 + 0.5Q"; it may
+    #   have parameters, "MED = a + bQ", given in parameters as numbers, or as lists/arrays (or an
+    #   Excel range with one column per parameter) for a sweep, which returns one row per scenario
+    # The social optimum is where buyers' value equals private cost plus damage, Pb = Ps + MED(Q)
+    # with Qd(Pb) = Qs(Ps) = Q; the Pigouvian tax, MED at that quantity, takes the market there.
+    # It is solved on the seller price, in price space as MarketUncertainty, so no inverse curves
+    # are needed: Newton steps on Qd(Ps + MED(Qs(Ps))) - Qs(Ps) with the market's compiled curves
+    # and slopes, for every scenario of a sweep at once. The DWL removed is the gain in total
+    # surplus net of damage: the changes in CS and PS, plus the tax revenue and the damage avoided.
+
+    if not demand_eq or not supply_eq or not damage_eq:
+        return ""
+
+    # Parsed and compiled curves come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    try:
+        P0, Q0 = market.numeric_equilibrium
+        names, (MED, MED_slope, damage) = parse_damage(str(damage_eq))
+        values = damage_parameters(names, parameters)
+    except (ValueError, TypeError, SyntaxError) as error:
+        return str(error)
+    P0, Q0 = float(P0), float(Q0)
+
+    sweep = isinstance(parameters, pd.DataFrame) or any(np.ndim(value) > 0 for value in values.values())
+    theta = [np.atleast_1d(values[name]).ravel() for name in names]
+    n = len(theta[0]) if theta else 1
+
+    demand, supply = market.demand, market.supply
+    demand_slope, supply_slope = market.slopes
+    # ∫ Qd dP and ∫ Qs dP, from the antiderivatives of each coefficient's term
+    calculus = market.term_calculus
+    labels = {curve: [(value, calculus[label][2]) for label, (c, term, value, f) in market.coefficients.items() if c == curve]
+              for curve in ('demand', 'supply')}
+
+    def area(curve, price):
+        return sum(value * np.broadcast_to(np.asarray(F(price), dtype=float), np.shape(price)) for value, F in labels[curve])
+
+    def curve(f, x):
+        return np.broadcast_to(np.asarray(f(x), dtype=float), np.shape(x))
+
+    def buyer_price(Ps):
+        return Ps + curve(lambda Q: MED(Q, *theta), curve(supply, Ps))
+
+    def gap(Ps):
+        return curve(demand, buyer_price(Ps)) - curve(supply, Ps)
+
+    def gap_slope(Ps):
+        Q = curve(supply, Ps)
+        Sp = curve(supply_slope, Ps)
+        return curve(demand_slope, buyer_price(Ps)) * (1 + curve(lambda Q: MED_slope(Q, *theta), Q) * Sp) - Sp
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # The seller price lies between where supply starts and P0 for a damage (MED > 0); a
+        # benefit (MED < 0) raises it above P0
+        start = market.supply_start(P0)
+        low = np.full(n, start)
+        high = np.full(n, P0)
+        width = market.price_scale
+        benefit = gap(high) > 0
+        for _ in range(60):
+            if not benefit.any():
+                break
+            low = np.where(benefit, high, low)
+            high = np.where(benefit, high + width, high)
+            width *= 2
+            benefit &= gap(high) > 0
+        # Not even the first unit is worth its damage
+        shut_down = ~(gap(low) > 0)
+        Ps = np.where(shut_down, start, solve_bracketed(gap, gap_slope, low, high))
+        Ps = np.where(benefit, np.nan, Ps)
+
+        # Shutting the market down takes a tax of the gap between the choke price and where supply starts
+        choke = market.choke_price(P0)
+        Q = np.where(shut_down, 0.0, curve(supply, Ps))
+        Pb = np.where(shut_down, choke, buyer_price(Ps))
+        tax = Pb - Ps
+        revenue = np.where(shut_down, 0.0, tax * Q)
+        CS = np.where(shut_down, 0.0, area('demand', choke) - area('demand', np.minimum(Pb, choke)))
+        PS = area('supply', Ps) - area('supply', np.full(n, start))
+        market_damage = curve(lambda Q: damage(Q, *theta), np.full(n, Q0))
+        social_damage = curve(lambda Q: damage(Q, *theta), Q)
+        CS0 = area('demand', choke) - area('demand', P0)
+        PS0 = area('supply', P0) - area('supply', start)
+        DWL = (CS + PS + revenue - social_damage) - (CS0 + PS0 - market_damage)
+
+    if sweep:
+        table = pd.DataFrame({name: value for name, value in zip(names, theta)})
+        for name, value in (('Market Price', P0), ('Market Quantity', Q0), ('Social Quantity', Q),
+                            ('Buyer Price', Pb), ('Seller Price', Ps), ('Pigouvian Tax', tax),
+                            ('Tax Revenue', revenue), ('Consumer Surplus', CS), ('Producer Surplus', PS),
+                            ('Market Damage', market_damage), ('Social Damage', social_damage),
+                            ('DWL Removed', DWL)):
+            table[name] = value
+        return table
+
+    if not np.isfinite(Ps[0]):
+        return "No social optimum found."
+    return PigouvianResult(P0, Q0, float(Q[0]), float(Pb[0]), float(Ps[0]), float(tax[0]), float(revenue[0]),
+                           float(CS[0]), float(PS[0]), float(market_damage[0]), float(social_damage[0]), float(DWL[0]))
+
+def format_pigouvian(result):
+    # A sweep's DataFrame and messages are passed through as they are
+    if not isinstance(result, PigouvianResult):
+        return result
+
+    return (f"Market equilibrium price: {result.market_price:.2f}, Quantity: {result.market_quantity:.2f}, "
+            f"External damage: {result.market_damage:.2f}\n"
+            f"Social optimum quantity: {result.social_quantity:.2f}, Buyer Price: {result.buyer_price:.2f}, "
+            f"Seller Price: {result.seller_price:.2f}\n"
+            f"Pigouvian tax: {result.tax:.2f}, Tax Revenue: {result.tax_revenue:.2f}, "
+            f"External damage: {result.social_damage:.2f}\n"
+            f"Consumer Surplus: {result.consumer_surplus:.2f}, Producer Surplus: {result.producer_surplus:.2f}, "
+            f"DWL removed: {result.DWL_removed:.2f}")
+
+format_pigouvian(remember(Pigouvian, arg1, arg2, arg3, arg4))
\ No newline at end of file
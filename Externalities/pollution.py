@@ -1,5 +1,14 @@
 import re
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class EmissionsResult(NamedTuple):
+    # Tons of smoke per firm, and the permit price when permits are traded (None otherwise);
+    # format_emissions gives the Excel text
+    emissions: dict
+    permit_price: float
 
 def calculate_equilibrium(df, allow_trade=None, negotiation_cost=None):
     if df.empty:
@@ -68,11 +77,8 @@ def calculate_equilibrium(df, allow_trade=None, negotiation_cost=None):
 
     if not allow_trade:
         # Without trading, each firm emits exactly its permits.
-        results = []
-        for firm in firm_names:
-            emissions = firm_permits[firm]
-            results.append(f"{firm} will produce {emissions:.2f} tons of smoke.")
-        return " ".join(results)
+        emissions = {firm: firm_permits[firm] for firm in firm_names}
+        return EmissionsResult(emissions, None)
 
     else:
         # With trading, find the equilibrium MC (p).
@@ -86,7 +92,7 @@ def calculate_equilibrium(df, allow_trade=None, negotiation_cost=None):
         # Now find each firm's reduction and emissions
         # R_i = (p - a_i)/b_i
         # E_i = Q_i - R_i
-        results = []
+        emissions = {}
         for firm in firm_names:
             a = a_params[firm]
             b = b_params[firm]
@@ -95,7 +101,16 @@ def calculate_equilibrium(df, allow_trade=None, negotiation_cost=None):
             R_i = (p - a) / b
             E_i = Q_i - R_i
 
-            results.append(f"{firm} will produce {E_i:.2f} tons of smoke.")
-        return " ".join(results)
+            emissions[firm] = E_i
+        return EmissionsResult(emissions, p)
+
+def format_emissions(result):
+    if not isinstance(result, EmissionsResult):
+        return result
+
+    results = []
+    for firm, emissions in result.emissions.items():
+        results.append(f"{firm} will produce {emissions:.2f} tons of smoke.")
+    return " ".join(results)
 
-calculate_equilibrium(arg1, arg2)
\ No newline at end of file
+format_emissions(remember(calculate_equilibrium, arg1, arg2))
\ No newline at end of file
@@ -0,0 +1,274 @@
+import copy
+import hashlib
+import inspect
+import sys
+import threading
+import types
+import weakref
+from collections import OrderedDict
+from functools import wraps
+
+# Results of the calculators, remembered by the content of their arguments.
+# Run this cell first, above every other cell of the workbook.
+#
+# Recalculating a workbook, or a batch with repeated scenarios, calls the same calculator with
+# the same inputs again and again. Each script's template line calls its calculator through
+# remember, e.g. format_tax(remember(Tax, arg1, arg2, arg3, arg4)): the arguments are
+# fingerprinted, and a call whose fingerprint was seen recently returns a copy of the earlier
+# result at once. Outside Excel, every calculator exported by the econ1210 submodules (not the
+# format_* functions) goes through wrap() the same way, and econ1210.memo is this cell.
+#
+# Excel runs a cell's code again on every recalculation, so its functions are new objects each
+# time. A function is therefore known by its code (code_key): its own, that of the helpers and
+# classes of the cells it calls (get_market, Market, ...) and the constants they read. Editing
+# any of them, in this cell or one above, forgets the results that depended on it.
+#
+#   from econ1210 import memo
+#   memo.stats()           # {'hits': ..., 'misses': ..., 'bypassed': ..., 'evictions': ..., 'size': ...}
+#   memo.clear()           # forget every result and reset the counters
+#   memo.disable()         # call straight through (memo.enable() turns it back on)
+#   memo.set_maxsize(1024) # keep more results (256 by default)
+#
+# Fingerprints: numbers, strings, None, tuples, lists and dicts by value; DataFrames,
+# Series and arrays by a blake2b hash of their headers and their columns' bytes (object
+# columns cell type by cell type, so 1 and "1" differ). A call with anything else (a Workforce, a WTPSummary, ...) is run as is
+# and counted as bypassed, and so is a call to a function taking a seed without one.
+#
+# The scripts rewrite the headers of the table they are given; a remembered result skips
+# that, which only matters to a caller who reads the table back afterwards.
+
+class Unfingerprintable(Exception):
+    pass
+
+_lock = threading.Lock()
+_results = OrderedDict()
+_enabled = True
+_maxsize = 256
+_counts = {'hits': 0, 'misses': 0, 'bypassed': 0, 'evictions': 0}
+
+IMMUTABLE = (type(None), bool, int, float, complex, str, bytes)
+NUMBERS = (bool, int, float)
+
+def _feed(digest, value):
+    if isinstance(value, IMMUTABLE):
+        digest.update(f"{type(value).__name__}:{value!r}\x1f".encode())
+    elif isinstance(value, (tuple, list)):
+        digest.update(f"{type(value).__name__}[{len(value)}\x1f".encode())
+        for item in value:
+            _feed(digest, item)
+        digest.update(b']')
+    elif isinstance(value, dict):
+        digest.update(f"dict[{len(value)}\x1f".encode())
+        for key, item in value.items():
+            _feed(digest, key)
+            _feed(digest, item)
+        digest.update(b']')
+    else:
+        # A DataFrame can only be passed in once pandas is imported, so nothing is imported here
+        pd = sys.modules.get('pandas')
+        np = sys.modules.get('numpy')
+        if pd is not None and isinstance(value, pd.DataFrame):
+            digest.update(f"DataFrame{value.shape}\x1f".encode())
+            _feed(digest, list(value.columns))
+            for j in range(value.shape[1]):
+                _feed_array(digest, value.iloc[:, j].to_numpy(), pd, np)
+        elif pd is not None and isinstance(value, pd.Series):
+            digest.update(f"Series{value.shape}\x1f".encode())
+            _feed(digest, value.name)
+            _feed_array(digest, value.to_numpy(), pd, np)
+        elif np is not None and isinstance(value, np.ndarray):
+            digest.update(f"ndarray{value.shape}\x1f".encode())
+            _feed_array(digest, value.ravel(), pd, np)
+        elif np is not None and isinstance(value, np.generic):
+            _feed(digest, value.item())
+        else:
+            raise Unfingerprintable(type(value).__name__)
+
+def _feed_array(digest, values, pd, np):
+    if values.dtype != object:
+        digest.update(f"{values.dtype.str}\x1f".encode())
+        digest.update(np.ascontiguousarray(values).data)
+        return
+    # Excel tables arrive as object columns (the header row is text). Each cell's type goes in,
+    # so 1, 1.0 and "1" differ; the numbers as float64 bytes, anything else through pandas'
+    # vectorized hash of its text
+    codes, kinds = pd.factorize(np.frompyfunc(type, 1, 1)(values))
+    digest.update(f"object{[f'{kind.__module__}.{kind.__qualname__}' for kind in kinds]}\x1f".encode())
+    digest.update(codes.data)
+    numeric = np.isin(codes, [i for i, kind in enumerate(kinds) if issubclass(kind, (*NUMBERS, np.number, np.bool_))])
+    try:
+        digest.update(values[numeric].astype(np.float64).data)
+    except OverflowError:
+        numeric[:] = False
+    if not numeric.all():
+        digest.update(pd.util.hash_array(values[~numeric], categorize=False).data)
+
+def fingerprint(args, kwargs):
+    digest = hashlib.blake2b(digest_size=20)
+    _feed(digest, args)
+    _feed(digest, sorted(kwargs.items()))
+    return digest.digest()
+
+def _code_names(code):
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _code_names(const)
+
+def _feed_code(digest, code):
+    # marshal.dumps(code) is not stable: it depends on the reference counts of the constants
+    digest.update(code.co_code)
+    _feed(digest, (code.co_names, code.co_varnames, code.co_freevars, code.co_cellvars))
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _feed_code(digest, const)
+        else:
+            digest.update(repr(const).encode() + b"\x1f")
+
+def _code_parts(value):
+    # The functions behind a class attribute, a property or an lru_cache wrapper
+    for name in ('fget', 'fset', 'func', '__func__', '__wrapped__'):
+        part = getattr(value, name, None)
+        if part is not None:
+            yield part
+
+_code_keys = weakref.WeakKeyDictionary()
+
+def code_key(function):
+    # Fingerprint of the code function runs: its bytecode and defaults, and recursively the
+    # functions and classes defined next to it (same __module__) that it names, plus the
+    # numbers, strings and tuples of them it reads from its globals. Libraries are left out.
+    try:
+        return _code_keys[function]
+    except (KeyError, TypeError):
+        pass
+    module = getattr(function, '__module__', None)
+    digest = hashlib.blake2b(digest_size=20)
+    seen = set()
+    stack = [function]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, types.FunctionType):
+            digest.update(f"function {value.__qualname__}\x1f".encode())
+            _feed_code(digest, value.__code__)
+            digest.update(repr((value.__defaults__, value.__kwdefaults__)).encode())
+            for name in sorted(set(_code_names(value.__code__))):
+                found = value.__globals__.get(name)
+                if getattr(found, '__module__', None) == module and (callable(found) or isinstance(found, type)):
+                    stack.append(found)
+                elif isinstance(found, (*IMMUTABLE, tuple, frozenset)):
+                    try:
+                        _feed(digest, (name, found))
+                    except Unfingerprintable:
+                        pass
+        elif isinstance(value, type):
+            digest.update(f"class {value.__qualname__}\x1f".encode())
+            for name, attribute in vars(value).items():
+                if isinstance(attribute, types.FunctionType):
+                    stack.append(attribute)
+                else:
+                    stack.extend(_code_parts(attribute))
+        else:
+            stack.extend(_code_parts(value))
+    key = digest.digest()
+    try:
+        _code_keys[function] = key
+    except TypeError:
+        pass
+    return key
+
+def _copy(result):
+    # Callers get their own copy, so changing a result does not change the remembered one
+    return result if isinstance(result, IMMUTABLE) else copy.deepcopy(result)
+
+def _rebind(result, namespace):
+    # A result tuple remembered from an earlier run of the cell, as the cell's current class of
+    # the same name (its format_* function checks isinstance against that one)
+    if isinstance(result, tuple) and hasattr(result, '_fields'):
+        current = namespace.get(type(result).__name__)
+        values = [_rebind(value, namespace) for value in result]
+        if isinstance(current, type) and current is not type(result) and getattr(current, '_fields', None) == result._fields:
+            return current._make(values)
+        return type(result)._make(values)
+    return result
+
+def wrap(function):
+    # Remember function's results by the fingerprint of its arguments
+    seeded = 'seed' in inspect.signature(function).parameters
+    signature = inspect.signature(function) if seeded else None
+
+    @wraps(function)
+    def call(*args, **kwargs):
+        if not _enabled:
+            return function(*args, **kwargs)
+        # A random calculator is only repeatable with a seed
+        if seeded and signature.bind(*args, **kwargs).arguments.get('seed') is None:
+            with _lock:
+                _counts['bypassed'] += 1
+            return function(*args, **kwargs)
+        try:
+            key = (code_key(function), fingerprint(args, kwargs))
+        except Unfingerprintable:
+            with _lock:
+                _counts['bypassed'] += 1
+            return function(*args, **kwargs)
+
+        with _lock:
+            if key in _results:
+                _results.move_to_end(key)
+                _counts['hits'] += 1
+                result = _results[key]
+                hit = True
+            else:
+                _counts['misses'] += 1
+                hit = False
+        if hit:
+            return _rebind(_copy(result), function.__globals__)
+
+        result = function(*args, **kwargs)
+        with _lock:
+            _results[key] = _copy(result)
+            while len(_results) > _maxsize:
+                _results.popitem(last=False)
+                _counts['evictions'] += 1
+        return result
+    return call
+
+_wrapped = weakref.WeakKeyDictionary()
+
+def remember(function, *args, **kwargs):
+    # function(*args, **kwargs), remembered: the template lines' way through the memo
+    try:
+        call = _wrapped[function]
+    except KeyError:
+        call = _wrapped[function] = wrap(function)
+    return call(*args, **kwargs)
+
+def stats():
+    with _lock:
+        return dict(_counts, size=len(_results), maxsize=_maxsize)
+
+def clear():
+    with _lock:
+        _results.clear()
+        for name in _counts:
+            _counts[name] = 0
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def set_maxsize(maxsize):
+    global _maxsize
+    with _lock:
+        _maxsize = maxsize
+        while len(_results) > _maxsize:
+            _results.popitem(last=False)
+            _counts['evictions'] += 1
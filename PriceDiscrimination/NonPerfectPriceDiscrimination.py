@@ -1,5 +1,31 @@
 import pandas as pd
 import itertools
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class SinglePriceResult(NamedTuple):
+    # Profit-maximizing single price; format_price_discrimination gives the Excel text
+    price: float
+    customers_served: int
+    profit: float
+    consumer_surplus: float
+    producer_surplus: float
+    DWL: float
+
+class CouponPriceResult(NamedTuple):
+    # Profit-maximizing list and coupon prices when customers below CouponBreakPoint get the coupon
+    list_price: float
+    discount_price: float
+    customers_served: int
+    profit: float
+    consumer_surplus: float
+    producer_surplus: float
+    DWL: float
+
+class PriceDiscriminationResult(NamedTuple):
+    single_price: SinglePriceResult
+    coupon: CouponPriceResult  # None without a CouponBreakPoint
 
 def PriceDiscrimination(df, MC, FixedCost=0, CouponBreakPoint=None):
     if df is None:
@@ -70,14 +96,11 @@ def PriceDiscrimination(df, MC, FixedCost=0, CouponBreakPoint=None):
             best_dwl = dwl
             best_sold_count = Q
 
-    # Construct output
-    # Output string (no coupon scenario)
-    result = (f"To maximize profit charge {best_price:.2f}, and serve {best_sold_count} customers, "
-                f"and make a profit of {best_profit:.2f}\n"
-                f"Consumer Surplus = {best_cs:.2f}, Producer Surplus = {best_ps:.2f}, DWL = {best_dwl:.2f}")
+    # No coupon scenario
+    single_price = SinglePriceResult(best_price, best_sold_count, best_profit, best_cs, best_ps, best_dwl)
     
     if CouponBreakPoint is None:
-        return result
+        return PriceDiscriminationResult(single_price, None)
     else:
         # With coupon segmentation
         # Split into coupon and non-coupon groups
@@ -152,11 +175,30 @@ def PriceDiscrimination(df, MC, FixedCost=0, CouponBreakPoint=None):
                     best_dwl = dwl
                     best_sold_count = Q
 
-        # Construct output (with coupon scenario)
-        result2 = (f"Optimal Coupon Discount: {best_list_price - best_discount_price:.2f}\n"
-                  f"To maximize profit: list price at {best_list_price:.2f} and discount price at {best_discount_price:.2f}.\n"
-                  f"Serve {best_sold_count} customers, and make a profit of {best_profit:.2f}\n"
-                  f"Consumer Surplus = {best_cs:.2f}, Producer Surplus = {best_ps:.2f}, DWL = {best_dwl:.2f}")
-        return result + '\n' + '----------------------------------------------------' + '\n' + result2
+        # With coupon scenario
+        coupon = CouponPriceResult(best_list_price, best_discount_price, best_sold_count, best_profit, best_cs, best_ps, best_dwl)
+        return PriceDiscriminationResult(single_price, coupon)
 
-PriceDiscrimination(arg1, arg2, arg3, arg4)
\ No newline at end of file
+def format_price_discrimination(result):
+    if not isinstance(result, PriceDiscriminationResult):
+        return result
+
+    # Construct output
+    # Output string (no coupon scenario)
+    single = result.single_price
+    output = (f"To maximize profit charge {single.price:.2f}, and serve {single.customers_served} customers, "
+                f"and make a profit of {single.profit:.2f}\n"
+                f"Consumer Surplus = {single.consumer_surplus:.2f}, Producer Surplus = {single.producer_surplus:.2f}, DWL = {single.DWL:.2f}")
+
+    if result.coupon is None:
+        return output
+
+    # Construct output (with coupon scenario)
+    coupon = result.coupon
+    output2 = (f"Optimal Coupon Discount: {coupon.list_price - coupon.discount_price:.2f}\n"
+              f"To maximize profit: list price at {coupon.list_price:.2f} and discount price at {coupon.discount_price:.2f}.\n"
+              f"Serve {coupon.customers_served} customers, and make a profit of {coupon.profit:.2f}\n"
+              f"Consumer Surplus = {coupon.consumer_surplus:.2f}, Producer Surplus = {coupon.producer_surplus:.2f}, DWL = {coupon.DWL:.2f}")
+    return output + '\n' + '----------------------------------------------------' + '\n' + output2
+
+format_price_discrimination(remember(PriceDiscrimination, arg1, arg2, arg3, arg4))
\ No newline at end of file
@@ -1,4 +1,23 @@
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class CouponDiscountResult(NamedTuple):
+    # Best coupon for the customers below CouponBreakPoint, against a list price for the rest
+    coupon_discount: float
+    list_price: float
+    coupon_price: float
+    producer_surplus: float
+    consumer_surplus: float
+    total_surplus: float
+    DWL: float
+
+class PerfectPriceDiscriminationResult(NamedTuple):
+    # Profit under perfect price discrimination, and the coupon scenario when CouponBreakPoint
+    # is given (None otherwise); format_perfect_price_discrimination gives the Excel text
+    profit: float
+    coupon: CouponDiscountResult
 
 def PerfectPriceDiscrimination(df, MC, FixedCost=None, CouponBreakPoint=None):
     if df is None:
@@ -28,11 +47,9 @@ def PerfectPriceDiscrimination(df, MC, FixedCost=None, CouponBreakPoint=None):
     # Producer Surplus under perfect price discrimination
     PS_PPD = sum([w - MC for w in served_PPD]) - FixedCost
     
-    output = f"Perfect price discrimination the profit (Producer Surplus) is: {PS_PPD}"
-    
     # If no coupon break point is given, we're done.
     if CouponBreakPoint is None:
-        return output
+        return PerfectPriceDiscriminationResult(PS_PPD, None)
     
     # If coupon break point is given:
     # Split customers into high and low groups
@@ -120,12 +137,24 @@ def PerfectPriceDiscrimination(df, MC, FixedCost=None, CouponBreakPoint=None):
     # DWL = TS_ppd - TS_coupon
     DWL = TS_ppd - TS_coupon
     
-    output += (f"\nOptimal coupon discount: {best_discount}\n"
-                f"List Price: {posted_price} & Coupon Price: {coupon_price}\n"
-                f"Producer Surplus: {best_PS_total} & Consumer Surplus: {CS}\n"
-                f"Total Surplus: {TS_coupon}\n"
-                f"Deadweight Loss: {DWL}")
+    coupon = CouponDiscountResult(best_discount, posted_price, coupon_price, best_PS_total, CS, TS_coupon, DWL)
+    return PerfectPriceDiscriminationResult(PS_PPD, coupon)
+
+def format_perfect_price_discrimination(result):
+    if not isinstance(result, PerfectPriceDiscriminationResult):
+        return result
+
+    output = f"Perfect price discrimination the profit (Producer Surplus) is: {result.profit}"
+    if result.coupon is None:
+        return output
+
+    coupon = result.coupon
+    output += (f"\nOptimal coupon discount: {coupon.coupon_discount}\n"
+                f"List Price: {coupon.list_price} & Coupon Price: {coupon.coupon_price}\n"
+                f"Producer Surplus: {coupon.producer_surplus} & Consumer Surplus: {coupon.consumer_surplus}\n"
+                f"Total Surplus: {coupon.total_surplus}\n"
+                f"Deadweight Loss: {coupon.DWL}")
 
     return output
 
-PerfectPriceDiscrimination(arg1, arg2, arg3, arg4)
\ No newline at end of file
+format_perfect_price_discrimination(remember(PerfectPriceDiscrimination, arg1, arg2, arg3, arg4))
\ No newline at end of file
@@ -0,0 +1,194 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (parse_equation, solve_bracketed, column) to run first
+
+class SegmentDemand:
+    # Every segment's demand "Q = 500 - 4P" as a weighted sum of the terms used across all
+    # segments (1, P, P^2, ...): Q_i(P) = Σ_k C[i, k] T_k(P). The terms, their first two
+    # derivatives and antiderivatives are compiled once, so every segment is evaluated at once,
+    # each at its own price, with a handful of array operations.
+
+    def __init__(self, demand_eqs):
+        import sympy as sp
+        P = sp.Symbol('P', real=True)
+        columns = {}
+        rows = []
+        for eq in demand_eqs:
+            expr = sp.sympify(parse_equation(eq), {'P': P})
+            unknown = expr.free_symbols - {P}
+            if unknown:
+                raise ValueError(f"Unknown symbols {sorted(map(str, unknown))} in \"{eq}\".")
+            row = {}
+            for term, value in expr.as_coefficients_dict().items():
+                row[columns.setdefault(term, len(columns))] = float(value)
+            rows.append(row)
+
+        self.C = np.zeros((len(rows), len(columns)))
+        for i, row in enumerate(rows):
+            for k, value in row.items():
+                self.C[i, k] = value
+        # (T, T', T'', ∫T) for each term
+        self.terms = [tuple(sp.lambdify(P, expr, 'numpy') for expr in
+                            (term, term.diff(P), term.diff(P, 2), sp.integrate(term, P)))
+                      for term in columns]
+
+    def evaluate(self, price, part=0, C=None):
+        # Q_i (part 0), Q_i', Q_i'' or ∫Q_i dP (part 3) at price, row by row of C
+        C = self.C if C is None else C
+        price = np.broadcast_to(np.asarray(price, dtype=float), (len(C),))
+        total = np.zeros(len(C))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for k, calculus in enumerate(self.terms):
+                total += C[:, k] * np.broadcast_to(calculus[part](price), total.shape)
+        return total
+
+def choke_prices(demand, MC):
+    # The price above MC where each segment's demand reaches zero; MC for a segment that buys
+    # nothing at MC, and inf for one whose demand never reaches zero
+    n = len(demand.C)
+    Q_MC = demand.evaluate(MC)
+    high = np.full(n, float(MC) + 1.0)
+    width = 1.0
+    unbounded = Q_MC > 0
+    while width < 1e12:
+        unbounded &= demand.evaluate(high) > 0
+        if not unbounded.any():
+            break
+        width *= 8
+        high = np.where(unbounded, float(MC) + width, high)
+    served = Q_MC > 0
+    choke = np.where(served, np.inf, float(MC))
+    closed = served & ~unbounded
+    if closed.any():
+        choke[closed] = solve_bracketed(lambda P: demand.evaluate(P, 0, demand.C[closed]),
+                                        lambda P: demand.evaluate(P, 1, demand.C[closed]),
+                                        np.full(closed.sum(), float(MC)), high[closed])
+    return choke
+
+def segment_outcomes(demand, prices, choke, MC):
+    # Quantity, CS, PS and DWL of every segment at its price. A segment buys nothing above its
+    # choke price; CS = ∫ from P to the choke price of Q_i, PS = (P - MC) Q_i and
+    # DWL = ∫ from MC to P of Q_i - PS, the surplus lost against pricing at MC.
+    prices = np.broadcast_to(np.asarray(prices, dtype=float), choke.shape)
+    sold = np.minimum(prices, choke)
+    Q = np.where(prices < choke, np.maximum(demand.evaluate(sold), 0.0), 0.0)
+    area_top = demand.evaluate(choke, 3)
+    area_price = demand.evaluate(sold, 3)
+    area_MC = demand.evaluate(np.minimum(float(MC), choke), 3)
+    CS = np.where(prices < choke, area_top - area_price, 0.0)
+    PS = (prices - MC) * Q
+    DWL = np.where(choke > MC, area_price - area_MC, 0.0) - PS
+    return Q, CS, PS, DWL
+
+def marginal_profit(demand, C, P, MC, part=0):
+    # d/dP (P - MC) Q(P) = Q + (P - MC) Q' (part 0), and its slope 2Q' + (P - MC) Q'' (part 1),
+    # for the demands with coefficients C
+    if part == 0:
+        return demand.evaluate(P, 0, C) + (P - MC) * demand.evaluate(P, 1, C)
+    return 2 * demand.evaluate(P, 1, C) + (P - MC) * demand.evaluate(P, 2, C)
+
+def profit_maximizing_prices(demand, C, MC, low, high):
+    # MR = MC for every row of C, on the bracket low..high where MR - MC changes sign
+    return solve_bracketed(lambda P: marginal_profit(demand, C, P, MC),
+                           lambda P: marginal_profit(demand, C, P, MC, 1), low, high)
+
+def uniform_price(demand, choke, MC):
+    # One price for every segment. Aggregate demand is kinked at each choke price, so with the
+    # segments sorted by choke price, between the j-th and (j+1)-th highest choke price only the
+    # top j segments buy: the sum of their demands is smooth there, with coefficients the
+    # cumulative sums of theirs. MR = MC is solved on every such interval at once, and the best
+    # interior root or interval end is the profit-maximizing uniform price.
+    served = np.flatnonzero(choke > MC)
+    order = served[np.argsort(-choke[served])]
+    C = np.cumsum(demand.C[order], axis=0)
+    top = choke[order]
+    bottom = np.append(top[1:], MC)
+
+    candidates = [bottom, top]
+    inside = (marginal_profit(demand, C, bottom, MC) > 0) & (marginal_profit(demand, C, top, MC) <= 0)
+    if inside.any():
+        roots = bottom.copy()
+        roots[inside] = profit_maximizing_prices(demand, C[inside], MC, bottom[inside], top[inside])
+        candidates.append(roots)
+    profits = [(price - MC) * demand.evaluate(price, 0, C) for price in candidates]
+    best = np.nanargmax(np.concatenate(profits))
+    return float(np.concatenate(candidates)[best])
+
+@lru_cache(maxsize=32)
+def get_segment_demand(demand_eqs):
+    # One shared SegmentDemand per tuple of equations, like get_market
+    return SegmentDemand(demand_eqs)
+
+def SegmentPricing(segments_df, MC, FixedCost=0):
+    # segments_df is an Excel range with one row per customer segment, headers in the first row:
+    #   Segment (optional) | Demand
+    # e.g. Demand "Q = 500 - 4P" or "Q = 80 - 0.5P^2". MC is the constant marginal cost.
+    # Third-degree price discrimination: every segment gets the price where its MR = MC; the
+    # benchmark is the profit-maximizing single price for all of them. Both are solved numerically
+    # on the compiled demand terms, every segment at once. Returns one row per segment (price,
+    # quantity, CS, PS, DWL under both) and a Total row whose Profit is net of FixedCost.
+
+    if segments_df is None or len(segments_df) < 2:
+        return ""
+
+    MC = float(MC or 0)
+    FixedCost = float(FixedCost or 0)
+
+    # The first row are the headers
+    segments_df.columns = segments_df.iloc[0]
+    segments_df = segments_df[1:]
+    demand_column = column(segments_df, 'demand')
+    if demand_column is None:
+        return "The table needs a Demand column."
+    # Blank rows below the segments are ignored
+    segments_df = segments_df[demand_column.notna()]
+    n = len(segments_df)
+    names = column(segments_df, 'segment')
+    names = [f"Segment {i + 1}" for i in range(n)] if names is None else [str(name) for name in names]
+
+    try:
+        demand = get_segment_demand(tuple(str(eq) for eq in column(segments_df, 'demand')))
+    except (ValueError, TypeError, SyntaxError) as error:
+        return str(error)
+
+    choke = choke_prices(demand, MC)
+    if np.isinf(choke).any():
+        segment = names[int(np.flatnonzero(np.isinf(choke))[0])]
+        return f"Demand in {segment} never reaches zero; profit has no maximum."
+
+    # Discrimination: MR_i = MC in every segment buying anything at MC, between MC and its choke price
+    served = choke > MC
+    prices = choke.copy()
+    if served.any():
+        prices[served] = profit_maximizing_prices(demand, demand.C[served], MC,
+                                                  np.full(served.sum(), MC), choke[served])
+    Q, CS, PS, DWL = segment_outcomes(demand, prices, choke, MC)
+
+    # Benchmark: one price for everyone
+    P_uniform = uniform_price(demand, choke, MC) if served.any() else MC
+    Q_u, CS_u, PS_u, DWL_u = segment_outcomes(demand, P_uniform, choke, MC)
+
+    table = pd.DataFrame({
+        'Segment': names,
+        'Price': np.where(served, prices, np.nan),
+        'Quantity': Q,
+        'Consumer Surplus': CS,
+        'Producer Surplus': PS,
+        'DWL': DWL,
+        'Uniform Price': P_uniform,
+        'Uniform Quantity': Q_u,
+        'Uniform Consumer Surplus': CS_u,
+        'Uniform Producer Surplus': PS_u,
+        'Uniform DWL': DWL_u,
+    })
+    total = {'Segment': 'Total', 'Quantity': Q.sum(), 'Consumer Surplus': CS.sum(),
+             'Producer Surplus': PS.sum(), 'DWL': DWL.sum(), 'Uniform Price': P_uniform,
+             'Uniform Quantity': Q_u.sum(), 'Uniform Consumer Surplus': CS_u.sum(),
+             'Uniform Producer Surplus': PS_u.sum(), 'Uniform DWL': DWL_u.sum(),
+             'Profit': PS.sum() - FixedCost, 'Uniform Profit': PS_u.sum() - FixedCost}
+    return pd.concat([table, pd.DataFrame([total])], ignore_index=True)
+
+remember(SegmentPricing, arg1, arg2, arg3)
\ No newline at end of file
@@ -1,4 +1,17 @@
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class BundlingResult(NamedTuple):
+    # Best separate prices and best combo price with their profits (after fixed cost);
+    # format_profit_details gives the Excel text
+    products: tuple
+    separate_prices: tuple
+    separate_profit: float
+    combo_price: float
+    combo_profit: float
+    recommendation: str
 
 def compute_profit_details(df, fixed_cost=None, MC=None, PerComboCost=None):
 
@@ -94,17 +107,25 @@ def compute_profit_details(df, fixed_cost=None, MC=None, PerComboCost=None):
     else:
         recommendation = 'separately'
     
+    return BundlingResult((product1, product2), tuple(separate_prices), total_separate_profit,
+                          best_combo_price, total_combo_profit, recommendation)
+
+def format_profit_details(result):
+    if not isinstance(result, BundlingResult):
+        return result
+
     # Extract item names
-    itemA, itemB = product1, product2
-    
+    itemA, itemB = result.products
+    separate_prices = result.separate_prices
+
     # Format the output string
     output = (
         f"Maximum Separately: {separate_prices[0]} per {itemA}, {separate_prices[1]} per {itemB}, "
-        f"for a Total Profit {total_separate_profit:.2f}\n"
-        f"Maximum Combo: {best_combo_price} per combo, for a Total Profit {total_combo_profit:.2f}\n"
-        f"Recommended {recommendation}."
+        f"for a Total Profit {result.separate_profit:.2f}\n"
+        f"Maximum Combo: {result.combo_price} per combo, for a Total Profit {result.combo_profit:.2f}\n"
+        f"Recommended {result.recommendation}."
     )
-    
+
     return output
 
-compute_profit_details(arg1, arg2, arg3, arg4)
\ No newline at end of file
+format_profit_details(remember(compute_profit_details, arg1, arg2, arg3, arg4))
\ No newline at end of file
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import linprog
+from scipy.sparse import csr_matrix, eye, kron, vstack
+
+# Requires the Memo.py cell (remember) to run first
+
+def assign_production(working_time, df, targets=None, weights=None, unit='time'):
+    # df is a (people x goods) table with a 'Person' column and one column per good
+    # unit='time': values are minutes per item (like CalculateProduction_via_oc)
+    # unit='rate': values are items per hour (like CalculateProduction_via_oc_alt)
+    # targets: minimum quantity per good, as {good: quantity} or a list in column order
+    # weights: value of one unit of each good in the objective, same forms as targets
+    #          (default: 1 for goods without a target, 0 for goods with one)
+    if df is None:
+        return ""
+
+    # Set the first row as column headers
+    df.columns = df.iloc[0]
+    # Remove the first row
+    df = df[1:]
+    # Reset the index to start from 0
+    df = df.reset_index(drop=True)
+
+    # Validate that the 'Person' column exists
+    if 'Person' not in df.columns:
+        return ""
+
+    goods = [col for col in df.columns if col != 'Person']
+    if len(goods) == 0 or df.empty:
+        return ""
+
+    # Items per unit of working time for every person and good
+    values = df[goods].to_numpy(dtype=float)
+    if unit == 'time':
+        rates = 1 / values
+    elif unit == 'rate':
+        rates = values
+    else:
+        return ""
+
+    def per_good(spec, default):
+        # Accept a dict keyed by good or a sequence in column order
+        if spec is None:
+            return np.full(len(goods), default, dtype=float)
+        if isinstance(spec, dict):
+            return np.array([spec.get(good, default) for good in goods], dtype=float)
+        spec = np.asarray(spec, dtype=float).ravel()
+        if len(spec) != len(goods):
+            raise ValueError(f"Expected {len(goods)} values, one per good: {goods}")
+        return spec
+
+    target_values = per_good(targets, np.nan)
+    has_target = ~np.isnan(target_values)
+    weight_values = per_good(weights, np.nan)
+    weight_values = np.where(np.isnan(weight_values), np.where(has_target, 0.0, 1.0), weight_values)
+
+    # Decision variables: x[i * n_goods + j] = time person i spends on good j
+    n_people, n_goods = rates.shape
+
+    # Maximize the weighted output (linprog minimizes)
+    c = -(rates * weight_values).ravel()
+
+    # Each person works at most working_time in total
+    time_rows = kron(eye(n_people, format='csr'), np.ones((1, n_goods)), format='csr')
+    time_limits = np.full(n_people, float(working_time))
+
+    # Output of every targeted good is at least its target: -sum_i rate_ij * x_ij <= -target_j
+    target_goods = np.flatnonzero(has_target)
+    columns = (np.arange(n_people)[:, None] * n_goods + target_goods[None, :]).ravel()
+    rows = np.tile(np.arange(len(target_goods)), n_people)
+    target_rows = csr_matrix((-rates[:, target_goods].ravel(), (rows, columns)), shape=(len(target_goods), n_people * n_goods))
+
+    solution = linprog(
+        c,
+        A_ub=vstack([time_rows, target_rows], format='csr'),
+        b_ub=np.concatenate((time_limits, -target_values[target_goods])),
+        bounds=(0, None),
+        method='highs',
+    )
+    if solution.status != 0:
+        return ""
+
+    # Items each person makes of each good, followed by the totals
+    output = solution.x.reshape(n_people, n_goods) * rates
+    assignments = pd.DataFrame(np.round(output, 2), columns=goods)
+    assignments.insert(0, 'Person', df['Person'].tolist())
+    totals = pd.DataFrame([['Total'] + np.round(output.sum(axis=0), 2).tolist()], columns=assignments.columns)
+
+    return pd.concat([assignments, totals], ignore_index=True)
+
+remember(assign_production, arg1, arg2, arg3, arg4, arg5)
\ No newline at end of file
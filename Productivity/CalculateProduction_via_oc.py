@@ -1,8 +1,26 @@
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class ProductionTotals(NamedTuple):
+    # Unrounded totals with their pluralized labels; format_production_totals gives the Excel text
+    item: str
+    item_total: float
+    other_item: str
+    other_item_total: float
 
 def calculate_production(working_time, num_assigned, item, df):
     if df is None:
         return ""
+
+    # A prebuilt Workforce (Workforce.py) answers from its cached opportunity-cost order
+    if not isinstance(df, pd.DataFrame):
+        production_totals = df.production(working_time, num_assigned, item)
+        if production_totals is None:
+            return ""
+        (item_label, item_total), (other_label, other_total) = production_totals.items()
+        return ProductionTotals(item_label, item_total, other_label, other_total)
     
     # Set the first row as column headers
     df.columns = df.iloc[0]
@@ -33,8 +51,8 @@ def calculate_production(working_time, num_assigned, item, df):
     df = df.copy()  # To avoid SettingWithCopyWarning
     df['Opportunity Cost'] = df[item] / df[other_item]
     
-    # Sort the DataFrame based on Opportunity Cost in ascending order
-    df_sorted = df.sort_values('Opportunity Cost')
+    # Sort the DataFrame based on Opportunity Cost in ascending order; equal costs keep table order
+    df_sorted = df.sort_values('Opportunity Cost', kind='stable')
     
     # Assign the specified number of people to produce the desired item
     assigned = df_sorted.head(num_assigned)
@@ -48,15 +66,20 @@ def calculate_production(working_time, num_assigned, item, df):
     # Calculate total production for the non-assigned group
     total_other_item = (working_time / non_assigned[other_item]).sum()
     
+    # Pluralized item names with their totals
+    return ProductionTotals(f"{item}s", total_item, f"{other_item}s", total_other_item)
+
+def format_production_totals(result):
+    if not isinstance(result, ProductionTotals):
+        return result
+
     # Prepare the result dictionary with pluralized item names
     production_totals = {
-        f"{item}s": round(total_item, 2),
-        f"{other_item}s": round(total_other_item, 2)
+        result.item: round(result.item_total, 2),
+        result.other_item: round(result.other_item_total, 2)
     }
 
     # Convert the dictionary to a string for output
-    result = ', '.join([f"{value} {key}" for key, value in production_totals.items()])
-    
-    return result
+    return ', '.join([f"{value} {key}" for key, value in production_totals.items()])
 
-calculate_production(arg1, arg2, arg3, arg4)
\ No newline at end of file
+format_production_totals(remember(calculate_production, arg1, arg2, arg3, arg4))
\ No newline at end of file
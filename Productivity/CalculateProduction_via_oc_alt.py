@@ -1,8 +1,26 @@
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class TotalProduction(NamedTuple):
+    # Unrounded totals with their pluralized labels; format_total_production gives the Excel text
+    item: str
+    item_total: float
+    other_item: str
+    other_item_total: float
 
 def calculate_total_production(working_hours, num_assigned, item, df):
     if df is None:
         return ""
+
+    # A prebuilt Workforce (Workforce.py) answers from its cached opportunity-cost order
+    if not isinstance(df, pd.DataFrame):
+        answer = df.production(working_hours, num_assigned, item)
+        if answer is None:
+            return ""
+        (item_label, item_total), (other_label, other_total) = answer.items()
+        return TotalProduction(item_label, float(item_total), other_label, float(other_total))
     
     # Set the first row as column headers
     df.columns = df.iloc[0]
@@ -19,31 +37,43 @@ def calculate_total_production(working_hours, num_assigned, item, df):
     if item not in df.columns:
         return ""
 
-    # Calculate Opportunity Cost (ties per hat)
-    df['Opportunity_Cost'] = df['tie'] / df['hat']
+    # The other item is the one remaining column
+    other_items = [col for col in df.columns if col not in ['Person', item]]
+    if len(other_items) != 1:
+        return ""
+    other_item = other_items[0]
 
-    # Sort by Opportunity Cost ascendingly
-    df_sorted = df.sort_values('Opportunity_Cost').reset_index(drop=True)
+    # Calculate Opportunity Cost (other items given up per item, from items per hour)
+    df = df.copy()  # To avoid SettingWithCopyWarning
+    df['Opportunity_Cost'] = df[other_item] / df[item]
 
-    # Assign the specified number of people to specialize in hats
+    # Sort by Opportunity Cost ascendingly; equal costs keep table order
+    df_sorted = df.sort_values('Opportunity_Cost', kind='stable').reset_index(drop=True)
+
+    # Assign the specified number of people to specialize in the item
     assigned_workers = df_sorted.head(num_assigned)
-    tie_workers = df_sorted.tail(len(df_sorted) - num_assigned)
+    other_workers = df_sorted.tail(len(df_sorted) - num_assigned)
 
-    # Calculate total hats produced
-    total_hats = (assigned_workers['hat'] * working_hours).sum()
+    # Calculate total items produced
+    total_item = (assigned_workers[item] * working_hours).sum()
 
-    # Calculate total ties produced
-    total_ties = (tie_workers['tie'] * working_hours).sum()
+    # Calculate total other items produced
+    total_other_item = (other_workers[other_item] * working_hours).sum()
 
     # Convert numpy.float64 to float
-    total_hats = float(total_hats)
-    total_ties = float(total_ties)
+    total_item = float(total_item)
+    total_other_item = float(total_other_item)
+
+    return TotalProduction(f"{item}s", total_item, f"{other_item}s", total_other_item)
+
+def format_total_production(result):
+    if not isinstance(result, TotalProduction):
+        return result
 
     # Return a string with the total production
-    answer = {'hats': round(total_hats, 2), 'ties': round(total_ties, 2)}
+    answer = {result.item: round(result.item_total, 2), result.other_item: round(result.other_item_total, 2)}
 
     # convert the dictionary to a string for output
-    answer = ', '.join([f"{value} {key}" for key, value in answer.items()])
-    return answer
+    return ', '.join([f"{value} {key}" for key, value in answer.items()])
 
-calculate_total_production(arg1, arg2, arg3, arg4)
\ No newline at end of file
+format_total_production(remember(calculate_total_production, arg1, arg2, arg3, arg4))
\ No newline at end of file
@@ -1,8 +1,35 @@
+import numpy as np
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class ItemCountProduction(NamedTuple):
+    # The items asked for and the most of the other item that still fits (unrounded);
+    # format_item_count_production gives the Excel text
+    item: str
+    number_of_item: float
+    other_item: str
+    other_item_total: float
 
 def calculate_production(working_time, item_name, number_of_item, df):
     if df is None:
         return ""
+
+    # A prebuilt Workforce (Workforce.py) answers from its cached item-time order
+    if not isinstance(df, pd.DataFrame):
+        other_item = df.other_item(item_name)
+        if other_item is None:
+            return ""
+        other_item_total = df.production_for(working_time, item_name, number_of_item, order='time')
+        if np.ndim(number_of_item) > 0:
+            return pd.DataFrame({
+                f"{item_name}s": np.asarray(number_of_item, dtype=float).ravel(),
+                f"{other_item}s": np.round(np.ravel(other_item_total), 2),
+            })
+        if np.isnan(other_item_total):
+            return ""
+        return ItemCountProduction(f"{item_name}s", number_of_item, f"{other_item}s", other_item_total)
     
     # Set the first row as column headers
     df.columns = df.iloc[0]
@@ -26,54 +53,62 @@ def calculate_production(working_time, item_name, number_of_item, df):
     
     other_item = [col for col in item_columns if col != item_name][0]
     
-    # Sort the DataFrame by item_time ascendingly (most efficient producers first)
-    df_sorted = df.sort_values(by=item_name, ascending=True).reset_index(drop=True)
-    
-    items_remaining = number_of_item
-    other_item_total = 0.0
-
-    for idx, row in df_sorted.iterrows():
-        if items_remaining > 0:
-            # Maximum items this worker can produce
-            max_items_worker_can_produce = items_remaining
-            time_needed = max_items_worker_can_produce * row[item_name]
-            
-            if time_needed <= working_time:
-                # Assign the required number of items to this worker
-                items_assigned = max_items_worker_can_produce
-                time_spent = time_needed
-            else:
-                # Assign as many items as possible within working_time
-                items_assigned = working_time / row[item_name]
-                time_spent = items_assigned * row[item_name]
-            
-            # Update the remaining items to assign
-            items_remaining -= items_assigned
-            
-            # Calculate remaining time for other_item production
-            remaining_time = working_time - time_spent
-            
-            # Calculate other_item produced by this worker
-            other_item_produced = remaining_time / row[other_item]
-            other_item_total += other_item_produced
-        else:
-            # No items to assign, assign full time to produce other_item
-            other_item_produced = working_time / row[other_item]
-            other_item_total += other_item_produced
-    
-    # Check if all items have been assigned
-    if items_remaining > 1e-6:
+    if df.empty:
         return ""
-    
+
+    # Sort the DataFrame by item_time ascendingly (most efficient producers first); equal times
+    # keep table order
+    df_sorted = df.sort_values(by=item_name, ascending=True, kind='stable').reset_index(drop=True)
+    item_time = df_sorted[item_name].to_numpy(dtype=float)
+    other_time = df_sorted[other_item].to_numpy(dtype=float)
+
+    # Items each worker can make in the working time, and the running total in sorted order
+    capacity = working_time / item_time
+    cumulative_capacity = np.cumsum(capacity)
+
+    # Other items made by the workers after each position (reverse cumulative sum)
+    other_output = working_time / other_time
+    other_after = np.concatenate((np.cumsum(other_output[::-1])[::-1][1:], [0.0]))
+
+    targets = np.asarray(number_of_item, dtype=float).ravel()
+
+    # Check if all items can be assigned
+    feasible = targets - cumulative_capacity[-1] <= 1e-6
+
+    # The worker who completes each target: everyone before them makes only the item
+    finisher = np.minimum(np.searchsorted(cumulative_capacity, targets, side='left'), len(df_sorted) - 1)
+    made_before = np.where(finisher > 0, cumulative_capacity[finisher - 1], 0.0)
+
+    # The finisher makes the rest of the items and spends the remaining time on other_item
+    items_assigned = np.clip(targets - made_before, 0, capacity[finisher])
+    remaining_time = working_time - items_assigned * item_time[finisher]
+    other_item_total = remaining_time / other_time[finisher] + other_after[finisher]
+
+    # Several targets: answer them all at once
+    if np.ndim(number_of_item) > 0:
+        return pd.DataFrame({
+            f"{item_name}s": targets,
+            f"{other_item}s": np.where(feasible, np.round(other_item_total, 2), np.nan),
+        })
+
+    if not feasible[0]:
+        return ""
+    other_item_total = other_item_total[0]
+
+    return ItemCountProduction(f"{item_name}s", number_of_item, f"{other_item}s", other_item_total)
+
+def format_item_count_production(result):
+    # Several targets come back as a DataFrame, which Excel shows as it is
+    if not isinstance(result, ItemCountProduction):
+        return result
+
     # Prepare the result dictionary with pluralized item names
     production_totals = {
-        f"{item_name}s": number_of_item,
-        f"{other_item}s": round(other_item_total, 2)
+        result.item: result.number_of_item,
+        result.other_item: round(result.other_item_total, 2)
     }
-    
-    # Convert the dictionary to a string for output
-    result = ', '.join([f"{value} {key}" for key, value in production_totals.items()])
 
-    return result
+    # Convert the dictionary to a string for output
+    return ', '.join([f"{value} {key}" for key, value in production_totals.items()])
 
-calculate_production(arg1, arg2, arg3, arg4)
\ No newline at end of file
+format_item_count_production(remember(calculate_production, arg1, arg2, arg3, arg4))
\ No newline at end of file
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Requires the Memo.py cell (remember) to run first
+
+def production_frontier(working_time, item, df):
+    if df is None:
+        return ""
+
+    # A prebuilt Workforce (Workforce.py) already holds the sorted order and running totals
+    if not isinstance(df, pd.DataFrame):
+        frontier = df.frontier(working_time, item)
+        return "" if frontier is None else frontier
+
+    # Set the first row as column headers
+    df.columns = df.iloc[0]
+    # Remove the first row
+    df = df[1:]
+    # Reset the index to start from 0
+    df = df.reset_index(drop=True)
+
+    # Validate that the 'Person' column exists
+    if 'Person' not in df.columns:
+        return ""
+
+    # Ensure the specified item exists in the DataFrame
+    if item not in df.columns:
+        return ""
+
+    # Identify the other item in the DataFrame (excluding 'Person' and the specified item)
+    other_items = [col for col in df.columns if col not in ['Person', item]]
+
+    if len(other_items) != 1:
+        return ""
+    other_item = other_items[0]
+
+    # Opportunity Cost = Minutes per item / Minutes per other_item (same ordering as calculate_production)
+    df = df.copy()  # To avoid SettingWithCopyWarning
+    df['Opportunity Cost'] = df[item] / df[other_item]
+
+    # Sort once: assigning k people to the item always takes the first k rows of this order
+    # Equal opportunity costs keep table order (a stable sort), the same rule as Workforce
+    df_sorted = df.sort_values('Opportunity Cost', kind='stable')
+
+    # Output of each person when working the full time on either item
+    item_output = working_time / df_sorted[item].to_numpy(dtype=float)
+    other_output = working_time / df_sorted[other_item].to_numpy(dtype=float)
+
+    # Totals for k = 0..n people assigned to the item:
+    # the item total is a prefix sum, the other item total is the matching suffix sum
+    total_item = np.concatenate(([0.0], np.cumsum(item_output)))
+    total_other = np.concatenate((np.cumsum(other_output[::-1])[::-1], [0.0]))
+
+    # Each row is a kink of the frontier. Between row k and row k+1 the person in row k+1
+    # splits their time, so the frontier is the straight line joining the two rows and its
+    # slope (other items given up per extra item) is that person's opportunity cost.
+    frontier = pd.DataFrame({
+        'Assigned': np.arange(len(df_sorted) + 1),
+        'Person': [None] + df_sorted['Person'].tolist(),
+        'Opportunity Cost': np.concatenate(([np.nan], (df_sorted[item] / df_sorted[other_item]).to_numpy(dtype=float))),
+        f"{item}s": total_item,
+        f"{other_item}s": total_other,
+    })
+
+    return frontier
+
+def frontier_output(frontier, item, number_of_item):
+    # Other-item output at any point on the frontier, including points where the
+    # marginal person splits their time between both items (linear between kinks)
+    if not isinstance(frontier, pd.DataFrame) or f"{item}s" not in frontier.columns:
+        return ""
+
+    other_column = [col for col in frontier.columns if col not in ['Assigned', 'Person', 'Opportunity Cost', f"{item}s"]][0]
+    item_totals = frontier[f"{item}s"].to_numpy(dtype=float)
+    other_totals = frontier[other_column].to_numpy(dtype=float)
+
+    # Targets beyond what the whole workforce can make are not on the frontier
+    amounts = np.asarray(number_of_item, dtype=float)
+    other_output = np.interp(amounts, item_totals, other_totals)
+    other_output = np.where((amounts < 0) | (amounts > item_totals[-1]), np.nan, other_output)
+
+    if other_output.ndim == 0:
+        return float(other_output)
+    return other_output
+
+remember(production_frontier, arg1, arg2, arg3)
\ No newline at end of file
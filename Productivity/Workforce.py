@@ -0,0 +1,179 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+class Workforce:
+    # Parse a production table once and answer production queries from cached arrays.
+    # Build it in a cell above the calculators, e.g. wf = Workforce(xl("A1:C20"), unit='time'),
+    # then pass wf instead of the table to calculate_production, calculate_total_production,
+    # production_frontier or the item-count calculate_production.
+    #
+    # unit='time': table values are minutes per item (CalculateProduction_via_oc)
+    # unit='rate': table values are items per hour (CalculateProduction_via_oc_alt)
+    #
+    # Outside Excel, wf.save(path) writes the parsed columns and the opportunity-cost orders
+    # as .npy files in a directory, and Workforce.load(path) maps them back read-only: loading
+    # takes the same time for any number of people, and nothing is parsed or sorted again.
+
+    def __init__(self, df, unit='time'):
+        if unit not in ('time', 'rate'):
+            raise ValueError("unit must be 'time' or 'rate'")
+
+        # Set the first row as column headers
+        df.columns = df.iloc[0]
+        # Remove the first row
+        df = df[1:]
+        # Reset the index to start from 0
+        df = df.reset_index(drop=True)
+
+        # Validate that the 'Person' column exists
+        if 'Person' not in df.columns:
+            raise ValueError("The DataFrame must have a 'Person' column.")
+
+        self.unit = unit
+        self.people = df['Person'].tolist()
+        self.goods = [col for col in df.columns if col != 'Person']
+
+        # The table's numbers, and items per unit of working time, one contiguous float64 array per good
+        self.values = {}
+        self.rates = {}
+        for good in self.goods:
+            values = np.ascontiguousarray(df[good].to_numpy(dtype=np.float64))
+            self.values[good] = values
+            self.rates[good] = np.ascontiguousarray(1 / values if unit == 'time' else values)
+
+        # Sorted orders and running totals, built on first use per (item, other_item, order)
+        self._orders = {}
+        # Rankings read back by load(), used instead of sorting again
+        self._rankings = {}
+
+    def __len__(self):
+        return len(self.people)
+
+    def other_item(self, item, other_item=None):
+        if item not in self.rates:
+            return None
+        if other_item is None:
+            other_items = [good for good in self.goods if good != item]
+            if len(other_items) != 1:
+                return None
+            other_item = other_items[0]
+        return other_item if other_item in self.rates and other_item != item else None
+
+    def _order(self, item, other_item, order):
+        key = (item, other_item, order)
+        if key not in self._orders:
+            item_rate = self.rates[item]
+            other_rate = self.rates[other_item]
+            if key in self._rankings:
+                ranking = self._rankings[key]
+            elif order == 'opportunity_cost':
+                # Opportunity Cost = other items given up per item, lowest first, worked out from the
+                # table's numbers exactly as the table functions do; equal costs keep table order
+                item_value = self.values[item]
+                other_value = self.values[other_item]
+                cost = item_value / other_value if self.unit == 'time' else other_value / item_value
+                ranking = np.argsort(cost, kind='stable')
+            elif order == 'time':
+                # Fastest producers of the item first (Calculate_production_via_item_count); equal
+                # times keep table order
+                item_value = self.values[item]
+                ranking = np.argsort(item_value if self.unit == 'time' else -item_value, kind='stable')
+            else:
+                raise ValueError("order must be 'opportunity_cost' or 'time'")
+
+            sorted_item = np.ascontiguousarray(item_rate[ranking])
+            sorted_other = np.ascontiguousarray(other_rate[ranking])
+
+            # Per unit of working time: the first k people on the item make item_before[k],
+            # the people from position k on make other_from[k] of the other item
+            item_before = np.concatenate(([0.0], np.cumsum(sorted_item)))
+            other_from = np.concatenate((np.cumsum(sorted_other[::-1])[::-1], [0.0]))
+
+            self._orders[key] = (ranking, sorted_item, sorted_other, item_before, other_from)
+        return self._orders[key]
+
+    def production(self, working_time, num_assigned, item, other_item=None):
+        # Totals when the num_assigned lowest-opportunity-cost people make the item
+        other_item = self.other_item(item, other_item)
+        if other_item is None:
+            return None
+        _, _, _, item_before, other_from = self._order(item, other_item, 'opportunity_cost')
+
+        # Nobody on a good means exactly 0 of it, as with an empty sum in the table functions
+        assigned = int(np.clip(num_assigned, 0, len(self)))
+        return {
+            f"{item}s": working_time * item_before[assigned] if assigned > 0 else 0,
+            f"{other_item}s": working_time * other_from[assigned] if assigned < len(self) else 0,
+        }
+
+    def production_for(self, working_time, item, number_of_item, other_item=None, order='opportunity_cost'):
+        # Most of the other item that can be made while still making number_of_item of the item.
+        # number_of_item may be an array; targets beyond capacity give NaN.
+        other_item = self.other_item(item, other_item)
+        if other_item is None:
+            return None
+        _, sorted_item, sorted_other, item_before, other_from = self._order(item, other_item, order)
+
+        targets = np.asarray(number_of_item, dtype=np.float64)
+        feasible = targets - working_time * item_before[-1] <= 1e-6
+
+        # The person completing each target splits their time, everyone after makes the other item
+        finisher = np.clip(np.searchsorted(item_before[1:], targets / working_time, side='left'), 0, len(self) - 1)
+        items_left = np.clip(targets - working_time * item_before[finisher], 0, working_time * sorted_item[finisher])
+        remaining_time = working_time - items_left / sorted_item[finisher]
+        other_total = remaining_time * sorted_other[finisher] + working_time * other_from[finisher + 1]
+
+        other_total = np.where(feasible, other_total, np.nan)
+        if other_total.ndim == 0:
+            return float(other_total)
+        return other_total
+
+    def frontier(self, working_time, item, other_item=None):
+        # Every kink of the production possibilities frontier (see ProductionFrontier.py)
+        other_item = self.other_item(item, other_item)
+        if other_item is None:
+            return None
+        ranking, sorted_item, sorted_other, item_before, other_from = self._order(item, other_item, 'opportunity_cost')
+
+        return pd.DataFrame({
+            'Assigned': np.arange(len(self) + 1),
+            'Person': [None] + [self.people[i] for i in ranking],
+            'Opportunity Cost': np.concatenate(([np.nan], sorted_other / sorted_item)),
+            f"{item}s": working_time * item_before,
+            f"{other_item}s": working_time * other_from,
+        })
+
+    def save(self, path):
+        # One .npy per good's numbers and rates, the people, and the opportunity-cost ranking of every pair of goods
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / 'people.npy', np.asarray([str(person) for person in self.people]))
+        for j, good in enumerate(self.goods):
+            np.save(path / f"values-{j}.npy", self.values[good])
+            np.save(path / f"rates-{j}.npy", self.rates[good])
+        orders = []
+        for i, item in enumerate(self.goods):
+            for j, other_item in enumerate(self.goods):
+                if i != j:
+                    np.save(path / f"order-{i}-{j}.npy", self._order(item, other_item, 'opportunity_cost')[0])
+                    orders.append([i, j])
+        (path / 'meta.json').write_text(json.dumps({'unit': self.unit, 'goods': self.goods, 'orders': orders}))
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        meta = json.loads((path / 'meta.json').read_text())
+        workforce = cls.__new__(cls)
+        workforce.unit = meta['unit']
+        workforce.goods = meta['goods']
+        workforce.people = np.load(path / 'people.npy', mmap_mode='r')
+        workforce.values = {good: np.load(path / f"values-{j}.npy", mmap_mode='r') for j, good in enumerate(workforce.goods)}
+        workforce.rates = {good: np.load(path / f"rates-{j}.npy", mmap_mode='r') for j, good in enumerate(workforce.goods)}
+        workforce._orders = {}
+        workforce._rankings = {}
+        for i, j in meta['orders']:
+            key = (workforce.goods[i], workforce.goods[j], 'opportunity_cost')
+            workforce._rankings[key] = np.load(path / f"order-{i}-{j}.npy", mmap_mode='r')
+        return workforce
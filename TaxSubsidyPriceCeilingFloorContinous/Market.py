@@ -0,0 +1,599 @@
+import hashlib
+import os
+import pickle
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from functools import cached_property, lru_cache
+import numpy as np
+from scipy.integrate import quad
+from scipy.optimize import brentq, minimize_scalar
+
+# Shared market core for the continuous calculators (Tax, Subsidy, PriceGuarantee,
+# CalculateTax, CalculateSubsidy, PriceGuaranteeSimulation).
+# Run this cell before them: they all look up their market with get_market, so the
+# no-policy equilibrium, inverse curves and baseline surplus of a market are worked out
+# once, on first use, and reused by every policy question asked about it.
+# The curves are parsed by sympy and compiled from the parsed expressions with lambdify;
+# the numeric calculators (PriceGuarantee's default path, PriceGuaranteeSimulation) use
+# only the compiled curves and never solve or integrate symbolically.
+#
+# Symbolic solutions can also be kept on disk across processes and days: set the
+# ECON1210_CACHE environment variable to a file path, or call use_solution_cache(path).
+
+def parse_equation(eq_str, variable='P'):
+    # eq_str is something like "Q = 3040 - 25P" or "Q = 59(P) - 3(P^2)"; variable is the
+    # one-letter unknown ("Q" for a damage equation like "MED = 10 + 0.5Q")
+    # Extract the right side
+    rhs = eq_str.split('=')[1].strip()
+    # Replace '^' with '**' for power
+    rhs = rhs.replace('^', '**')
+    # Insert '*' for implicit multiplication: "25P", "59(P)", "(P)(P)", "P(1 + P)"
+    rhs = re.sub(rf'(?<=[\d.){variable}])\s*(?=[{variable}(])', '*', rhs)
+    return rhs
+
+def compile_curve(expr, P, *parameters):
+    # Turn the parsed expression of "Q = 660 - 6.6P" into a vectorized numpy function of P
+    # (and of any parameters after it); a constant curve still gives one value per price
+    import sympy as sp
+    f = sp.lambdify((P, *parameters), expr, 'numpy')
+    return lambda price, *values: 0 * price + f(price, *values)
+
+def find_root(f, start, direction, scale=1.0):
+    # Bracketed root finding: scan away from start in the given direction over a growing
+    # window until f changes sign, then polish the first sign change with brentq
+    f_start = f(start)
+    if f_start == 0:
+        return float(start)
+    width = scale
+    while width < 1e12:
+        grid = start + direction * np.linspace(0, width, 257)
+        values = f(grid)
+        sign_change = np.flatnonzero(np.sign(values[1:]) != np.sign(values[0]))
+        if len(sign_change) > 0:
+            i = sign_change[0] + 1
+            if values[i] == 0:
+                return float(grid[i])
+            return brentq(f, min(grid[i - 1], grid[i]), max(grid[i - 1], grid[i]))
+        width *= 8
+    return None
+
+def curve_end(f, start, direction, scale=1.0):
+    # Moving away from start, the first price where a curve reaches zero quantity or stops
+    # falling towards it (e.g. "Q = 3P^2" touches zero at P = 0 and rises again)
+    if f(start) <= 0:
+        return float(start)
+    width = scale
+    while width < 1e12:
+        grid = start + direction * np.linspace(0, width, 257)
+        values = f(grid)
+        crossed = np.flatnonzero(values <= 0)
+        # Only a rise after the curve has started falling is a turning point
+        steps = np.diff(values)
+        falling = np.flatnonzero(steps < 0)
+        rising = np.flatnonzero(steps > 0)
+        rising = rising[rising > falling[0]] if len(falling) > 0 else rising[:0]
+        if len(crossed) > 0 and (len(rising) == 0 or crossed[0] <= rising[0] + 1):
+            i = crossed[0]
+            if values[i] == 0:
+                return float(grid[i])
+            return brentq(f, min(grid[i - 1], grid[i]), max(grid[i - 1], grid[i]))
+        if len(rising) > 0:
+            i = rising[0]
+            bounds = sorted((grid[max(i - 1, 0)], grid[i + 1]))
+            return minimize_scalar(f, bounds=bounds, method='bounded').x
+        width *= 8
+    return None
+
+def bisect(f, low, high, iterations=50):
+    # Vectorized bisection: f is decreasing in price, f(low) >= 0 >= f(high) for every element
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        above = f(middle) > 0
+        low = np.where(above, middle, low)
+        high = np.where(above, high, middle)
+    return (low + high) / 2
+
+def solve_bracketed(f, fprime, low, high, iterations=200):
+    # Vectorized safeguarded Newton for f(x) = 0 with f(low) > 0 >= f(high): a Newton step is
+    # taken when it stays inside the bracket, a bisection step otherwise, and the bracket
+    # shrinks around the sign change every iteration (Pigouvian, SegmentPricing)
+    low, high = np.array(low, dtype=float), np.array(high, dtype=float)
+    x = (low + high) / 2
+    for _ in range(iterations):
+        value = f(x)
+        positive = value > 0
+        low = np.where(positive, x, low)
+        high = np.where(positive, high, x)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = x - value / fprime(x)
+        inside = np.isfinite(newton) & (newton > low) & (newton < high)
+        x_next = np.where(inside, newton, (low + high) / 2)
+        if np.all(np.abs(x_next - x) <= 1e-12 * (1 + np.abs(x))):
+            return x_next
+        x = x_next
+    return x
+
+def column(table, name):
+    # The table's column whose header is name, in any case; None if there is none
+    # (MultiMarket, SegmentPricing)
+    for header in table.columns:
+        if str(header).strip().lower() == name:
+            return table[header]
+    return None
+
+def pick_inverse(solutions, Q, Q0, increasing):
+    # Choose the economic branch of an inverted curve: real and non-negative on (0, Q0], rising
+    # with Q for supply and falling for demand. "Q = 3P^2" inverts to ±sqrt(Q/3), and sympy
+    # lists the negative root first. Falls back to the first real branch (or one sympy cannot
+    # decide on) when no branch passes the checks.
+    import sympy as sp
+    try:
+        quantities = np.linspace(0, float(Q0), 9)[1:]
+    except (TypeError, ValueError):
+        quantities = np.linspace(0, 1, 9)[1:]
+
+    def economic(sol):
+        try:
+            prices = np.array([complex(sp.N(sol.subs(Q, q))) for q in quantities])
+        except (TypeError, ValueError, ZeroDivisionError):
+            return False
+        if not np.all(np.isfinite(prices)) or np.any(np.abs(prices.imag) > 1e-9 * (1 + np.abs(prices.real))):
+            return False
+        steps = np.diff(prices.real)
+        monotone = np.all(steps >= 0) if increasing else np.all(steps <= 0)
+        return bool(monotone and np.all(prices.real >= -1e-9 * (1 + np.abs(prices.real).max())))
+
+    for sol in solutions:
+        if economic(sol):
+            return sol
+    for sol in solutions:
+        if sol.is_real or sol.is_real is None:
+            return sol
+    return solutions[0] if solutions else None
+
+AD_VALOREM = ('ad valorem', 'ad_valorem', 'advalorem', 'percent', '%')
+
+def wedge_mode(mode):
+    # 'unit' (the default) or 'ad valorem'
+    mode = str(mode or 'unit').strip().lower()
+    if mode in AD_VALOREM:
+        return 'ad valorem'
+    if mode in ('unit', 'per unit', 'per_unit'):
+        return 'unit'
+    raise ValueError(f"Unknown mode {mode!r}: use 'unit' or 'ad valorem'.")
+
+def wedge(policy, rate, mode='unit'):
+    # How a tax or subsidy splits the buyers' price Pb from the sellers' Ps = multiplier * Pb + addition:
+    #   per-unit tax t:          Ps = Pb - t          per-unit subsidy s:    Ps = Pb + s
+    #   ad valorem tax τ:        Ps = Pb / (1 + τ)    ad valorem subsidy s:  Pb = Ps * (1 - s)
+    # Returns (multiplier, addition, d multiplier / d rate, d addition / d rate); rate may be an array.
+    rate = np.asarray(rate, dtype=float)
+    one, zero = np.ones_like(rate), np.zeros_like(rate)
+    if wedge_mode(mode) == 'ad valorem':
+        if policy == 'tax':
+            return 1 / (1 + rate), zero, -1 / (1 + rate) ** 2, zero
+        return 1 / (1 - rate), zero, 1 / (1 - rate) ** 2, zero
+    if policy == 'tax':
+        return one, -rate, zero, -one
+    return one, rate, zero, one
+
+# Bump when a change to the solving code would make stored solutions wrong
+SOLUTION_VERSION = 2
+
+# Solutions each market keeps in memory, least recently used dropped first: the policy questions
+# are keyed by their value ("producer tax 5"), so a long-running process would otherwise keep
+# one per value ever asked
+SOLUTIONS_PER_MARKET = 64
+
+class SolutionCache:
+    # Content-addressed store of pickled sympy solutions in one SQLite file.
+    # Rows are keyed by a hash of the normalized equations and the quantity's name; the least
+    # recently used rows are evicted once the stored solutions pass max_bytes. SQLite's WAL
+    # mode and busy timeout let several worker processes read and write the file at once.
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._pid = None
+
+    def connection(self):
+        # One connection per process (a connection must not cross a fork)
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS solutions "
+                               "(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)")
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key):
+        # (True, value) if stored, (False, None) otherwise
+        connection = self.connection()
+        row = connection.execute("SELECT value FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False, None
+        connection.execute("UPDATE solutions SET used = ? WHERE key = ?", (time.time(), key))
+        return True, pickle.loads(row[0])
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("INSERT OR REPLACE INTO solutions (key, value, size, used) VALUES (?, ?, ?, ?)",
+                               (key, blob, len(blob), time.time()))
+            # Evict least recently used rows until the total fits
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+            if total > self.max_bytes:
+                freed = 0
+                stale = []
+                for old_key, size in connection.execute("SELECT key, size FROM solutions ORDER BY used"):
+                    if total - freed <= self.max_bytes:
+                        break
+                    stale.append((old_key,))
+                    freed += size
+                connection.executemany("DELETE FROM solutions WHERE key = ?", stale)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        self.connection().execute("DELETE FROM solutions")
+
+solution_cache = SolutionCache(os.environ['ECON1210_CACHE']) if os.environ.get('ECON1210_CACHE') else None
+
+def use_solution_cache(path, max_bytes=64 * 1024 * 1024):
+    # Keep symbolic solutions in the SQLite file at path (None turns the disk cache off)
+    global solution_cache
+    solution_cache = SolutionCache(path, max_bytes) if path else None
+    return solution_cache
+
+class Market:
+    def __init__(self, demand_eq, supply_eq):
+        self.demand_eq = demand_eq
+        self.supply_eq = supply_eq
+        self._solutions = OrderedDict()
+
+    def solution(self, name, compute):
+        # Result of compute() for this market, kept in memory and, when a solution cache is set,
+        # on disk under the normalized equations, so another process or a later session asking
+        # the same question about the same curves skips the sympy work
+        if name in self._solutions:
+            self._solutions.move_to_end(name)
+            return self._solutions[name]
+        if solution_cache is None:
+            value = compute()
+        else:
+            key = hashlib.sha256(f"{SOLUTION_VERSION}\x1f{self.normalized_equations}\x1f{name}".encode()).hexdigest()
+            found, value = solution_cache.get(key)
+            if not found:
+                value = compute()
+                solution_cache.put(key, value)
+        self._solutions[name] = value
+        while len(self._solutions) > SOLUTIONS_PER_MARKET:
+            self._solutions.popitem(last=False)
+        return value
+
+    @cached_property
+    def normalized_equations(self):
+        # sympy's canonical printing, so "Q = 3040 - 25P" and "Q=3040-25(P)" share solutions
+        return f"{self.Qd_expr}\x1f{self.Qs_expr}"
+
+    # Parsed and compiled curves
+
+    @cached_property
+    def P(self):
+        import sympy as sp
+        return sp.Symbol('P', real=True)
+
+    @cached_property
+    def Q(self):
+        import sympy as sp
+        return sp.Symbol('Q', real=True)
+
+    @cached_property
+    def Qd_expr(self):
+        import sympy as sp
+        return sp.sympify(parse_equation(self.demand_eq), {'P': self.P})
+
+    @cached_property
+    def Qs_expr(self):
+        import sympy as sp
+        return sp.sympify(parse_equation(self.supply_eq), {'P': self.P})
+
+    @cached_property
+    def demand(self):
+        return compile_curve(self.Qd_expr, self.P)
+
+    @cached_property
+    def supply(self):
+        return compile_curve(self.Qs_expr, self.P)
+
+    @cached_property
+    def is_linear(self):
+        # Check linearity by examining the second derivative
+        return self.Qd_expr.diff(self.P, 2) == 0 and self.Qs_expr.diff(self.P, 2) == 0
+
+    # No-policy equilibrium
+
+    @cached_property
+    def equilibrium(self):
+        # Solve Qd(P) = Qs(P) and take the first real solution with positive P and Q
+        import sympy as sp
+        P = self.P
+        eq_solution = self.solution('equilibrium_solutions', lambda: sp.solve(sp.Eq(self.Qd_expr, self.Qs_expr), P))
+        if not eq_solution:
+            raise ValueError("No equilibrium solution found.")
+        P0_candidates = [sol for sol in eq_solution if sol.is_real]
+        if not P0_candidates:
+            raise ValueError("No real equilibrium solution.")
+        P0 = None
+        for candidate in P0_candidates:
+            Q_candidate = self.Qd_expr.subs(P, candidate)
+            if candidate > 0 and Q_candidate > 0:
+                P0 = candidate
+                break
+        if P0 is None:
+            P0 = eq_solution[0]
+        return P0, self.Qd_expr.subs(P, P0)
+
+    @property
+    def P0(self):
+        return self.equilibrium[0]
+
+    @property
+    def Q0(self):
+        return self.equilibrium[1]
+
+    @cached_property
+    def numeric_equilibrium(self):
+        # First price above 0 where Qd(P) = Qs(P), falling back to a negative price
+        def excess_demand(price):
+            return self.demand(price) - self.supply(price)
+
+        P_eq = find_root(excess_demand, 0.0, 1)
+        if P_eq is None:
+            P_eq = find_root(excess_demand, 0.0, -1)
+        if P_eq is None:
+            raise ValueError("No suitable equilibrium price found.")
+        return P_eq, float(self.demand(P_eq))
+
+    # Inverse curves and baseline surplus
+
+    @cached_property
+    def inverse_demand(self):
+        # Solve Q = Qd(P) for P
+        import sympy as sp
+        return self.solution('inverse_demand', lambda: pick_inverse(sp.solve(sp.Eq(self.Q, self.Qd_expr), self.P),
+                                                                    self.Q, self.Q0, increasing=False))
+
+    @cached_property
+    def inverse_supply(self):
+        # Solve Q = Qs(P) for P
+        import sympy as sp
+        return self.solution('inverse_supply', lambda: pick_inverse(sp.solve(sp.Eq(self.Q, self.Qs_expr), self.P),
+                                                                    self.Q, self.Q0, increasing=True))
+
+    @cached_property
+    def demand_antiderivative(self):
+        # ∫ Pd(Q) dQ, integrated once and evaluated at every quantity asked for
+        import sympy as sp
+        return self.solution('demand_antiderivative', lambda: sp.integrate(self.inverse_demand, self.Q))
+
+    @cached_property
+    def supply_antiderivative(self):
+        # ∫ Ps(Q) dQ
+        import sympy as sp
+        return self.solution('supply_antiderivative', lambda: sp.integrate(self.inverse_supply, self.Q))
+
+    def demand_area(self, quantity):
+        # ∫0 to quantity Pd(Q') dQ'
+        F = self.demand_antiderivative
+        return F.subs(self.Q, quantity) - F.subs(self.Q, 0)
+
+    def supply_area(self, quantity):
+        # ∫0 to quantity Ps(Q') dQ'
+        F = self.supply_antiderivative
+        return F.subs(self.Q, quantity) - F.subs(self.Q, 0)
+
+    @cached_property
+    def area_curves(self):
+        # demand_area and supply_area as numpy functions of Q, for many quantities at once
+        import sympy as sp
+        areas = []
+        for F in (self.demand_antiderivative, self.supply_antiderivative):
+            f = sp.lambdify(self.Q, F, 'numpy')
+            F0 = float(F.subs(self.Q, 0))
+            areas.append(lambda quantity, f=f, F0=F0: np.asarray(f(quantity), dtype=float) - F0)
+        return tuple(areas)
+
+    @cached_property
+    def CS0(self):
+        # Consumer Surplus (CS) = ∫0 to Q0 Pd(Q') dQ' - P0*Q0
+        return self.demand_area(self.Q0) - self.P0 * self.Q0
+
+    @cached_property
+    def PS0(self):
+        # Producer Surplus (PS) = P0*Q0 - ∫0 to Q0 Ps(Q') dQ'
+        return self.P0 * self.Q0 - self.supply_area(self.Q0)
+
+    @property
+    def TS0(self):
+        return self.CS0 + self.PS0
+
+    # Equilibrium price as a function of a per-unit policy rate
+
+    @cached_property
+    def tax_price(self):
+        # With a tax t on suppliers, they receive (P - t): solve D(P) = S(P - t) for P(t)
+        import sympy as sp
+        t = sp.Symbol('t', real=True)
+        sol_tax = self.solution('tax_price', lambda: sp.solve(sp.Eq(self.Qd_expr, self.Qs_expr.subs(self.P, self.P - t)), self.P))
+        return (sol_tax[0] if sol_tax else None), t
+
+    @cached_property
+    def ad_valorem_tax_price(self):
+        # With an ad valorem tax t, suppliers receive P / (1 + t): solve D(P) = S(P / (1 + t)) for P(t)
+        import sympy as sp
+        t = sp.Symbol('t', real=True)
+        sol_tax = self.solution('ad_valorem_tax_price', lambda: sp.solve(sp.Eq(self.Qd_expr, self.Qs_expr.subs(self.P, self.P / (1 + t))), self.P))
+        return (sol_tax[0] if sol_tax else None), t
+
+    @cached_property
+    def subsidy_price(self):
+        # With a subsidy s to consumers, they pay (P - s): solve D(P - s) = S(P) for P(s)
+        import sympy as sp
+        s = sp.Symbol('s', real=True)
+        sol_sub = self.solution('subsidy_price', lambda: sp.solve(sp.Eq(self.Qd_expr.subs(self.P, self.P - s), self.Qs_expr), self.P))
+        return (sol_sub[0] if sol_sub else None), s
+
+    # Comparative statics at a solved point
+
+    @cached_property
+    def coefficients(self):
+        # One number per term of each equation: {label: (curve, term, value, term as a function of P)},
+        # e.g. "Q = 3040 - 25P" gives 'demand 1' -> 3040 and 'demand P' -> -25
+        import sympy as sp
+        coefficients = {}
+        for curve, expr in (('demand', self.Qd_expr), ('supply', self.Qs_expr)):
+            for term, value in expr.as_coefficients_dict().items():
+                label = f"{curve} {str(term).replace('**', '^')}"
+                coefficients[label] = (curve, term, float(value), sp.lambdify(self.P, term, 'numpy'))
+        return coefficients
+
+    @cached_property
+    def term_calculus(self):
+        # For each coefficient's term T(P): (T, dT/dP, ∫T dP) as functions of P, so a curve with
+        # other coefficients is a weighted sum of these (see MarketUncertainty)
+        import sympy as sp
+        P = self.P
+        return {label: (f, sp.lambdify(P, term.diff(P), 'numpy'), sp.lambdify(P, sp.integrate(term, P), 'numpy'))
+                for label, (curve, term, value, f) in self.coefficients.items()}
+
+    @cached_property
+    def slopes(self):
+        # dQd/dP and dQs/dP as functions of P
+        import sympy as sp
+        return (sp.lambdify(self.P, self.Qd_expr.diff(self.P), 'numpy'),
+                sp.lambdify(self.P, self.Qs_expr.diff(self.P), 'numpy'))
+
+    @cached_property
+    def inverse_curves(self):
+        # Pd(Q) and Ps(Q) as functions of Q: the branches demand_area and supply_area integrate
+        import sympy as sp
+        return tuple(None if inverse is None else sp.lambdify(self.Q, inverse, 'numpy')
+                     for inverse in (self.inverse_demand, self.inverse_supply))
+
+    def sensitivities(self, buyer_price, seller_price, quantity, multiplier=1.0, rate_effect=-1.0):
+        # Derivatives of a solved point of Qd(Pb) = Qs(Ps), where sellers keep Ps(Pb, rate)
+        # (see wedge(): Ps = Pb - t for a per-unit tax), by implicit differentiation of
+        # F = Qd(Pb) - Qs(Ps(Pb, rate)) = 0: dPb/dx = -F_x / F_Pb. multiplier is dPs/dPb and
+        # rate_effect dPs/drate at the point. Nothing is solved again; it takes the curves' slopes
+        # at the point and, for each coefficient, one integral of its term along the inverse curve.
+        # {variable: {'buyer_price', 'seller_price', 'quantity', 'consumer_surplus', 'producer_surplus'}}
+        # for the variable 'rate' and every label in coefficients.
+        Pb, Ps, Q = float(buyer_price), float(seller_price), float(quantity)
+        m = float(multiplier)
+        demand_slope, supply_slope = self.slopes
+        Dp = float(demand_slope(Pb))
+        Sp = float(supply_slope(Ps))
+        F_Pb = Dp - Sp * m
+        if F_Pb == 0:
+            raise ValueError("Demand and supply have the same slope at the solved point.")
+
+        def inverse_at(curve, q):
+            with np.errstate(invalid='ignore'):
+                try:
+                    return float(curve(q))
+                except (TypeError, ValueError, ZeroDivisionError):
+                    return float('nan')
+
+        # The surplus integrals run along the inverse curves from Q = 0 to Q
+        demand_inverse, supply_inverse = self.inverse_curves
+        if demand_inverse is None or supply_inverse is None:
+            raise ValueError("Could not invert the demand or supply function.")
+        choke, demand_Q = inverse_at(demand_inverse, 0.0), inverse_at(demand_inverse, Q)
+        start, supply_Q = inverse_at(supply_inverse, 0.0), inverse_at(supply_inverse, Q)
+
+        def area(f, low, high):
+            if np.isnan(low) or np.isnan(high):
+                return float('nan')
+            return quad(lambda p: float(f(p)), low, high)[0]
+
+        def surplus(dPb, dPs, dQ, demand_area=0.0, supply_area=0.0):
+            # CS = ∫0^Q Pd - Pb*Q and PS = Ps*Q - ∫0^Q Ps, differentiated
+            return {
+                'buyer_price': dPb,
+                'seller_price': dPs,
+                'quantity': dQ,
+                'consumer_surplus': (demand_Q - Pb) * dQ - Q * dPb + demand_area,
+                'producer_surplus': Q * dPs + (Ps - supply_Q) * dQ - supply_area,
+            }
+
+        # The rate: F_rate = -Qs'(Ps) * rate_effect
+        dPb = Sp * rate_effect / F_Pb
+        derivatives = {'rate': surplus(dPb, m * dPb + rate_effect, Dp * dPb)}
+
+        # A coefficient c of a term T(P): Pd(q) moves by -T/Qd' along the curve, so the area under
+        # it moves by ∫ T dp between Pd(Q) and Pd(0) (likewise for supply)
+        for label, (curve, term, value, f) in self.coefficients.items():
+            if curve == 'demand':
+                dPb = -float(f(Pb)) / F_Pb
+                derivatives[label] = surplus(dPb, m * dPb, Dp * dPb + float(f(Pb)), demand_area=area(f, demand_Q, choke))
+            else:
+                dPb = float(f(Ps)) / F_Pb
+                derivatives[label] = surplus(dPb, m * dPb, Dp * dPb, supply_area=-area(f, start, supply_Q))
+        return derivatives
+
+    # Policies as a wedge between the buyers' and the sellers' price
+
+    def wedge_schedule(self, multiplier, addition, iterations=100):
+        # Equilibria where sellers keep Ps = multiplier * Pb + addition (see wedge()), for arrays of
+        # policies at once: vectorized Newton on Qd(Pb) = Qs(Ps) from the free-market price, with
+        # the curves' analytic slopes. Returns arrays (Pb, Ps, Q, CS, PS); NaN where it fails.
+        m, a = np.broadcast_arrays(np.asarray(multiplier, dtype=float), np.asarray(addition, dtype=float))
+        demand_slope, supply_slope = self.slopes
+        Pb = np.full(m.shape, float(self.numeric_equilibrium[0]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for _ in range(iterations):
+                Ps = m * Pb + a
+                step = (self.demand(Pb) - self.supply(Ps)) / (demand_slope(Pb) - supply_slope(Ps) * m)
+                Pb = Pb - step
+                if np.all(~np.isfinite(step) | (np.abs(step) <= 1e-12 * (1 + np.abs(Pb)))):
+                    break
+            Pb = np.where(np.isfinite(step) & (np.abs(step) <= 1e-8 * (1 + np.abs(Pb))), Pb, np.nan)
+            Ps = m * Pb + a
+            Q = self.demand(Pb)
+            demand_area, supply_area = self.area_curves
+            CS = demand_area(Q) - Pb * Q
+            PS = Ps * Q - supply_area(Q)
+        return Pb, Ps, Q, CS, PS
+
+    # Price bounds of the compiled curves
+
+    def supply_start(self, price, scale=None):
+        # Price where supply starts (Qs = 0) below the given price
+        return curve_end(self.supply, price, -1, scale or self.price_scale)
+
+    def choke_price(self, price, scale=None):
+        # Price where demand runs out (Qd = 0) above the given price
+        return curve_end(self.demand, price, 1, scale or self.price_scale)
+
+    @cached_property
+    def price_scale(self):
+        return max(abs(self.numeric_equilibrium[0]), 1.0)
+
+@lru_cache(maxsize=128)
+def get_market(demand_eq, supply_eq):
+    # One shared Market per pair of equations
+    return Market(demand_eq, supply_eq)
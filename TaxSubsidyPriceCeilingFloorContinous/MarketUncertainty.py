@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+QUANTILE_BINS = 8192
+
+class RunningDistribution:
+    # Mean, standard deviation and quantiles of values arriving chunk by chunk, in fixed memory.
+    # The bins start on the first chunk's range widened by half of it on each side. A later
+    # chunk reaching outside them doubles the bin width, merging neighbouring bins, as often as
+    # it takes to cover it, so every value is counted in its own bin. Quantiles are within one
+    # bin width (self.width, a small multiple of (max - min) / bins) and never outside the
+    # smallest and largest value seen.
+    def __init__(self, bins=QUANTILE_BINS):
+        self.bins = bins
+        self.counts = None
+        self.n = 0
+        self.mean = 0.0
+        self.M2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, values):
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        if self.counts is None:
+            low, high = values.min(), values.max()
+            pad = (high - low) / 2 or max(abs(low), 1.0)
+            self.low, self.width = low - pad, (high - low + 2 * pad) / self.bins
+            self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.cover(values.min(), values.max())
+        index = np.clip(((values - self.low) / self.width).astype(np.int64), 0, self.bins - 1)
+        self.counts += np.bincount(index, minlength=self.bins)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        # Chan et al.'s pairwise update of the mean and the sum of squared deviations
+        n, mean = len(values), values.mean()
+        delta = mean - self.mean
+        total = self.n + n
+        self.M2 += ((values - mean) ** 2).sum() + delta ** 2 * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+
+    def cover(self, low, high):
+        # Widen the bins until [low, high] is inside them, towards the side that needs it; the
+        # bin edges stay on the old ones, so merging pairs of bins loses no count
+        while low < self.low or high >= self.low + self.bins * self.width:
+            merged = self.counts.reshape(-1, 2).sum(axis=1)
+            self.counts = np.zeros(self.bins, dtype=np.int64)
+            if low < self.low:
+                self.counts[self.bins // 2:] = merged
+                self.low -= self.bins * self.width
+            else:
+                self.counts[:self.bins // 2] = merged
+            self.width *= 2
+
+    def quantile(self, q):
+        if self.n == 0:
+            return np.nan
+        cumulative = np.cumsum(self.counts)
+        target = q * self.n
+        i = int(np.searchsorted(cumulative, target))
+        i = min(i, self.bins - 1)
+        before = cumulative[i - 1] if i > 0 else 0
+        inside = (target - before) / self.counts[i] if self.counts[i] else 0.5
+        return float(np.clip(self.low + (i + inside) * self.width, self.min, self.max))
+
+    def std(self):
+        return np.sqrt(self.M2 / (self.n - 1)) if self.n > 1 else np.nan
+
+def coefficient_errors(market, uncertainty):
+    # uncertainty: one relative standard error for every coefficient (0.1 = 10% of its value),
+    # {coefficient label: standard error} such as {'demand P': 2, 'supply 1': 0.5}, or an Excel
+    # range of two columns, label and standard error, with headers in the first row
+    values = np.array([value for curve, term, value, f in market.coefficients.values()])
+    if isinstance(uncertainty, pd.DataFrame):
+        rows = uncertainty.iloc[1:]
+        uncertainty = {str(label).strip(): float(error) for label, error in zip(rows.iloc[:, 0], rows.iloc[:, 1])}
+    if isinstance(uncertainty, dict):
+        unknown = set(uncertainty) - set(market.coefficients)
+        if unknown:
+            raise ValueError(f"Unknown coefficients {sorted(unknown)}; the equations have {list(market.coefficients)}.")
+        return values, np.array([float(uncertainty.get(label, 0.0)) for label in market.coefficients])
+    return values, np.abs(values) * float(uncertainty)
+
+def solve_wedge(demand, supply, wedge, start, iterations=50):
+    # Vectorized Newton on Qd(Pb) - Qs(Pb - wedge) = 0 for every sample at once (exact after one
+    # step for linear curves). demand and supply are (value, slope) functions of the prices;
+    # samples that do not converge are NaN.
+    price = np.array(start, dtype=float)
+    for _ in range(iterations):
+        Qd, dQd = demand(price)
+        Qs, dQs = supply(price - wedge)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = (Qd - Qs) / (dQd - dQs)
+        price = price - step
+        if np.all(~np.isfinite(step) | (np.abs(step) <= 1e-10 * (1 + np.abs(price)))):
+            break
+    price[~np.isfinite(price) | (np.abs(step) > 1e-6 * (1 + np.abs(price)))] = np.nan
+    return price
+
+def MarketUncertainty(demand_eq, supply_eq, policy='tax', rate=0, uncertainty=0.1, storage_cost=0,
+                      samples=1000000, chunksize=100000, seed=None, quantiles=(0.05, 0.5, 0.95)):
+    # Monte Carlo version of Tax, Subsidy and PriceGuarantee for estimated curves:
+    # demand_eq and supply_eq are strings like "Q = 3040 - 25P"; every number in them
+    #   (each coefficient of market.coefficients) is drawn from a normal distribution
+    #   around its value with the standard error given by uncertainty (see coefficient_errors)
+    # policy is 'tax', 'subsidy' or 'guarantee'; rate is the tax or subsidy per unit, or the
+    #   guaranteed price (the government pays it plus storage_cost per unit bought)
+    # The curves are weighted sums of their terms, so every sample's market is solved at once by
+    # vectorized Newton iteration, chunk by chunk; 10^6 samples take about a second.
+    # Returns one row per output: mean, standard deviation and the quantiles asked for.
+
+    if not demand_eq or not supply_eq:
+        return ""
+
+    policy = str(policy or 'tax').strip().lower()
+    if policy not in ('tax', 'subsidy', 'guarantee'):
+        return "Policy must be 'tax', 'subsidy' or 'guarantee'."
+    rate = float(rate or 0)
+    storage_cost = float(storage_cost or 0)
+
+    # Terms, their derivatives and antiderivatives come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    try:
+        start = market.numeric_equilibrium[0]
+        values, errors = coefficient_errors(market, uncertainty)
+    except ValueError as error:
+        return str(error)
+    labels = list(market.coefficients)
+    is_demand = np.array([market.coefficients[label][0] == 'demand' for label in labels])
+    calculus = [market.term_calculus[label] for label in labels]
+
+    def curve(coefficients, columns, part):
+        # Σ c_k T_k(P) (part 0), its slope (part 1) or its antiderivative (part 2), per sample
+        def evaluate(price):
+            total = np.zeros_like(price)
+            for k in columns:
+                total += coefficients[:, k] * calculus[k][part](price)
+            return total
+        return evaluate
+
+    demand_columns = np.flatnonzero(is_demand)
+    supply_columns = np.flatnonzero(~is_demand)
+
+    if policy == 'tax':
+        names = ['Equilibrium Price', 'Equilibrium Quantity', 'Buyer Price', 'Seller Price', 'Quantity', 'Tax Revenue', 'DWL']
+    elif policy == 'subsidy':
+        names = ['Equilibrium Price', 'Equilibrium Quantity', 'Buyer Price', 'Seller Price', 'Quantity', 'Gov Cost', 'DWL']
+    else:
+        names = ['Equilibrium Price', 'Equilibrium Quantity', 'Market Price', 'Gov Buys', 'Gov Cost']
+    distributions = {name: RunningDistribution() for name in names}
+
+    rng = np.random.default_rng(seed)
+    done = 0
+    while done < samples:
+        n = min(chunksize, samples - done)
+        done += n
+        coefficients = rng.normal(values, errors, size=(n, len(values)))
+        Qd, dQd, Ad = (curve(coefficients, demand_columns, part) for part in range(3))
+        Qs, dQs, As = (curve(coefficients, supply_columns, part) for part in range(3))
+        demand = lambda price: (Qd(price), dQd(price))
+        supply = lambda price: (Qs(price), dQs(price))
+
+        # No-policy equilibrium, then the policy
+        P0 = solve_wedge(demand, supply, 0.0, np.full(n, start))
+        Q0 = Qd(P0)
+        outputs = {'Equilibrium Price': P0, 'Equilibrium Quantity': Q0}
+
+        if policy == 'guarantee':
+            gov_buys = np.maximum(Qs(np.full(n, rate)) - Qd(np.full(n, rate)), 0.0)
+            outputs['Market Price'] = np.maximum(P0, rate)
+            outputs['Gov Buys'] = gov_buys
+            outputs['Gov Cost'] = gov_buys * (rate + storage_cost)
+        else:
+            # Pb - Ps is the tax, or minus the subsidy
+            wedge = rate if policy == 'tax' else -rate
+            Pb = solve_wedge(demand, supply, wedge, P0)
+            Ps = Pb - wedge
+            Q = Qd(Pb)
+            outputs.update({'Buyer Price': Pb, 'Seller Price': Ps, 'Quantity': Q})
+            outputs['Tax Revenue' if policy == 'tax' else 'Gov Cost'] = abs(wedge) * Q
+            # Lost consumer and producer surplus, in price space, less what the government collects:
+            # DWL = ∫ from P0 to Pb of Qd + ∫ from Ps to P0 of Qs - wedge * Q
+            # (in price space, as PriceGuarantee's numeric method, so no inverse curves are needed)
+            outputs['DWL'] = (Ad(Pb) - Ad(P0)) + (As(P0) - As(Ps)) - wedge * Q
+
+        for name in names:
+            distributions[name].add(outputs[name])
+
+    rows = []
+    for name in names:
+        distribution = distributions[name]
+        row = {'Output': name, 'Samples': distribution.n, 'Mean': distribution.mean if distribution.n else np.nan,
+               'Std': distribution.std()}
+        for q in quantiles:
+            row[f"{q * 100:g}%"] = distribution.quantile(q)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+remember(MarketUncertainty, arg1, arg2, arg3, arg4, arg5)
\ No newline at end of file
@@ -0,0 +1,177 @@
+from functools import cached_property, lru_cache
+import numpy as np
+import pandas as pd
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (parse_equation, column) to run first
+
+GAUSS_NODES = 16
+
+class MarketSystem:
+    # k linked markets: demand and supply of good i may depend on every price P1..Pk
+    # ("Q = 100 - 2P1 + 0.5P2"; a plain P is the good's own price). The equations are parsed
+    # and differentiated once; every solve after that is numeric: Newton-Raphson on
+    # F(P) = Qd(P) - Qs(P - t) = 0 with the analytic Jacobian dQd/dP - dQs/dP.
+
+    def __init__(self, demand_eqs, supply_eqs):
+        self.demand_eqs = demand_eqs
+        self.supply_eqs = supply_eqs
+        self.k = len(demand_eqs)
+
+    @cached_property
+    def prices(self):
+        import sympy as sp
+        return sp.symbols(f"P1:{self.k + 1}", real=True)
+
+    def parse(self, eq_str, i):
+        import sympy as sp
+        names = {f"P{j + 1}": price for j, price in enumerate(self.prices)}
+        names['P'] = self.prices[i]
+        expr = sp.sympify(parse_equation(eq_str), names)
+        unknown = expr.free_symbols - set(self.prices)
+        if unknown:
+            raise ValueError(f"Unknown symbols {sorted(map(str, unknown))} in \"{eq_str}\".")
+        return expr
+
+    @cached_property
+    def curves(self):
+        # (Qd, dQd/dP, Qs, dQs/dP) as numpy functions of the price vector
+        import sympy as sp
+        demand = [self.parse(eq, i) for i, eq in enumerate(self.demand_eqs)]
+        supply = [self.parse(eq, i) for i, eq in enumerate(self.supply_eqs)]
+        k = self.k
+        return (self.vectorize(demand, (k,)), self.vectorize(sp.Matrix(demand).jacobian(self.prices), (k, k)),
+                self.vectorize(supply, (k,)), self.vectorize(sp.Matrix(supply).jacobian(self.prices), (k, k)))
+
+    def vectorize(self, exprs, shape):
+        # f(prices) of the given shape for prices of shape (k,), or shape + (n,) for prices of
+        # shape (k, n). Constant entries (all of a linear system's Jacobian, and the zeros of
+        # goods that do not interact) are filled in once; only the others are evaluated.
+        import sympy as sp
+        exprs = list(sp.Matrix(exprs)) if not isinstance(exprs, list) else exprs
+        constant = np.array([float(expr) if not expr.free_symbols else 0.0 for expr in exprs])
+        varying = [i for i, expr in enumerate(exprs) if expr.free_symbols]
+        f = sp.lambdify([self.prices], [exprs[i] for i in varying], 'numpy') if varying else None
+
+        def evaluate(prices):
+            extra = np.shape(prices[0])
+            values = np.repeat(constant[:, None], int(np.prod(extra)), axis=1) if extra else constant.copy()
+            if f is not None:
+                values[varying] = np.array(np.broadcast_arrays(*f(prices), prices[0])[:-1], dtype=float)
+            return values.reshape(shape + extra)
+        return evaluate
+
+    def solve(self, taxes, start, iterations=100, tolerance=1e-10):
+        # Buyer prices with the per-unit tax on each good's sellers; None if Newton does not converge.
+        # Steps are halved while they do not reduce |F|, so a start far from a nonlinear
+        # equilibrium still gets there; linear markets take one step.
+        Qd, dQd, Qs, dQs = self.curves
+        P = np.array(start, dtype=float)
+
+        def residual(P):
+            return Qd(P) - Qs(P - taxes)
+
+        F = residual(P)
+        for _ in range(iterations):
+            if np.max(np.abs(F)) <= tolerance * (1 + np.max(np.abs(Qd(P)))):
+                return P
+            J = dQd(P) - dQs(P - taxes)
+            try:
+                step = np.linalg.solve(J, F)
+            except np.linalg.LinAlgError:
+                return None
+            scale = 1.0
+            while scale > 1e-6:
+                trial = P - scale * step
+                F_trial = residual(trial)
+                if np.all(np.isfinite(F_trial)) and np.linalg.norm(F_trial) < np.linalg.norm(F):
+                    break
+                scale /= 2
+            P, F = trial, F_trial
+        return P if np.max(np.abs(F)) <= 1e-6 * (1 + np.max(np.abs(Qd(P)))) else None
+
+    def surplus_change(self, P0, Pb, Ps):
+        # Change in each market's consumer and producer surplus between the no-tax prices P0 and
+        # the taxed buyer and seller prices: -∫ Qd_i dP_i and ∫ Qs_i dP_i along the straight line
+        # between them, by Gauss-Legendre quadrature (exact for polynomial curves of degree < 31).
+        # With cross-price effects this attributes the welfare change market by market along that
+        # path; the totals do not depend on the path when the cross effects are symmetric.
+        Qd, dQd, Qs, dQs = self.curves
+        nodes, weights = np.polynomial.legendre.leggauss(GAUSS_NODES)
+        s = (nodes + 1) / 2
+        weights = weights / 2
+        buyer_path = P0[:, None] + (Pb - P0)[:, None] * s
+        seller_path = P0[:, None] + (Ps - P0)[:, None] * s
+        dCS = -(Qd(buyer_path) @ weights) * (Pb - P0)
+        dPS = (Qs(seller_path) @ weights) * (Ps - P0)
+        return dCS, dPS
+
+@lru_cache(maxsize=32)
+def get_market_system(demand_eqs, supply_eqs):
+    # One shared MarketSystem per tuple of equations, like get_market
+    return MarketSystem(demand_eqs, supply_eqs)
+
+def MultiMarketTax(markets_df):
+    # markets_df is an Excel range with one row per good, headers in the first row:
+    #   Good (optional) | Demand | Supply | Tax (optional, per unit, paid by sellers)
+    # e.g. Demand "Q = 100 - 2P1 + 0.5P2", Supply "Q = 5P1"; a plain P is the row's own price.
+    # Solves the joint equilibrium without and with the taxes and returns one row per good
+    # (prices, quantities, tax revenue, DWL) and a Total row.
+
+    if markets_df is None or len(markets_df) < 2:
+        return ""
+
+    # The first row are the headers
+    markets_df.columns = markets_df.iloc[0]
+    markets_df = markets_df[1:]
+    if column(markets_df, 'demand') is None or column(markets_df, 'supply') is None:
+        return "The table needs Demand and Supply columns."
+    # Blank rows below the goods are ignored
+    markets_df = markets_df[column(markets_df, 'demand').notna()]
+    demand = column(markets_df, 'demand')
+    supply = column(markets_df, 'supply')
+    k = len(markets_df)
+    goods = column(markets_df, 'good')
+    goods = [f"Good {i + 1}" for i in range(k)] if goods is None else [str(good) for good in goods]
+    taxes = column(markets_df, 'tax')
+    taxes = np.zeros(k) if taxes is None else pd.to_numeric(taxes, errors='coerce').fillna(0).to_numpy(dtype=float)
+
+    system = get_market_system(tuple(str(eq) for eq in demand), tuple(str(eq) for eq in supply))
+    try:
+        system.curves
+    except (ValueError, TypeError, SyntaxError) as error:
+        return str(error)
+
+    P0 = system.solve(np.zeros(k), np.ones(k))
+    if P0 is None:
+        return "No equilibrium found."
+    Pb = system.solve(taxes, P0)
+    if Pb is None:
+        return "No equilibrium found with the taxes."
+    Ps = Pb - taxes
+
+    Qd = system.curves[0]
+    Q0 = Qd(P0)
+    Q = Qd(Pb)
+    revenue = taxes * Q
+    dCS, dPS = system.surplus_change(P0, Pb, Ps)
+    DWL = -(dCS + dPS + revenue)
+
+    table = pd.DataFrame({
+        'Good': goods,
+        'Equilibrium Price': P0,
+        'Equilibrium Quantity': Q0,
+        'Buyer Price': Pb,
+        'Seller Price': Ps,
+        'Quantity': Q,
+        'Tax': taxes,
+        'Tax Revenue': revenue,
+        'Consumer Surplus Change': dCS,
+        'Producer Surplus Change': dPS,
+        'DWL': DWL,
+    })
+    total = {'Good': 'Total', 'Tax Revenue': revenue.sum(), 'Consumer Surplus Change': dCS.sum(),
+             'Producer Surplus Change': dPS.sum(), 'DWL': DWL.sum()}
+    return pd.concat([table, pd.DataFrame([total])], ignore_index=True)
+
+remember(MultiMarketTax, arg1)
\ No newline at end of file
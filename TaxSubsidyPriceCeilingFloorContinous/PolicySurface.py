@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+POLICIES = ('tax', 'subsidy', 'ceiling', 'floor')
+OUTPUTS = ('buyer_price', 'seller_price', 'quantity', 'revenue', 'consumer_surplus', 'producer_surplus', 'DWL')
+
+class PolicySurfaceResult(NamedTuple):
+    # Outcomes of every pair of policy values: each output is a matrix with one row per value of
+    # the first policy and one column per value of the second. revenue is the tax collected less
+    # the subsidy paid. format_policy_surface gives one of them as an Excel table.
+    first: str
+    first_values: np.ndarray
+    second: str
+    second_values: np.ndarray
+    buyer_price: np.ndarray
+    seller_price: np.ndarray
+    quantity: np.ndarray
+    revenue: np.ndarray
+    consumer_surplus: np.ndarray
+    producer_surplus: np.ndarray
+    DWL: np.ndarray
+
+def policy_values(values):
+    # A number, list/array or Excel range of policy values as a flat float array; text cells
+    # (a header) and blanks are dropped
+    if isinstance(values, pd.DataFrame):
+        values = pd.to_numeric(pd.Series(values.to_numpy().ravel()), errors='coerce').dropna().to_numpy()
+    return np.atleast_1d(np.asarray(values, dtype=float)).ravel()
+
+def surface_outcomes(market, tax=0.0, subsidy=0.0, ceiling=np.inf, floor=-np.inf):
+    # Every combination at once, the policies broadcast against each other. The per-unit tax on
+    # sellers and subsidy to buyers make one wedge Pb - Ps = tax - subsidy, solved by
+    # Market.wedge_schedule once per distinct wedge (a tax x ceiling grid has only as many as
+    # taxes). A ceiling or floor on the buyers' price binds when the free price is outside it;
+    # as in PriceControlContinuous the short side of the market trades, the units going to the
+    # buyers who value them most and coming from the cheapest sellers.
+    tax, subsidy, ceiling, floor = np.broadcast_arrays(*(np.asarray(value, dtype=float)
+                                                         for value in (tax, subsidy, ceiling, floor)))
+    wedge = tax - subsidy
+    distinct, index = np.unique(wedge, return_inverse=True)
+    free_price = market.wedge_schedule(1.0, -distinct)[0][index.reshape(wedge.shape)]
+
+    with np.errstate(invalid='ignore'):
+        Pb = np.minimum(np.maximum(free_price, floor), ceiling)
+        Pb = np.where(floor > ceiling, np.nan, Pb)
+        Ps = Pb - wedge
+        binding = Pb != free_price
+        Q = np.where(binding, np.maximum(np.minimum(market.demand(Pb), market.supply(Ps)), 0.0), market.demand(free_price))
+        demand_area, supply_area = market.area_curves
+        CS = demand_area(Q) - Pb * Q
+        PS = Ps * Q - supply_area(Q)
+    revenue = wedge * Q
+    return {
+        'buyer_price': Pb,
+        'seller_price': Ps,
+        'quantity': Q,
+        'revenue': revenue,
+        'consumer_surplus': CS,
+        'producer_surplus': PS,
+        'DWL': float(market.TS0) - (CS + PS + revenue),
+    }
+
+def PolicySurface(demand_eq, supply_eq, first, first_values, second, second_values, chunksize=250000):
+    # demand_eq and supply_eq are strings like "Q = 3040 - 25P"
+    # first and second are two different policies out of 'tax' (per unit, on sellers), 'subsidy'
+    #   (per unit, to buyers), 'ceiling' and 'floor' (on the price buyers pay); first_values and
+    #   second_values are their values (lists, arrays or Excel ranges)
+    # Returns the outcome of every pair as matrices (see PolicySurfaceResult). The grid is worked
+    # through chunksize points at a time, whole rows of it per chunk, so the working memory stays
+    # bounded; each chunk is one broadcast evaluation of the compiled market, and a 1000 x 1000
+    # grid takes a few seconds.
+
+    if not demand_eq or not supply_eq:
+        return ""
+
+    first = str(first or '').strip().lower()
+    second = str(second or '').strip().lower()
+    if first not in POLICIES or second not in POLICIES:
+        return "Policies must be 'tax', 'subsidy', 'ceiling' or 'floor'."
+    if first == second:
+        return "The two policies must be different."
+    try:
+        x = policy_values(first_values)
+        y = policy_values(second_values)
+    except (ValueError, TypeError) as error:
+        return str(error)
+
+    # Parsed curves, slopes and surplus integrals come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    try:
+        market.equilibrium
+    except ValueError as error:
+        return str(error)
+    if market.inverse_demand is None:
+        return "Could not invert demand function."
+    if market.inverse_supply is None:
+        return "Could not invert supply function."
+
+    surfaces = {name: np.empty((len(x), len(y))) for name in OUTPUTS}
+    rows = max(1, int(chunksize) // max(len(y), 1))
+    for start in range(0, len(x), rows):
+        stop = min(start + rows, len(x))
+        outcomes = surface_outcomes(market, **{first: x[start:stop, None], second: y[None, :]})
+        for name in OUTPUTS:
+            surfaces[name][start:stop] = outcomes[name]
+
+    return PolicySurfaceResult(first, x, second, y, **surfaces)
+
+def format_policy_surface(result, output='DWL'):
+    # One output as a table: the first policy's values down the side, the second's across the top
+    # output is a PolicySurfaceResult field or its Excel name ('DWL', 'Quantity', 'Buyer Price', ...)
+    if not isinstance(result, PolicySurfaceResult):
+        return result
+
+    name = str(output or 'DWL').strip().replace(' ', '_')
+    name = next((field for field in OUTPUTS if field.lower() == name.lower()), None)
+    if name is None:
+        return f"Unknown output {output!r}: use one of {', '.join(OUTPUTS)}."
+    table = pd.DataFrame(getattr(result, name), index=result.first_values, columns=result.second_values)
+    table.index.name = f"{result.first.capitalize()} \\ {result.second.capitalize()}"
+    return table
+
+format_policy_surface(remember(PolicySurface, arg1, arg2, arg3, arg4, arg5, arg6), arg7)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+class ControlOutcome(NamedTuple):
+    # The market under one price ceiling or floor
+    price: float
+    binding: bool
+    quantity_demanded: float
+    quantity_supplied: float
+    quantity: float
+    shortage: float
+    excess_supply: float
+    consumer_surplus: float
+    producer_surplus: float
+    DWL: float
+
+class PriceControlContinuousResult(NamedTuple):
+    # Raw numbers behind the PriceControlContinuous output (None for a control that was not
+    # given); format_price_control_continuous turns them into the Excel text
+    equilibrium_price: float
+    equilibrium_quantity: float
+    ceiling: ControlOutcome
+    floor: ControlOutcome
+
+def control_outcomes(market, prices, kind):
+    # Every control price at once: {field of ControlOutcome: array}
+    # A ceiling binds below the equilibrium price and a floor above it. A binding control trades
+    # the short side of the market (supply under a ceiling, demand above a floor); the units go
+    # to the buyers who value them most and come from the cheapest sellers, so, as in Tax,
+    # CS = ∫0 to Q Pd(Q') dQ' - P*Q and PS = P*Q - ∫0 to Q Ps(Q') dQ', and DWL is the total
+    # surplus lost against the free market.
+    P0, Q0 = (float(value) for value in market.equilibrium)
+    demand_area, supply_area = market.area_curves
+    prices = np.asarray(prices, dtype=float)
+
+    Qd = np.asarray(market.demand(prices), dtype=float)
+    Qs = np.asarray(market.supply(prices), dtype=float)
+    binding = prices < P0 if kind == 'ceiling' else prices > P0
+    price = np.where(binding, prices, P0)
+    quantity = np.where(binding, np.maximum(np.minimum(Qd, Qs), 0.0), Q0)
+
+    with np.errstate(invalid='ignore'):
+        CS = demand_area(quantity) - price * quantity
+        PS = price * quantity - supply_area(quantity)
+    return {
+        'price': prices,
+        'binding': binding,
+        'quantity_demanded': Qd,
+        'quantity_supplied': Qs,
+        'quantity': quantity,
+        'shortage': np.where(binding, np.maximum(Qd - Qs, 0.0), 0.0),
+        'excess_supply': np.where(binding, np.maximum(Qs - Qd, 0.0), 0.0),
+        'consumer_surplus': CS,
+        'producer_surplus': PS,
+        'DWL': float(market.TS0) - (CS + PS),
+    }
+
+def PriceControlContinuous(demand_eq, supply_eq, price_ceiling=None, price_floor=None):
+    # demand_eq and supply_eq are strings like "Q = 3040 - 25P" or "Q = 59(P) - 3(P^2)"
+    # price_ceiling and price_floor are control prices (None or 0 when there is none), or
+    # lists/arrays of them for a sweep, which returns one row per control price
+    # The surplus areas are the market's symbolic integrals, evaluated for all prices at once.
+
+    if not demand_eq or not supply_eq:
+        return ""
+
+    # Handle price ceiling and floor being zero
+    if np.ndim(price_ceiling) == 0 and price_ceiling == 0:
+        price_ceiling = None
+    if np.ndim(price_floor) == 0 and price_floor == 0:
+        price_floor = None
+
+    # Parsed curves, equilibrium and surplus integrals come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    try:
+        P0, Q0 = market.equilibrium
+    except ValueError as error:
+        return str(error)
+    if market.inverse_demand is None:
+        return "Could not invert demand function."
+    if market.inverse_supply is None:
+        return "Could not invert supply function."
+
+    controls = [(kind, prices) for kind, prices in (('ceiling', price_ceiling), ('floor', price_floor))
+                if prices is not None]
+
+    # A sweep over several control prices returns one row per price
+    if any(np.ndim(prices) > 0 for kind, prices in controls):
+        frames = []
+        for kind, prices in controls:
+            outcomes = control_outcomes(market, np.atleast_1d(prices).ravel(), kind)
+            frames.append(pd.DataFrame({
+                'Control': kind.capitalize(),
+                'Price': outcomes['price'],
+                'Binding': outcomes['binding'],
+                'Quantity Demanded': outcomes['quantity_demanded'],
+                'Quantity Supplied': outcomes['quantity_supplied'],
+                'Quantity Transacted': outcomes['quantity'],
+                'Shortage': outcomes['shortage'],
+                'Excess Supply': outcomes['excess_supply'],
+                'Consumer Surplus': outcomes['consumer_surplus'],
+                'Producer Surplus': outcomes['producer_surplus'],
+                'DWL': outcomes['DWL'],
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    results = {'ceiling': None, 'floor': None}
+    for kind, prices in controls:
+        outcomes = control_outcomes(market, [prices], kind)
+        results[kind] = ControlOutcome(**{field: outcomes[field][0].item() for field in ControlOutcome._fields})
+    return PriceControlContinuousResult(float(P0), float(Q0), results['ceiling'], results['floor'])
+
+def format_price_control_continuous(result):
+    # A sweep's DataFrame and messages are passed through as they are
+    if not isinstance(result, PriceControlContinuousResult):
+        return result
+
+    output = [f"Market equilibrium price: {result.equilibrium_price:.2f}, Quantity: {result.equilibrium_quantity:.2f}"]
+    for name, outcome in (('Price Ceiling', result.ceiling), ('Price Floor', result.floor)):
+        if outcome is None:
+            continue
+        line = f"At {name}: {outcome.price:.2f}, Quantity Transacted: {outcome.quantity:.2f}"
+        if not outcome.binding:
+            line += " (not binding)"
+        elif outcome.shortage > 0:
+            line += f", Shortage: {outcome.shortage:.2f}"
+        elif outcome.excess_supply > 0:
+            line += f", Surplus: {outcome.excess_supply:.2f}"
+        output.append(line)
+        output.append(f"Consumer Surplus: {outcome.consumer_surplus:.2f}, Producer Surplus: {outcome.producer_surplus:.2f}, DWL: {outcome.DWL:.2f}")
+
+    return "\n".join(output)
+
+format_price_control_continuous(remember(PriceControlContinuous, arg1, arg2, arg3, arg4))
\ No newline at end of file
@@ -1,9 +1,26 @@
-import sympy as sp
-
-def PriceGuarantee(demand_eq, supply_eq, promise_to_buy_at, storage_cost):
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
+from scipy.integrate import quad
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+class PriceGuaranteeResult(NamedTuple):
+    # Raw numbers behind the PriceGuarantee output; format_price_guarantee gives the Excel text
+    equilibrium_price: float
+    equilibrium_quantity: float
+    gov_buys: float
+    producer_surplus: float
+    consumer_surplus: float
+    gov_cost: float
+
+def PriceGuarantee(demand_eq, supply_eq, promise_to_buy_at, storage_cost, method='numeric'):
     # demand_eq and supply_eq are strings like "Q = 660 - 6.6P" or "Q = 59(P) - 3(P^2)"
-    # promise_to_buy_at is the guaranteed price (P_g)
+    # promise_to_buy_at is the guaranteed price (P_g), or a list/array of them for a sweep
     # storage_cost is the storage cost per unit
+    # method='numeric' uses root finding and quadrature on compiled curves,
+    # method='symbolic' solves and integrates with sympy
 
     if demand_eq is None or supply_eq is None:
         return ""
@@ -11,44 +28,71 @@ def PriceGuarantee(demand_eq, supply_eq, promise_to_buy_at, storage_cost):
     if storage_cost is None:
         storage_cost = 0
 
-    P = sp.Symbol('P', real=True)
-    Q = sp.Symbol('Q', real=True)
-
-    def parse_equation(eq_str):
-        # eq_str is something like "Q = 3040 - 25P"
-        # Extract the right side
-        rhs = eq_str.split('=')[1].strip()
-        # Replace '^' with '**' for power
-        rhs = rhs.replace('^', '**')
-        # Insert '*' before P where needed
-        expr_modified = ""
-        for i, ch in enumerate(rhs):
-            if ch == 'P':
-                # If previous char is digit or ')' or 'P', insert '*'
-                if i > 0 and (rhs[i-1].isdigit() or rhs[i-1] == ')' or rhs[i-1] == 'P'):
-                    expr_modified += '*' + ch
-                else:
-                    expr_modified += ch
-            else:
-                expr_modified += ch
-        rhs_expr = sp.sympify(expr_modified, {'P':P})
-        return rhs_expr
-
-    Qd_expr = parse_equation(demand_eq)
-    Qs_expr = parse_equation(supply_eq)
-
-    # Find equilibrium: solve Qd(P) = Qs(P)
-    eq_solution = sp.solve(sp.Eq(Qd_expr, Qs_expr), P)
-    # eq_solution might be a list of solutions. Choose a suitable one (positive)
-    P_eq_candidates = [sol for sol in eq_solution if sol.is_real and sol > 0]
-    if not P_eq_candidates:
-        # fallback to any real solution if no positive found
-        P_eq_candidates = [sol for sol in eq_solution if sol.is_real]
-    if not P_eq_candidates:
-        raise ValueError("No suitable equilibrium price found.")
-    P_eq = P_eq_candidates[0]
-
-    Q_eq = Qd_expr.subs(P, P_eq)
+    if method == 'symbolic':
+        return PriceGuaranteeSymbolic(demand_eq, supply_eq, promise_to_buy_at, storage_cost)
+    return PriceGuaranteeNumeric(demand_eq, supply_eq, promise_to_buy_at, storage_cost)
+
+def PriceGuaranteeNumeric(demand_eq, supply_eq, promise_to_buy_at, storage_cost):
+    # Compiled curves and equilibrium come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    Qd = market.demand
+    Qs = market.supply
+
+    # Find equilibrium: the first price above 0 where Qd(P) = Qs(P),
+    # falling back to a negative price if no positive one exists
+    P_eq, Q_eq = market.numeric_equilibrium
+
+    P_g = np.asarray(promise_to_buy_at, dtype=float)
+    prices = np.atleast_1d(P_g).ravel()
+    Q_sg = Qs(prices)
+    Q_dg = Qd(prices)
+
+    # Government needs to buy:
+    Q_gov = np.where(Q_sg > Q_dg, Q_sg - Q_dg, 0.0)
+
+    # Surplus is integrated in price space, so no inverse curves are needed:
+    # PS = ∫0 to Q_sg [P_g - P_s(Q)] dQ = ∫ from the price where supply starts (Qs = 0) to P_g of Qs(P) dP
+    # CS = ∫0 to Q_dg P_d(Q) dQ - P_g * Q_dg = ∫ from P_g to the choke price (Qd = 0) of Qd(P) dP
+    PS = np.zeros(len(prices))
+    CS = np.zeros(len(prices))
+    for i, price in enumerate(prices):
+        supply_start = market.supply_start(price)
+        if supply_start is not None:
+            PS[i] = quad(Qs, supply_start, price)[0]
+        choke_price = market.choke_price(price)
+        if choke_price is not None:
+            CS[i] = quad(Qd, price, choke_price)[0]
+
+    # Total government cost:
+    gov_cost = Q_gov * (prices + storage_cost)
+
+    # A sweep over several guarantee prices returns one row per price
+    if P_g.ndim > 0:
+        return pd.DataFrame({
+            'Price Guarantee': prices,
+            'Quantity Supplied': Q_sg,
+            'Quantity Demanded': Q_dg,
+            'Government Buys': Q_gov,
+            'Producer Surplus': PS,
+            'Consumer Surplus': CS,
+            'Total Gov Cost': gov_cost,
+        })
+
+    return PriceGuaranteeResult(float(P_eq), float(Q_eq), float(Q_gov[0]), float(PS[0]), float(CS[0]), float(gov_cost[0]))
+
+def PriceGuaranteeSymbolic(demand_eq, supply_eq, promise_to_buy_at, storage_cost):
+    # Only the symbolic path solves and integrates with sympy
+    import sympy as sp
+
+    # Parsed curves, equilibrium and inverse curves come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    P = market.P
+    Q = market.Q
+    Qd_expr = market.Qd_expr
+    Qs_expr = market.Qs_expr
+
+    # Equilibrium: Qd(P) = Qs(P)
+    P_eq, Q_eq = market.equilibrium
 
     # Now consider the price guarantee P_g
     P_g = promise_to_buy_at
@@ -58,48 +102,40 @@ def PriceGuarantee(demand_eq, supply_eq, promise_to_buy_at, storage_cost):
     # Government needs to buy:
     Q_gov = Q_sg - Q_dg if Q_sg > Q_dg else 0
 
-    # To find inverse functions for surplus calculation:
-    # Invert demand: Q = D(P) -> P = D^{-1}(Q)
-    inv_demand_solutions = sp.solve(sp.Eq(Q, Qd_expr), P)
-    # Choose a suitable inverse that is a proper increasing function of Q
-    # Typically, demand is downward sloping, so we pick the appropriate solution.
-    # If there's more than one solution, pick the real and valid branch.
-    inv_demand = None
-    for sol in inv_demand_solutions:
-        # Check if valid over relevant range Q=0 to Q_dg
-        if sol.is_real:
-            inv_demand = sol
-            break
-    if inv_demand is None:
+    # Inverse functions for surplus calculation: P = D^{-1}(Q) and P = S^{-1}(Q)
+    # Only a branch sympy can confirm is real is accepted here
+    inv_demand = market.inverse_demand
+    if inv_demand is None or not inv_demand.is_real:
         raise ValueError("Could not invert demand function.")
-
-    # Invert supply: Q = S(P) -> P = S^{-1}(Q)
-    inv_supply_solutions = sp.solve(sp.Eq(Q, Qs_expr), P)
-    inv_supply = None
-    for sol in inv_supply_solutions:
-        if sol.is_real:
-            inv_supply = sol
-            break
-    if inv_supply is None:
+    inv_supply = market.inverse_supply
+    if inv_supply is None or not inv_supply.is_real:
         raise ValueError("Could not invert supply function.")
 
     # Producer Surplus at price guarantee:
     # PS = ∫0 to Q_sg [P_g - P_s(Q)] dQ
     # We'll integrate symbolically:
-    PS_expr = sp.integrate((P_g - inv_supply), (Q, 0, Q_sg))
+    # (kept by the market under P_g, so a repeated guarantee skips the integration)
+    PS_expr = market.solution(f"guarantee PS {P_g}", lambda: sp.integrate((P_g - inv_supply), (Q, 0, Q_sg)))
 
     # Consumer Surplus at price guarantee:
     # CS = ∫0 to Q_dg P_d(Q) dQ - P_g * Q_dg
-    CS_expr = sp.integrate(inv_demand, (Q, 0, Q_dg)) - P_g * Q_dg
+    CS_expr = market.solution(f"guarantee CS {P_g}", lambda: sp.integrate(inv_demand, (Q, 0, Q_dg))) - P_g * Q_dg
 
     # Total government cost:
     gov_cost = Q_gov * (P_g + storage_cost)
 
+    return PriceGuaranteeResult(float(P_eq), float(Q_eq), float(Q_gov), float(PS_expr), float(CS_expr), float(gov_cost))
+
+def format_price_guarantee(result):
+    # A sweep's DataFrame and "" are passed through as they are
+    if not isinstance(result, PriceGuaranteeResult):
+        return result
+
     # Format the output string
     # Round values for neatness (optional)
-    return (f"Market Equilibrium Price: {float(P_eq):.2f}, and Quantity: {float(Q_eq):.2f}\n"
-            f"Government needs to buy: {float(Q_gov):.2f}\n"
-            f"Producer Surplus: {float(PS_expr):.2f}, and Consumer Surplus: {float(CS_expr):.2f}\n"
-            f"Total cost to Gov (including storage cost): {float(gov_cost):.2f}")
+    return (f"Market Equilibrium Price: {result.equilibrium_price:.2f}, and Quantity: {result.equilibrium_quantity:.2f}\n"
+            f"Government needs to buy: {result.gov_buys:.2f}\n"
+            f"Producer Surplus: {result.producer_surplus:.2f}, and Consumer Surplus: {result.consumer_surplus:.2f}\n"
+            f"Total cost to Gov (including storage cost): {result.gov_cost:.2f}")
 
-PriceGuarantee(arg1, arg2, arg3, arg4)
+format_price_guarantee(remember(PriceGuarantee, arg1, arg2, arg3, arg4))
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+def PriceGuaranteeSimulation(demand_eq, supply_eq, promise_to_buy_at, storage_cost=0, periods=50, paths=10000,
+                             release_price=None, carrying_cost=0, shock_sd=0.1, seed=None):
+    # Multi-period version of PriceGuarantee:
+    # demand_eq and supply_eq are strings like "Q = 660 - 6.6P" or "Q = 59(P) - 3(P^2)"
+    # promise_to_buy_at is the guaranteed price (P_g); the government buys Qs - Qd whenever
+    #   the market price would fall below it, paying P_g + storage_cost per unit bought
+    # carrying_cost is the cost per unit of stock held at the end of each period
+    # release_price: when the market price would rise above it, stock is sold to hold the
+    #   price at release_price (None means stock is never released)
+    # shock_sd: each period supply is scaled by a lognormal shock with this standard deviation
+    # Every path is simulated at once; each period's equilibrium is found by vectorized
+    # bisection on the compiled curves, so 10^4 paths x 50 periods take a few seconds.
+
+    if demand_eq is None or supply_eq is None:
+        return ""
+
+    if storage_cost is None:
+        storage_cost = 0
+    if carrying_cost is None:
+        carrying_cost = 0
+
+    # Compiled curves come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    Qd = market.demand
+    Qs = market.supply
+    P_g = float(promise_to_buy_at)
+
+    # Bracket for every equilibrium: between the price where supply starts (Qs = 0, so any
+    # shocked market has excess demand) and the choke price (Qd = 0, excess supply)
+    P_eq = market.numeric_equilibrium[0]
+    low = market.supply_start(P_eq)
+    high = market.choke_price(P_eq)
+    if low is None or high is None:
+        return "Could not bracket the market price."
+
+    rng = np.random.default_rng(seed)
+    stock = np.zeros(paths)
+    cumulative_cost = np.zeros(paths)
+    rows = []
+
+    for period in range(1, periods + 1):
+        # Multiplicative supply shock with mean 1
+        shock = np.exp(shock_sd * rng.standard_normal(paths) - shock_sd ** 2 / 2)
+
+        # Market price with no government action
+        free_price = bisect(lambda price: Qd(price) - shock * Qs(price), np.full(paths, low), np.full(paths, high))
+        price = free_price.copy()
+
+        # Guarantee binds: government buys the excess supply at P_g
+        supported = free_price < P_g
+        bought = np.where(supported, shock * Qs(P_g) - Qd(P_g), 0.0)
+        price[supported] = P_g
+
+        # Release rule: sell stock to hold the price at release_price
+        released = np.zeros(paths)
+        if release_price is not None:
+            releasing = (free_price > release_price) & (stock > 0)
+            shortfall = Qd(release_price) - shock * Qs(release_price)
+            enough = releasing & (stock >= shortfall)
+            released[enough] = shortfall[enough]
+            price[enough] = release_price
+
+            # Not enough stock to reach release_price: sell all of it and let the price settle above
+            partial = releasing & ~enough
+            if partial.any():
+                remaining = stock[partial]
+                partial_shock = shock[partial]
+                price[partial] = bisect(lambda p: Qd(p) - partial_shock * Qs(p) - remaining,
+                                        np.full(partial.sum(), float(release_price)), free_price[partial])
+                released[partial] = remaining
+
+        stock = stock + bought - released
+
+        # Government cost this period: purchases, carrying the stock, less sales revenue
+        period_cost = bought * (P_g + storage_cost) + carrying_cost * stock - released * price
+        cumulative_cost += period_cost
+
+        rows.append({
+            'Period': period,
+            'Mean Price': price.mean(),
+            'Mean Gov Buys': bought.mean(),
+            'Mean Released': released.mean(),
+            'Mean Stock': stock.mean(),
+            'Mean Gov Cost': period_cost.mean(),
+            'Mean Cumulative Cost': cumulative_cost.mean(),
+            'Cumulative Cost 5%': np.percentile(cumulative_cost, 5),
+            'Cumulative Cost 95%': np.percentile(cumulative_cost, 95),
+        })
+
+    return pd.DataFrame(rows)
+
+remember(PriceGuaranteeSimulation, arg1, arg2, arg3, arg4)
\ No newline at end of file
@@ -1,87 +1,86 @@
-import sympy as sp
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
 
-def Subsidy(demand_eq, supply_eq, subsidy, To_Whom='C'):
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+class SubsidyResult(NamedTuple):
+    # Raw numbers behind the Subsidy output; format_subsidy turns them into the Excel text
+    equilibrium_price: float
+    equilibrium_quantity: float
+    buyer_price: float
+    buyer_pays_less_by: float
+    seller_price: float
+    seller_receives_more_by: float
+    quantity: float
+    gov_cost: float
+    DWL: float
+    consumer_surplus: float
+    producer_surplus: float
+    To_Whom: str
+    # With sensitivities=True: {'subsidy' or a coefficient label: {field: derivative}}, see Subsidy
+    sensitivities: dict = None
+
+def Subsidy(demand_eq, supply_eq, subsidy, To_Whom='C', sensitivities=False, mode='unit'):
+    # mode='unit': subsidy is per unit sold; mode='ad valorem': subsidy is a share of the price
+    #   (0.1 = 10%), buyers paying Ps * (1 - subsidy) whichever side receives it
+    # A list/array of subsidies returns one row per subsidy, all solved at once (see subsidy_schedule)
     if not demand_eq or not supply_eq:
         return ""
+
+    # Loaded here so only a call pays for importing sympy
+    import sympy as sp
+
     # Example input: demand_eq = "Q = 3040 - 25P"
     #                supply_eq = "Q = 1.8 + 9P"
-    # We will parse these equations into sympy expressions.
-    # We assume the format "Q =" is always at the start and solve for Q as a function of P.
-    
-    # Extract the right-hand side of the equations
-    demand_rhs = demand_eq.split('=')[1].strip()
-    supply_rhs = supply_eq.split('=')[1].strip()
+    # The parsed curves, no-subsidy equilibrium, inverse curves and baseline surplus
+    # come from the shared Market (Market.py), computed once per pair of equations.
+    market = get_market(demand_eq, supply_eq)
+    P = market.P
+    Qd_expr = market.Qd_expr
+    Qs_expr = market.Qs_expr
     
-    # We'll define a variable P for price and Q for quantity
-    P = sp.Symbol('P', real=True)
-    # We will create expressions for Qd(P) and Qs(P).
-    
-    # Convert something like "3040 - 25P" or "20 - 23(P^2)" to a pythonic expression:
-    # Replace 'P' with '*P' where appropriate and handle powers:
-    # A safe way: Replace occurrences of P with (P), then replace (P^2) with (P**2)
-    # We'll do a more robust parse:
-    def parse_equation(rhs):
-        expr = rhs.replace('^', '**')
-        # Ensure multiplication is explicit. For example "25P" -> "25*P"
-        # We'll insert a '*' before 'P' if there's a digit or a closing parenthesis before it.
-        # A quick approach:
-        expr = expr.replace('(', '*(') # This might overinsert '*'
-        # We'll revert the first char if it is '*(':
-        if expr.startswith('*('):
-            expr = expr[1:]
-        # A more robust approach:
-        # We'll handle replacements carefully
-        # Actually, let's do a small manual parse:
-        # We'll insert '*' before P if needed
-        expr_modified = ""
-        for i, ch in enumerate(expr):
-            if ch == 'P':
-                # check previous character
-                if i > 0 and (expr[i-1].isdigit() or expr[i-1] == ')' or expr[i-1] == 'P'):
-                    expr_modified += '*' + ch
-                else:
-                    expr_modified += ch
-            else:
-                expr_modified += ch
-        expr = expr_modified
-        # Now convert to sympy
-        return sp.sympify(expr, {'P':P})
-    
-    Qd_expr = parse_equation(demand_rhs)
-    Qs_expr = parse_equation(supply_rhs)
-    
-    # Find initial equilibrium by solving Qd(P) = Qs(P)
-    eq_solution = sp.solve(sp.Eq(Qd_expr, Qs_expr), P)
-    if not eq_solution:
-        return "No equilibrium solution found."
-    # If multiple solutions, take the one that makes economic sense (positive Q and P)
-    # We'll pick the first positive solution if exists
-    P0_candidates = [sol for sol in eq_solution if sol.is_real]
-    if not P0_candidates:
-        return "No real equilibrium solution."
-    P0 = None
-    for candidate in P0_candidates:
-        Q_candidate = Qd_expr.subs(P, candidate)
-        if candidate > 0 and Q_candidate > 0:
-            P0 = candidate
-            break
-    if P0 is None:
-        # If no positive solution found, just take the first solution
-        P0 = eq_solution[0]
-    Q0 = Qd_expr.subs(P, P0)
+    # Initial equilibrium: Qd(P) = Qs(P)
+    try:
+        P0, Q0 = market.equilibrium
+        mode = wedge_mode(mode)
+    except ValueError as error:
+        return str(error)
+
+    if np.ndim(subsidy) > 0:
+        return subsidy_schedule(market, subsidy, mode)
     
-    # Now apply the subsidy
+    # Now apply the subsidy (each solve is kept by the market under its subsidy, see Market.solution)
     # If subsidy to consumers: Qd depends on (P - subsidy), supply on P.
     # Condition: Qd(P_s - S) = Qs(P_s)  -> Solve for P_s
     # If subsidy to producers: Qs depends on (P_b + S), Qd on P_b.
     # Condition: Qd(P_b) = Qs(P_b + S) -> Solve for P_b
+    # Ad valorem, either way: Qd(Ps * (1 - S)) = Qs(Ps)
     
-    if To_Whom == 'C':  # Consumer subsidy
+    if mode == 'ad valorem':
+        Ps = sp.Symbol('Ps', real=True)
+        eq_subsidy = sp.Eq(Qd_expr.subs(P, Ps * (1 - subsidy)), Qs_expr.subs(P, Ps))
+        sol_subsidy = market.solution(f"ad valorem subsidy {subsidy}", lambda: sp.solve(eq_subsidy, Ps))
+        Ps_new = None
+        for candidate in sol_subsidy:
+            Q_candidate = Qd_expr.subs(P, candidate * (1 - subsidy))
+            if candidate > 0 and Q_candidate > 0:
+                Ps_new = candidate
+                break
+        if Ps_new is None:
+            Ps_new = sol_subsidy[0]
+        Pb_new = Ps_new * (1 - subsidy)
+        Q_new = Qd_expr.subs(P, Pb_new)
+        if To_Whom not in ('C', 'P'):
+            To_Whom = 'C'
+
+    elif To_Whom == 'C':  # Consumer subsidy
         # Let Ps = price received by sellers, then buyers pay Pb = Ps - S
         # Solve Qd(Ps - S) = Qs(Ps)
         Ps = sp.Symbol('Ps', real=True)
         eq_subsidy = sp.Eq(Qd_expr.subs(P, Ps - subsidy), Qs_expr.subs(P, Ps))
-        sol_subsidy = sp.solve(eq_subsidy, Ps)
+        sol_subsidy = market.solution(f"consumer subsidy {subsidy}", lambda: sp.solve(eq_subsidy, Ps))
         # Choose a valid solution
         Ps_new = None
         for candidate in sol_subsidy:
@@ -99,7 +98,7 @@ def Subsidy(demand_eq, supply_eq, subsidy, To_Whom='C'):
         # Solve Qd(Pb) = Qs(Pb + S)
         Pb = sp.Symbol('Pb', real=True)
         eq_subsidy = sp.Eq(Qd_expr.subs(P, Pb), Qs_expr.subs(P, Pb + subsidy))
-        sol_subsidy = sp.solve(eq_subsidy, Pb)
+        sol_subsidy = market.solution(f"producer subsidy {subsidy}", lambda: sp.solve(eq_subsidy, Pb))
         Pb_new = None
         for candidate in sol_subsidy:
             Q_candidate = Qd_expr.subs(P, candidate)
@@ -116,7 +115,7 @@ def Subsidy(demand_eq, supply_eq, subsidy, To_Whom='C'):
         # Same as To_Whom == 'C'
         Ps = sp.Symbol('Ps', real=True)
         eq_subsidy = sp.Eq(Qd_expr.subs(P, Ps - subsidy), Qs_expr.subs(P, Ps))
-        sol_subsidy = sp.solve(eq_subsidy, Ps)
+        sol_subsidy = market.solution(f"consumer subsidy {subsidy}", lambda: sp.solve(eq_subsidy, Ps))
         Ps_new = None
         for candidate in sol_subsidy:
             Q_candidate = Qd_expr.subs(P, candidate - subsidy)
@@ -142,45 +141,18 @@ def Subsidy(demand_eq, supply_eq, subsidy, To_Whom='C'):
     
     # Government cost:
     gov_cost = subsidy * Q_new  # In the same units (thousand dollars if Q in thousands)
+    if mode == 'ad valorem':
+        # The gap between the two prices on every unit sold
+        gov_cost = (seller_price_after - buyer_price_after) * Q_new
     
     # To compute DWL, we need CS and PS before and after.
-    # We'll define a helper to find inverse functions and integrate.
-    
-    # Inverse demand and supply: We have Q = f(P). We want P as a function of Q.
-    Q = sp.Symbol('Q', real=True)
-    
-    # Solve for P in terms of Q for demand: Q = Qd_expr -> P = Pd(Q)
-    Pd_solutions = sp.solve(sp.Eq(Q, Qd_expr), P)
-    if not Pd_solutions:
+    if market.inverse_demand is None:
         return "Could not invert demand function."
-    Pd_func = None
-    for sol in Pd_solutions:
-        # Choose a real solution
-        if sol.is_real or sol.is_real is None:
-            Pd_func = sol
-            break
-    if Pd_func is None:
-        Pd_func = Pd_solutions[0]
-    
-    # Solve for supply inverse: Q = Qs_expr -> P = Ps(Q)
-    Ps_solutions = sp.solve(sp.Eq(Q, Qs_expr), P)
-    if not Ps_solutions:
+    if market.inverse_supply is None:
         return "Could not invert supply function."
-    Ps_func = None
-    for sol in Ps_solutions:
-        if sol.is_real or sol.is_real is None:
-            Ps_func = sol
-            break
-    if Ps_func is None:
-        Ps_func = Ps_solutions[0]
-    
-    # Consumer Surplus (CS) = ∫0 to Q0 Pd(Q') dQ' - P0*Q0
-    # Producer Surplus (PS) = P0*Q0 - ∫0 to Q0 Ps(Q') dQ'
     
-    # Before subsidy:
-    CS_before = sp.integrate(Pd_func, (Q, 0, Q0)) - P0*Q0
-    PS_before = P0*Q0 - sp.integrate(Ps_func, (Q, 0, Q0))
-    TS_before = CS_before + PS_before  # No gov
+    # Before subsidy (CS = ∫0 to Q0 Pd(Q') dQ' - P0*Q0, PS = P0*Q0 - ∫0 to Q0 Ps(Q') dQ'):
+    TS_before = market.TS0  # No gov
     
     # After subsidy:
     # For inverse demand after consumer subsidy: the consumer price is Pb (if to consumers)
@@ -197,15 +169,86 @@ def Subsidy(demand_eq, supply_eq, subsidy, To_Whom='C'):
     #   CS = ∫0 to Q_new Pd(Q') dQ' - Price buyers pay * Q_new
     #   PS = Price sellers get * Q_new - ∫0 to Q_new Ps(Q') dQ'
     
-    CS_after = sp.integrate(Pd_func, (Q, 0, Q_new)) - buyer_price_after*Q_new
-    PS_after = seller_price_after*Q_new - sp.integrate(Ps_func, (Q, 0, Q_new))
+    CS_after = market.demand_area(Q_new) - buyer_price_after*Q_new
+    PS_after = seller_price_after*Q_new - market.supply_area(Q_new)
     TS_after = CS_after + PS_after
     
     # The government spends gov_cost, so Net Social Surplus after subsidy:
     # NSS_after = CS_after + PS_after - gov_cost
     # DWL = TS_before - NSS_after = TS_before - (CS_after + PS_after - gov_cost)
     DWL = TS_before - (TS_after - gov_cost)
-    
+
+    # Derivatives of every field with respect to the subsidy and to each coefficient of the
+    # curves (market.coefficients, e.g. 'demand P'), by implicit differentiation at the solved
+    # points instead of solving again at subsidy ± ε.
+    derivatives = None
+    if sensitivities:
+        multiplier, addition, d_multiplier, d_addition = wedge('subsidy', subsidy, mode)
+        try:
+            after = market.sensitivities(buyer_price_after, seller_price_after, Q_new,
+                                         multiplier, d_multiplier * float(buyer_price_after) + d_addition)
+            before = market.sensitivities(P0, P0, Q0)
+        except ValueError as error:
+            return str(error)
+        derivatives = {}
+        gap = float(seller_price_after - buyer_price_after)
+        for variable, d in after.items():
+            # The no-subsidy equilibrium does not move with the subsidy
+            d0 = dict.fromkeys(d, 0.0) if variable == 'rate' else before[variable]
+            d_cost = (d['seller_price'] - d['buyer_price']) * float(Q_new) + gap * d['quantity']
+            derivatives['subsidy' if variable == 'rate' else variable] = {
+                'equilibrium_price': d0['buyer_price'],
+                'equilibrium_quantity': d0['quantity'],
+                'buyer_price': d['buyer_price'],
+                'buyer_pays_less_by': d0['buyer_price'] - d['buyer_price'],
+                'seller_price': d['seller_price'],
+                'seller_receives_more_by': d['seller_price'] - d0['seller_price'],
+                'quantity': d['quantity'],
+                'gov_cost': d_cost,
+                'DWL': (d0['consumer_surplus'] + d0['producer_surplus']) - (d['consumer_surplus'] + d['producer_surplus'] - d_cost),
+                'consumer_surplus': d['consumer_surplus'],
+                'producer_surplus': d['producer_surplus'],
+            }
+
+    return SubsidyResult(
+        equilibrium_price=float(P0),
+        equilibrium_quantity=float(Q0),
+        buyer_price=float(buyer_price_after),
+        buyer_pays_less_by=float(buyer_paying_less_by),
+        seller_price=float(seller_price_after),
+        seller_receives_more_by=float(seller_receiving_more_by),
+        quantity=float(Q_new),
+        gov_cost=float(gov_cost),
+        DWL=float(DWL),
+        consumer_surplus=float(CS_after),
+        producer_surplus=float(PS_after),
+        To_Whom=To_Whom,
+        sensitivities=derivatives,
+    )
+
+def subsidy_schedule(market, subsidies, mode):
+    # One row per subsidy, every subsidy solved at once by Market.wedge_schedule (numerically,
+    # so a schedule costs no symbolic solve per rate)
+    subsidies = np.atleast_1d(np.asarray(subsidies, dtype=float)).ravel()
+    multiplier, addition, d_multiplier, d_addition = wedge('subsidy', subsidies, mode)
+    Pb, Ps, Q, CS, PS = market.wedge_schedule(multiplier, addition)
+    gov_cost = (Ps - Pb) * Q
+    return pd.DataFrame({
+        'Subsidy': subsidies,
+        'Buyer Price': Pb,
+        'Seller Price': Ps,
+        'Quantity': Q,
+        'Gov Cost': gov_cost,
+        'Consumer Surplus': CS,
+        'Producer Surplus': PS,
+        'DWL': float(market.TS0) - (CS + PS - gov_cost),
+    })
+
+def format_subsidy(result):
+    # Messages for invalid input and schedules are passed through as they are
+    if not isinstance(result, SubsidyResult):
+        return result
+
     # Build the output string
     # Required structure:
     # - Market equilibrium price and Quantity
@@ -213,16 +256,16 @@ def Subsidy(demand_eq, supply_eq, subsidy, To_Whom='C'):
     # - Cost of Subsidy to Gov: 'x', DWL: 'y'
     # (Optional if To_Whom is given):
     # - After Subsidy Consumer Surplus: , Producer Surplus:
-    
-    result = []
-    result.append(f"Market equilibrium price: {float(P0):.2f}, Quantity: {float(Q0):.2f}")
-    result.append(f"After subsidy buyers pay: {float(buyer_price_after):.2f} (less by {float(buyer_paying_less_by):.2f})")
-    result.append(f"After subsidy sellers make: {float(seller_price_after):.2f} (more by {float(seller_receiving_more_by):.2f})")
-    result.append(f"Cost of Subsidy to Gov: {float(gov_cost):.2f}, DWL: {float(DWL):.2f}")
-    
-    if To_Whom is not None:
-        result.append(f"After Subsidy Consumer Surplus: {float(CS_after):.2f}, Producer Surplus: {float(PS_after):.2f}")
-    
-    return "\n".join(result)
 
-Subsidy(arg1, arg2, arg3, arg4)
\ No newline at end of file
+    output = []
+    output.append(f"Market equilibrium price: {result.equilibrium_price:.2f}, Quantity: {result.equilibrium_quantity:.2f}")
+    output.append(f"After subsidy buyers pay: {result.buyer_price:.2f} (less by {result.buyer_pays_less_by:.2f})")
+    output.append(f"After subsidy sellers make: {result.seller_price:.2f} (more by {result.seller_receives_more_by:.2f})")
+    output.append(f"Cost of Subsidy to Gov: {result.gov_cost:.2f}, DWL: {result.DWL:.2f}")
+
+    if result.To_Whom is not None:
+        output.append(f"After Subsidy Consumer Surplus: {result.consumer_surplus:.2f}, Producer Surplus: {result.producer_surplus:.2f}")
+
+    return "\n".join(output)
+
+format_subsidy(remember(Subsidy, arg1, arg2, arg3, arg4))
\ No newline at end of file
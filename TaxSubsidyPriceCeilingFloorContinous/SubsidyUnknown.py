@@ -1,57 +1,48 @@
-from sympy import symbols, sympify, solve, Eq
-import re
-
-def preprocess_equation(eq_str):
-    eq_str = eq_str.replace(" ", "")
-    lhs, rhs = eq_str.split('=')
-    rhs = rhs.strip()
-    
-    # Insert '*' between a number and 'P'
-    rhs = re.sub(r'(\d)(P)', r'\1*\2', rhs)
-    # Insert '*' between number and '('
-    rhs = re.sub(r'(\d)\(', r'\1*(', rhs)
-    # Insert '*' if we have P(
-    rhs = re.sub(r'(P)\(', r'\1*(', rhs)
-
-    return lhs.strip(), rhs
-
-def is_linear(expr, var):
-    # Check linearity by examining the second derivative:
-    return expr.diff(var, 2) == 0
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+class CalculateSubsidyResult(NamedTuple):
+    # Raw numbers behind the CalculateSubsidy output (see format_calculate_subsidy).
+    # None: not asked for; NaN: asked for but unsolved, with the reason in unsolved.
+    equilibrium_price: float
+    equilibrium_quantity: float
+    increase_Q: float
+    subsidy_to_increase_Q: float
+    subsidy_for_DWL: float
+    subsidy_for_expense: float
+    unsolved: dict
 
 def CalculateSubsidy(demand_eq: str, supply_eq: str, increase_Q=None, max_DWL=None, max_Expense=None):
     if demand_eq == None or supply_eq == None:
         return ""
     
+    from sympy import symbols, solve, Eq
+
     P, s = symbols('P s', real=True)
     
-    def parse_equation(eq_str):
-        lhs, rhs = preprocess_equation(eq_str)
-        return sympify(rhs, {"P": P})
-    
-    D = parse_equation(demand_eq)  # Q_d(P)
-    S = parse_equation(supply_eq)  # Q_s(P)
+    # Parsed curves and the no-subsidy equilibrium come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    D = market.Qd_expr  # Q_d(P)
+    S = market.Qs_expr  # Q_s(P)
     
     # Find no-subsidy equilibrium:
-    eq = Eq(D, S)
-    sol = solve(eq, P)
-    if not sol:
+    try:
+        P0, Q0 = market.equilibrium
+    except ValueError:
         if increase_Q is None and max_DWL is None and max_Expense is None:
             return ""
         return "No equilibrium found."
 
-    P0 = sol[0]
-    Q0 = D.subs(P, P0)
-
-    # Conver P0 and Q0 to float
-    P0_f = P0.evalf()
-    Q0_f = Q0.evalf()
-    # Set to 2 decimal places
-    P0_f = round(P0_f, 2)
-    Q0_f = round(Q0_f, 2)
+    # If all three are None, return empty
+    if increase_Q is None and max_DWL is None and max_Expense is None:
+        return ""
 
-    results = []
-    results.append(f"Market Equilibrium Price: {P0_f} and Quantity: {Q0_f}")
+    subsidy_to_increase_Q = None
+    subsidy_for_DWL = None
+    subsidy_for_expense = None
+    unsolved = {}
     
     # Equilibrium with subsidy:
     def equilibrium_with_subsidy(subsidy):
@@ -63,36 +54,33 @@ def CalculateSubsidy(demand_eq: str, supply_eq: str, increase_Q=None, max_DWL=No
         Q_star = S.subs(P, P_star)
         return P_star, Q_star
 
-    linear_market = is_linear(D, P) and is_linear(S, P)
+    linear_market = market.is_linear
     
     # If increase_Q is given:
     if increase_Q is not None:
         eq1 = Eq(D.subs(P, P - s), S)
         eq2 = Eq(S, Q0 + increase_Q)
-        sol_increase = solve((eq1, eq2), (P, s), dict=True)
+        sol_increase = market.solution(f"subsidy to increase Q {increase_Q}", lambda: solve((eq1, eq2), (P, s), dict=True))
         if sol_increase:
             s_increase = sol_increase[0][s]
-
-            # Convert to float at 2 decimal places
-            s_increase_f = s_increase.evalf()
-            s_increase_f = round(s_increase_f, 2)
-
-            results.append(f"Subsidy to increase Q by {increase_Q}: {s_increase_f}")
+            subsidy_to_increase_Q = float(s_increase.evalf())
         else:
-            results.append(f"Subsidy to increase Q by {increase_Q}: No solution found")
+            subsidy_to_increase_Q = float('nan')
+            unsolved['subsidy_to_increase_Q'] = "No solution found"
 
     # If max_DWL is given and market is linear:
     if max_DWL is not None:
+        subsidy_for_DWL = float('nan')
         if not linear_market:
-            results.append("Subsidy to maximize DWL: Not applicable for non-linear market")
+            unsolved['subsidy_for_DWL'] = "Not applicable for non-linear market"
         else:
             # DWL = 0.5*(Q(s)-Q0)*s
-            P_sub_sol = solve(Eq(D.subs(P, P - s), S), P)
-            if P_sub_sol:
-                P_sub_expr = P_sub_sol[0]
+            # Equilibrium price as a function of the subsidy, solved once per market
+            P_sub_expr = market.subsidy_price[0]
+            if P_sub_expr is not None:
                 Q_sub_expr = S.subs(P, P_sub_expr)
                 dwl_eq = Eq(0.5*(Q_sub_expr - Q0)*s, max_DWL)
-                sol_dwl = solve(dwl_eq, s)
+                sol_dwl = market.solution(f"subsidy for DWL {max_DWL}", lambda: solve(dwl_eq, s))
                 if sol_dwl:
                     s_candidates = [x for x in sol_dwl if x.is_real]
                     if s_candidates:
@@ -104,26 +92,23 @@ def CalculateSubsidy(demand_eq: str, supply_eq: str, increase_Q=None, max_DWL=No
                         if s_choice is None:
                             s_choice = s_candidates[0]
 
-                        # Convert to float at 2 decimal places
-                        s_choice_f = s_choice.evalf()
-                        s_choice_f = round(s_choice_f, 2)
-    
-                        results.append(f"Subsidy to maximize DWL: {s_choice_f}")
+                        subsidy_for_DWL = float(s_choice.evalf())
                     else:
-                        results.append("Subsidy to maximize DWL: No real solution found")
+                        unsolved['subsidy_for_DWL'] = "No real solution found"
                 else:
-                    results.append("Subsidy to maximize DWL: No solution found")
+                    unsolved['subsidy_for_DWL'] = "No solution found"
             else:
-                results.append("Subsidy to maximize DWL: Could not solve equilibrium with subsidy")
+                unsolved['subsidy_for_DWL'] = "Could not solve equilibrium with subsidy"
 
     # If max_Expense is given:
     if max_Expense is not None:
-        P_sub_sol = solve(Eq(D.subs(P, P - s), S), P)
-        if P_sub_sol:
-            P_sub_expr = P_sub_sol[0]
+        subsidy_for_expense = float('nan')
+        # Equilibrium price as a function of the subsidy, solved once per market
+        P_sub_expr = market.subsidy_price[0]
+        if P_sub_expr is not None:
             Q_sub_expr = S.subs(P, P_sub_expr)
             expense_eq = Eq(s*Q_sub_expr, max_Expense)
-            sol_expense = solve(expense_eq, s)
+            sol_expense = market.solution(f"subsidy for expense {max_Expense}", lambda: solve(expense_eq, s))
             if sol_expense:
                 s_candidates = [x for x in sol_expense if x.is_real]
                 if s_candidates:
@@ -135,21 +120,50 @@ def CalculateSubsidy(demand_eq: str, supply_eq: str, increase_Q=None, max_DWL=No
                     if s_choice is None:
                         s_choice = s_candidates[0]
 
-                    # Convert to float at 2 decimal places
-                    s_choice_f = s_choice.evalf()
-                    s_choice_f = round(s_choice_f, 2)
-                    results.append(f"Subsidy to maximize Expense Budget: {s_choice_f}")
+                    subsidy_for_expense = float(s_choice.evalf())
                 else:
-                    results.append("Subsidy to maximize Expense Budget: No real solution found")
+                    unsolved['subsidy_for_expense'] = "No real solution found"
             else:
-                results.append("Subsidy to maximize Expense Budget: No solution found")
+                unsolved['subsidy_for_expense'] = "No solution found"
         else:
-            results.append("Subsidy to maximize Expense Budget: Could not solve equilibrium with subsidy")
+            unsolved['subsidy_for_expense'] = "Could not solve equilibrium with subsidy"
+
+    return CalculateSubsidyResult(
+        equilibrium_price=float(P0),
+        equilibrium_quantity=float(Q0),
+        increase_Q=increase_Q,
+        subsidy_to_increase_Q=subsidy_to_increase_Q,
+        subsidy_for_DWL=subsidy_for_DWL,
+        subsidy_for_expense=subsidy_for_expense,
+        unsolved=unsolved,
+    )
+
+def format_calculate_subsidy(result):
+    # "" and "No equilibrium found." are passed through as they are
+    if not isinstance(result, CalculateSubsidyResult):
+        return result
+
+    from sympy import Float
+
+    def number(value):
+        # As the cell always printed it: sympy's Float rounded to 2 places, so a whole number
+        # shows as 30.0000000000000 and 12.345 as 12.35; an exact 0 as 0
+        return "0" if value == 0 else str(round(Float(value), 2))
+
+    def line(label, field):
+        if field in result.unsolved:
+            return f"{label}: {result.unsolved[field]}"
+        return f"{label}: {number(getattr(result, field))}"
 
-    # If all three are None, return empty
-    if increase_Q is None and max_DWL is None and max_Expense is None:
-        return ""
+    results = []
+    results.append(f"Market Equilibrium Price: {number(result.equilibrium_price)} and Quantity: {number(result.equilibrium_quantity)}")
+    if result.subsidy_to_increase_Q is not None:
+        results.append(line(f"Subsidy to increase Q by {result.increase_Q}", 'subsidy_to_increase_Q'))
+    if result.subsidy_for_DWL is not None:
+        results.append(line("Subsidy to maximize DWL", 'subsidy_for_DWL'))
+    if result.subsidy_for_expense is not None:
+        results.append(line("Subsidy to maximize Expense Budget", 'subsidy_for_expense'))
 
     return "\n".join(results)
 
-CalculateSubsidy(arg1, arg2, arg3, arg4, arg5)
\ No newline at end of file
+format_calculate_subsidy(remember(CalculateSubsidy, arg1, arg2, arg3, arg4, arg5))
\ No newline at end of file
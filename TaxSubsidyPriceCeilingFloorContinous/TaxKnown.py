@@ -1,62 +1,79 @@
-import sympy as sp
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
 
-def Tax(demand_eq, supply_eq, tax, On_Whom='P'):
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+class TaxResult(NamedTuple):
+    # Raw numbers behind the Tax output; format_tax turns them into the Excel text
+    equilibrium_price: float
+    equilibrium_quantity: float
+    buyer_price: float
+    buyer_pays_more_by: float
+    seller_price: float
+    seller_receives_less_by: float
+    quantity: float
+    tax_revenue: float
+    DWL: float
+    consumer_surplus: float
+    producer_surplus: float
+    # With sensitivities=True: {'tax' or a coefficient label: {field: derivative}}, see Tax
+    sensitivities: dict = None
+
+def Tax(demand_eq, supply_eq, tax, On_Whom='P', sensitivities=False, mode='unit'):
+    # mode='unit': tax is per unit sold; mode='ad valorem': tax is a share of the price
+    #   (0.1 = 10%), sellers keeping Pb / (1 + tax) whichever side pays it
+    # A list/array of taxes returns one row per tax, all solved at once (see tax_schedule)
     if not demand_eq or not supply_eq:
         return ""
 
+    # sympy loads on the first call, not when the cell is loaded
+    import sympy as sp
+
     # Example input: demand_eq = "Q = 3040 - 25P"
     #                supply_eq = "Q = 1.8 + 9P"
-    # We parse these equations into sympy expressions.
+    # The parsed curves, no-tax equilibrium, inverse curves and baseline surplus
+    # come from the shared Market (Market.py), computed once per pair of equations.
+    market = get_market(demand_eq, supply_eq)
+    P = market.P
+    Qd_expr = market.Qd_expr
+    Qs_expr = market.Qs_expr
 
-    # Extract the right-hand side of the equations
-    demand_rhs = demand_eq.split('=')[1].strip()
-    supply_rhs = supply_eq.split('=')[1].strip()
-    
-    P = sp.Symbol('P', real=True)
-    
-    def parse_equation(rhs):
-        expr = rhs.replace('^', '**')
-        # Insert '*' before P if needed
-        expr_modified = ""
-        for i, ch in enumerate(expr):
-            if ch == 'P':
-                if i > 0 and (expr[i-1].isdigit() or expr[i-1] == ')' or expr[i-1] == 'P'):
-                    expr_modified += '*' + ch
-                else:
-                    expr_modified += ch
-            else:
-                expr_modified += ch
-        expr = expr_modified
-        return sp.sympify(expr, {'P':P})
-    
-    Qd_expr = parse_equation(demand_rhs)
-    Qs_expr = parse_equation(supply_rhs)
-    
-    # Find initial equilibrium by solving Qd(P) = Qs(P)
-    eq_solution = sp.solve(sp.Eq(Qd_expr, Qs_expr), P)
-    if not eq_solution:
-        return "No equilibrium solution found."
-    P0_candidates = [sol for sol in eq_solution if sol.is_real]
-    if not P0_candidates:
-        return "No real equilibrium solution."
-    P0 = None
-    for candidate in P0_candidates:
-        Q_candidate = Qd_expr.subs(P, candidate)
-        if candidate > 0 and Q_candidate > 0:
-            P0 = candidate
-            break
-    if P0 is None:
-        P0 = eq_solution[0]
-    Q0 = Qd_expr.subs(P, P0)
+    # Initial equilibrium: Qd(P) = Qs(P)
+    try:
+        P0, Q0 = market.equilibrium
+        mode = wedge_mode(mode)
+    except ValueError as error:
+        return str(error)
+
+    if np.ndim(tax) > 0:
+        return tax_schedule(market, tax, mode)
     
-    # Apply the tax
+    # Apply the tax (each solve is kept by the market under its tax, see Market.solution)
     # If tax on producers (default): Qd(Pb) = Qs(Pb - tax)
     # If tax on consumers: Qd(Ps + tax) = Qs(Ps)
+    # Ad valorem, either way: Qd(Pb) = Qs(Pb / (1 + tax))
     
-    if On_Whom == 'P':  # Producer tax
+    if mode == 'ad valorem':
+        Pb = sp.Symbol('Pb', real=True)
+        eq_tax = sp.Eq(Qd_expr.subs(P, Pb), Qs_expr.subs(P, Pb / (1 + tax)))
+        sol_tax = market.solution(f"ad valorem tax {tax}", lambda: sp.solve(eq_tax, Pb))
+        Pb_new = None
+        for candidate in sol_tax:
+            Q_candidate = Qd_expr.subs(P, candidate)
+            if candidate > 0 and Q_candidate > 0:
+                Pb_new = candidate
+                break
+        if Pb_new is None:
+            Pb_new = sol_tax[0]
+        Ps_new = Pb_new / (1 + tax)
+        Q_new = Qd_expr.subs(P, Pb_new)
+
+    elif On_Whom == 'P':  # Producer tax
         Pb = sp.Symbol('Pb', real=True)
         eq_tax = sp.Eq(Qd_expr.subs(P, Pb), Qs_expr.subs(P, Pb - tax))
-        sol_tax = sp.solve(eq_tax, Pb)
+        sol_tax = market.solution(f"producer tax {tax}", lambda: sp.solve(eq_tax, Pb))
         Pb_new = None
         for candidate in sol_tax:
             Q_candidate = Qd_expr.subs(P, candidate)
@@ -71,7 +88,7 @@ def Tax(demand_eq, supply_eq, tax, On_Whom='P'):
     elif On_Whom == 'C':  # Consumer tax
         Ps = sp.Symbol('Ps', real=True)
         eq_tax = sp.Eq(Qd_expr.subs(P, Ps + tax), Qs_expr.subs(P, Ps))
-        sol_tax = sp.solve(eq_tax, Ps)
+        sol_tax = market.solution(f"consumer tax {tax}", lambda: sp.solve(eq_tax, Ps))
         Ps_new = None
         for candidate in sol_tax:
             Q_candidate = Qd_expr.subs(P, candidate + tax)
@@ -87,7 +104,7 @@ def Tax(demand_eq, supply_eq, tax, On_Whom='P'):
         On_Whom = 'P'
         Pb = sp.Symbol('Pb', real=True)
         eq_tax = sp.Eq(Qd_expr.subs(P, Pb), Qs_expr.subs(P, Pb - tax))
-        sol_tax = sp.solve(eq_tax, Pb)
+        sol_tax = market.solution(f"producer tax {tax}", lambda: sp.solve(eq_tax, Pb))
         Pb_new = None
         for candidate in sol_tax:
             Q_candidate = Qd_expr.subs(P, candidate)
@@ -111,54 +128,101 @@ def Tax(demand_eq, supply_eq, tax, On_Whom='P'):
     buyer_paying_more_by = buyer_price_after - P0
     seller_receiving_less_by = P0 - seller_price_after
     
-    # Tax revenue
-    tax_revenue = tax * Q_new
+    # Tax revenue: the gap between the two prices on every unit sold
+    tax_revenue = (buyer_price_after - seller_price_after) * Q_new if mode == 'ad valorem' else tax * Q_new
     
     # Calculate CS, PS, and DWL
-    Q = sp.Symbol('Q', real=True)
-    
-    # Inverse demand: solve Q = Qd_expr for P
-    Pd_solutions = sp.solve(sp.Eq(Q, Qd_expr), P)
-    Pd_func = None
-    for sol in Pd_solutions:
-        if sol.is_real or sol.is_real is None:
-            Pd_func = sol
-            break
-    if Pd_func is None:
-        Pd_func = Pd_solutions[0]
-    
-    # Inverse supply: solve Q = Qs_expr for P
-    Ps_solutions = sp.solve(sp.Eq(Q, Qs_expr), P)
-    Ps_func = None
-    for sol in Ps_solutions:
-        if sol.is_real or sol.is_real is None:
-            Ps_func = sol
-            break
-    if Ps_func is None:
-        Ps_func = Ps_solutions[0]
-    
-    # Before tax:
-    CS_before = sp.integrate(Pd_func, (Q, 0, Q0)) - P0*Q0
-    PS_before = P0*Q0 - sp.integrate(Ps_func, (Q, 0, Q0))
-    TS_before = CS_before + PS_before  # No government revenue before tax
+    # Before tax (CS = ∫0 to Q0 Pd(Q') dQ' - P0*Q0, PS = P0*Q0 - ∫0 to Q0 Ps(Q') dQ'):
+    TS_before = market.TS0  # No government revenue before tax
     
     # After tax:
-    CS_after = sp.integrate(Pd_func, (Q, 0, Q_new)) - buyer_price_after*Q_new
-    PS_after = seller_price_after*Q_new - sp.integrate(Ps_func, (Q, 0, Q_new))
+    CS_after = market.demand_area(Q_new) - buyer_price_after*Q_new
+    PS_after = seller_price_after*Q_new - market.supply_area(Q_new)
     # Total surplus after tax includes government revenue:
     TS_after = CS_after + PS_after + tax_revenue
     
     # Deadweight loss = TS_before - TS_after
     DWL = TS_before - TS_after
-    
+
+    # Derivatives of every field with respect to the tax and to each coefficient of the curves
+    # (market.coefficients, e.g. 'demand P'), by implicit differentiation at the solved points
+    # instead of solving again at tax ± ε. For a per-unit tax, d buyer_price / d tax is the
+    # buyers' share of the tax.
+    derivatives = None
+    if sensitivities:
+        multiplier, addition, d_multiplier, d_addition = wedge('tax', tax, mode)
+        try:
+            after = market.sensitivities(buyer_price_after, seller_price_after, Q_new,
+                                         multiplier, d_multiplier * float(buyer_price_after) + d_addition)
+            before = market.sensitivities(P0, P0, Q0)
+        except ValueError as error:
+            return str(error)
+        derivatives = {}
+        gap = float(buyer_price_after - seller_price_after)
+        for variable, d in after.items():
+            # The no-tax equilibrium does not move with the tax
+            d0 = dict.fromkeys(d, 0.0) if variable == 'rate' else before[variable]
+            d_revenue = (d['buyer_price'] - d['seller_price']) * float(Q_new) + gap * d['quantity']
+            derivatives['tax' if variable == 'rate' else variable] = {
+                'equilibrium_price': d0['buyer_price'],
+                'equilibrium_quantity': d0['quantity'],
+                'buyer_price': d['buyer_price'],
+                'buyer_pays_more_by': d['buyer_price'] - d0['buyer_price'],
+                'seller_price': d['seller_price'],
+                'seller_receives_less_by': d0['seller_price'] - d['seller_price'],
+                'quantity': d['quantity'],
+                'tax_revenue': d_revenue,
+                'DWL': (d0['consumer_surplus'] + d0['producer_surplus']) - (d['consumer_surplus'] + d['producer_surplus'] + d_revenue),
+                'consumer_surplus': d['consumer_surplus'],
+                'producer_surplus': d['producer_surplus'],
+            }
+
+    return TaxResult(
+        equilibrium_price=float(P0),
+        equilibrium_quantity=float(Q0),
+        buyer_price=float(buyer_price_after),
+        buyer_pays_more_by=float(buyer_paying_more_by),
+        seller_price=float(seller_price_after),
+        seller_receives_less_by=float(seller_receiving_less_by),
+        quantity=float(Q_new),
+        tax_revenue=float(tax_revenue),
+        DWL=float(DWL),
+        consumer_surplus=float(CS_after),
+        producer_surplus=float(PS_after),
+        sensitivities=derivatives,
+    )
+
+def tax_schedule(market, taxes, mode):
+    # One row per tax, every tax solved at once by Market.wedge_schedule (numerically, so a
+    # schedule costs no symbolic solve per rate)
+    taxes = np.atleast_1d(np.asarray(taxes, dtype=float)).ravel()
+    multiplier, addition, d_multiplier, d_addition = wedge('tax', taxes, mode)
+    Pb, Ps, Q, CS, PS = market.wedge_schedule(multiplier, addition)
+    revenue = (Pb - Ps) * Q
+    return pd.DataFrame({
+        'Tax': taxes,
+        'Buyer Price': Pb,
+        'Seller Price': Ps,
+        'Quantity': Q,
+        'Tax Revenue': revenue,
+        'Consumer Surplus': CS,
+        'Producer Surplus': PS,
+        'DWL': float(market.TS0) - (CS + PS + revenue),
+    })
+
+def format_tax(result):
+    # Messages for invalid input and schedules are passed through as they are
+    if not isinstance(result, TaxResult):
+        return result
+
     # Build the output
-    result = []
-    result.append(f"Market equilibrium price: {float(P0):.2f}, Quantity: {float(Q0):.2f}")
-    result.append(f"After tax buyers pay: {float(buyer_price_after):.2f} (more by {float(buyer_paying_more_by):.2f})")
-    result.append(f"After tax sellers make: {float(seller_price_after):.2f} (less by {float(seller_receiving_less_by):.2f})")
-    result.append(f"Tax Revenue: {float(tax_revenue):.2f}, DWL: {float(DWL):.2f}")
-    result.append(f"After Tax Consumer Surplus: {float(CS_after):.2f}, Producer Surplus: {float(PS_after):.2f}")
-    
-    return "\n".join(result)
+    output = []
+    output.append(f"Market equilibrium price: {result.equilibrium_price:.2f}, Quantity: {result.equilibrium_quantity:.2f}")
+    output.append(f"After tax buyers pay: {result.buyer_price:.2f} (more by {result.buyer_pays_more_by:.2f})")
+    output.append(f"After tax sellers make: {result.seller_price:.2f} (less by {result.seller_receives_less_by:.2f})")
+    output.append(f"Tax Revenue: {result.tax_revenue:.2f}, DWL: {result.DWL:.2f}")
+    output.append(f"After Tax Consumer Surplus: {result.consumer_surplus:.2f}, Producer Surplus: {result.producer_surplus:.2f}")
+
+    return "\n".join(output)
 
-Tax(arg1, arg2, arg3, arg4)
\ No newline at end of file
+format_tax(remember(Tax, arg1, arg2, arg3, arg4))
\ No newline at end of file
@@ -1,58 +1,73 @@
-from sympy import symbols, sympify, solve, Eq
-import re
-
-def preprocess_equation(eq_str):
-    eq_str = eq_str.replace(" ", "")
-    lhs, rhs = eq_str.split('=')
-    rhs = rhs.strip()
-    
-    # Insert '*' between a number and 'P'
-    rhs = re.sub(r'(\d)(P)', r'\1*\2', rhs)
-    # Insert '*' between number and '('
-    rhs = re.sub(r'(\d)\(', r'\1*(', rhs)
-    # Insert '*' if we have P(
-    rhs = re.sub(r'(P)\(', r'\1*(', rhs)
-
-    return lhs.strip(), rhs
-
-def is_linear(expr, var):
-    # Check linearity by examining the second derivative:
-    return expr.diff(var, 2) == 0
-
-def CalculateTax(demand_eq: str, supply_eq: str, decrease_Q=None, max_DWL=None, desired_Revenue=None):
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+# Requires the Market.py cell (get_market) to run first
+
+class CalculateTaxResult(NamedTuple):
+    # Raw numbers behind the CalculateTax output; format_calculate_tax turns them into the Excel text.
+    # A tax that was not asked for is None; one that was asked for but has no solution is NaN,
+    # with the reason in unsolved (keyed by field name).
+    equilibrium_price: float
+    equilibrium_quantity: float
+    decrease_Q: float
+    tax_to_decrease_Q: float
+    tax_for_DWL: float
+    tax_for_revenue: float
+    unsolved: dict
+
+def CalculateTax(demand_eq: str, supply_eq: str, decrease_Q=None, max_DWL=None, desired_Revenue=None, mode='unit'):
+    # mode='ad valorem' looks for a tax that is a share of the price (sellers keep P / (1 + t))
+    # instead of a tax per unit (sellers keep P - t)
     if demand_eq is None or supply_eq is None:
         return ""
     
+    # Imported on use: loading the cell should not import sympy
+    from sympy import symbols, solve, Eq
+
     P, t = symbols('P t', real=True)
     
-    def parse_equation(eq_str):
-        lhs, rhs = preprocess_equation(eq_str)
-        return sympify(rhs, {"P": P})
-    
-    D = parse_equation(demand_eq)  # Q_d(P)
-    S = parse_equation(supply_eq)  # Q_s(P)
+    # Parsed curves and the no-tax equilibrium come from the shared Market (Market.py)
+    market = get_market(demand_eq, supply_eq)
+    D = market.Qd_expr  # Q_d(P)
+    S = market.Qs_expr  # Q_s(P)
     
     # Find no-tax equilibrium:
-    eq = Eq(D, S)
-    sol = solve(eq, P)
-    if not sol:
+    try:
+        P0, Q0 = market.equilibrium
+    except ValueError:
         if decrease_Q is None and max_DWL is None and desired_Revenue is None:
             return ""
         return "No equilibrium found."
 
-    P0 = sol[0]
-    Q0 = D.subs(P, P0)
-
-    P0_f = P0.evalf()
-    Q0_f = Q0.evalf()
-    P0_f = round(P0_f, 2)
-    Q0_f = round(Q0_f, 2)
+    # If all three are None, return empty
+    if decrease_Q is None and max_DWL is None and desired_Revenue is None:
+        return ""
 
-    results = []
-    results.append(f"Market Equilibrium Price: {P0_f} and Quantity: {Q0_f}")
+    try:
+        mode = wedge_mode(mode)
+    except ValueError as error:
+        return str(error)
+
+    # The price sellers keep when buyers pay P, and the names the solutions are kept under
+    if mode == 'ad valorem':
+        def seller_price(price):
+            return price / (1 + t)
+        prefix = "ad valorem "
+        price_of_tax = market.ad_valorem_tax_price
+    else:
+        def seller_price(price):
+            return price - t
+        prefix = ""
+        price_of_tax = market.tax_price
+
+    tax_to_decrease_Q = None
+    tax_for_DWL = None
+    tax_for_revenue = None
+    unsolved = {}
     
     # Equilibrium with tax:
     # With a tax t on suppliers, they receive (P - t). Thus equilibrium: D(P) = S(P - t).
+    # (P / (1 + t) for an ad valorem tax, through seller_price below)
     def equilibrium_with_tax(tax):
         eq_tax = Eq(D, S.subs(P, P - tax))
         sol_tax = solve(eq_tax, P)
@@ -62,7 +77,7 @@ def CalculateTax(demand_eq: str, supply_eq: str, decrease_Q=None, max_DWL=None,
         Q_star = D.subs(P, P_star)  # or S(P_star - t), same at equilibrium
         return P_star, Q_star
 
-    linear_market = is_linear(D, P) and is_linear(S, P)
+    linear_market = market.is_linear
     
     # If decrease_Q is given:
     # We want an equilibrium quantity Q* = Q0 - decrease_Q
@@ -70,33 +85,34 @@ def CalculateTax(demand_eq: str, supply_eq: str, decrease_Q=None, max_DWL=None,
     # 1) D(P) = S(P - t) at equilibrium
     # 2) S(P - t) = Q0 - decrease_Q (the new equilibrium quantity)
     if decrease_Q is not None:
-        eq1 = Eq(D, S.subs(P, P - t))
-        eq2 = Eq(S.subs(P, P - t), Q0 - decrease_Q)
-        sol_decrease = solve((eq1, eq2), (P, t), dict=True)
+        eq1 = Eq(D, S.subs(P, seller_price(P)))
+        eq2 = Eq(S.subs(P, seller_price(P)), Q0 - decrease_Q)
+        sol_decrease = market.solution(f"{prefix}tax to decrease Q {decrease_Q}", lambda: solve((eq1, eq2), (P, t), dict=True))
         if sol_decrease:
             t_decrease = sol_decrease[0][t]
-            t_decrease_f = t_decrease.evalf()
-            t_decrease_f = round(t_decrease_f, 2)
-            results.append(f"Tax to decrease Q by {decrease_Q}: {t_decrease_f}")
+            tax_to_decrease_Q = float(t_decrease.evalf())
         else:
-            results.append(f"Tax to decrease Q by {decrease_Q}: No solution found")
+            tax_to_decrease_Q = float('nan')
+            unsolved['tax_to_decrease_Q'] = "No solution found"
 
     # If max_DWL is given and market is linear:
-    # DWL for a tax in a linear market: DWL = 0.5 * (Q0 - Q_tax) * t
+    # DWL for a tax in a linear market: DWL = 0.5 * (Q0 - Q_tax) * (P_tax - seller price), that is
+    # 0.5 * (Q0 - Q_tax) * t for a per-unit tax
     if max_DWL is not None:
+        tax_for_DWL = float('nan')
         if not linear_market:
-            results.append("Tax to maximize DWL: Not applicable for non-linear market")
+            unsolved['tax_for_DWL'] = "Not applicable for non-linear market"
         else:
             # Solve equilibrium with tax:
             # From D(P)=S(P-t), solve for P:
-            P_tax_sol = solve(Eq(D, S.subs(P, P - t)), P)
-            if P_tax_sol:
-                P_tax_expr = P_tax_sol[0]
+            # Equilibrium price as a function of the tax, solved once per market
+            P_tax_expr = price_of_tax[0]
+            if P_tax_expr is not None:
                 Q_tax_expr = D.subs(P, P_tax_expr)
 
                 # DWL = 0.5*(Q0 - Q_tax)*t
-                dwl_eq = Eq(0.5*(Q0 - Q_tax_expr)*t, max_DWL)
-                sol_dwl = solve(dwl_eq, t)
+                dwl_eq = Eq(0.5*(Q0 - Q_tax_expr)*(P_tax_expr - seller_price(P_tax_expr)), max_DWL)
+                sol_dwl = market.solution(f"{prefix}tax for DWL {max_DWL}", lambda: solve(dwl_eq, t))
                 if sol_dwl:
                     t_candidates = [x for x in sol_dwl if x.is_real]
                     if t_candidates:
@@ -109,26 +125,25 @@ def CalculateTax(demand_eq: str, supply_eq: str, decrease_Q=None, max_DWL=None,
                         if t_choice is None:
                             t_choice = t_candidates[0]
 
-                        t_choice_f = t_choice.evalf()
-                        t_choice_f = round(t_choice_f, 2)
-                        results.append(f"Tax to maximize DWL: {t_choice_f}")
+                        tax_for_DWL = float(t_choice.evalf())
                     else:
-                        results.append("Tax to maximize DWL: No real solution found")
+                        unsolved['tax_for_DWL'] = "No real solution found"
                 else:
-                    results.append("Tax to maximize DWL: No solution found")
+                    unsolved['tax_for_DWL'] = "No solution found"
             else:
-                results.append("Tax to maximize DWL: Could not solve equilibrium with tax")
+                unsolved['tax_for_DWL'] = "Could not solve equilibrium with tax"
 
     # If desired_Revenue is given:
-    # Tax revenue = t * Q_tax
+    # Tax revenue = t * Q_tax (the price gap times Q_tax for an ad valorem tax)
     # Q_tax = from equilibrium: Q_tax = D(P_tax) = S(P_tax - t)
     if desired_Revenue is not None:
-        P_tax_sol = solve(Eq(D, S.subs(P, P - t)), P)
-        if P_tax_sol:
-            P_tax_expr = P_tax_sol[0]
+        tax_for_revenue = float('nan')
+        # Equilibrium price as a function of the tax, solved once per market
+        P_tax_expr = price_of_tax[0]
+        if P_tax_expr is not None:
             Q_tax_expr = D.subs(P, P_tax_expr)
-            revenue_eq = Eq(t*Q_tax_expr, desired_Revenue)
-            sol_revenue = solve(revenue_eq, t)
+            revenue_eq = Eq((P_tax_expr - seller_price(P_tax_expr))*Q_tax_expr, desired_Revenue)
+            sol_revenue = market.solution(f"{prefix}tax for revenue {desired_Revenue}", lambda: solve(revenue_eq, t))
             if sol_revenue:
                 t_candidates = [x for x in sol_revenue if x.is_real]
                 if t_candidates:
@@ -141,20 +156,50 @@ def CalculateTax(demand_eq: str, supply_eq: str, decrease_Q=None, max_DWL=None,
                     if t_choice is None:
                         t_choice = t_candidates[0]
 
-                    t_choice_f = t_choice.evalf()
-                    t_choice_f = round(t_choice_f, 2)
-                    results.append(f"Tax to maximize Revenue: {t_choice_f}")
+                    tax_for_revenue = float(t_choice.evalf())
                 else:
-                    results.append("Tax to maximize Revenue: No real solution found")
+                    unsolved['tax_for_revenue'] = "No real solution found"
             else:
-                results.append("Tax to maximize Revenue: No solution found")
+                unsolved['tax_for_revenue'] = "No solution found"
         else:
-            results.append("Tax to maximize Revenue: Could not solve equilibrium with tax")
+            unsolved['tax_for_revenue'] = "Could not solve equilibrium with tax"
+
+    return CalculateTaxResult(
+        equilibrium_price=float(P0),
+        equilibrium_quantity=float(Q0),
+        decrease_Q=decrease_Q,
+        tax_to_decrease_Q=tax_to_decrease_Q,
+        tax_for_DWL=tax_for_DWL,
+        tax_for_revenue=tax_for_revenue,
+        unsolved=unsolved,
+    )
+
+def format_calculate_tax(result):
+    # "" and "No equilibrium found." are passed through as they are
+    if not isinstance(result, CalculateTaxResult):
+        return result
+
+    from sympy import Float
+
+    def number(value):
+        # As the cell always printed it: sympy's Float rounded to 2 places, so a whole number
+        # shows as 30.0000000000000 and 12.345 as 12.35; an exact 0 as 0
+        return "0" if value == 0 else str(round(Float(value), 2))
+
+    def line(label, field):
+        if field in result.unsolved:
+            return f"{label}: {result.unsolved[field]}"
+        return f"{label}: {number(getattr(result, field))}"
 
-    # If all three are None, return empty
-    if decrease_Q is None and max_DWL is None and desired_Revenue is None:
-        return ""
+    results = []
+    results.append(f"Market Equilibrium Price: {number(result.equilibrium_price)} and Quantity: {number(result.equilibrium_quantity)}")
+    if result.tax_to_decrease_Q is not None:
+        results.append(line(f"Tax to decrease Q by {result.decrease_Q}", 'tax_to_decrease_Q'))
+    if result.tax_for_DWL is not None:
+        results.append(line("Tax to maximize DWL", 'tax_for_DWL'))
+    if result.tax_for_revenue is not None:
+        results.append(line("Tax to maximize Revenue", 'tax_for_revenue'))
 
     return "\n".join(results)
 
-CalculateTax(arg1, arg2, arg3, arg4, arg5)
\ No newline at end of file
+format_calculate_tax(remember(CalculateTax, arg1, arg2, arg3, arg4, arg5))
\ No newline at end of file
@@ -1,4 +1,15 @@
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class PriceControlResult(NamedTuple):
+    # Quantity transacted under each control that was given (None when it was not);
+    # format_price_control turns them into the Excel text
+    price_ceiling: float
+    ceiling_quantity: float
+    price_floor: float
+    floor_quantity: float
 
 def PriceControl(price_ceiling=None, price_floor=None, df=None):
     if df is None:
@@ -21,8 +32,8 @@ def PriceControl(price_ceiling=None, price_floor=None, df=None):
     if not required_columns.issubset(df.columns):
         return ""
     
-    ceiling_result = None
-    floor_result = None
+    ceiling_quantity = None
+    floor_quantity = None
 
     # Handle price ceiling and floor being zero
     if price_ceiling == 0:
@@ -47,10 +58,10 @@ def PriceControl(price_ceiling=None, price_floor=None, df=None):
                 equilibrium_quantity = equilibrium_row.iloc[0]['Quantity Demanded']
                 if price_ceiling >= equilibrium_price:
                     quantity_transacted = equilibrium_quantity
-            ceiling_result = f"At Price Ceiling: {price_ceiling}, Quantity Transacted: {quantity_transacted}"
+            ceiling_quantity = quantity_transacted
         else:
             # If ceiling is below all prices, no transaction occurs
-            ceiling_result = f"At Price Ceiling: {price_ceiling}, Quantity Transacted: 0"
+            ceiling_quantity = 0
 
     # Handle price floor
     if price_floor is not None:
@@ -66,20 +77,24 @@ def PriceControl(price_ceiling=None, price_floor=None, df=None):
                 equilibrium_quantity = equilibrium_row.iloc[0]['Quantity Demanded']
                 if price_floor <= equilibrium_price:
                     quantity_transacted = equilibrium_quantity
-            floor_result = f"Price Floor: {price_floor}, Quantity Transacted: {quantity_transacted}"
+            floor_quantity = quantity_transacted
         else:
             # If floor is above all prices, no transaction occurs
-            floor_result = f"Price Floor: {price_floor}, Quantity Transacted: 0"
+            floor_quantity = 0
+
+    return PriceControlResult(price_ceiling, ceiling_quantity, price_floor, floor_quantity)
+
+def format_price_control(result):
+    if not isinstance(result, PriceControlResult):
+        return result
 
     results = []
-    if ceiling_result:
-        results.append(ceiling_result)
-    if floor_result:
-        results.append(floor_result)
+    if result.price_ceiling is not None:
+        results.append(f"At Price Ceiling: {result.price_ceiling}, Quantity Transacted: {result.ceiling_quantity}")
+    if result.price_floor is not None:
+        results.append(f"Price Floor: {result.price_floor}, Quantity Transacted: {result.floor_quantity}")
 
     # Convert results to string
-    results = " | ".join(results)
-
-    return results
+    return " | ".join(results)
 
-PriceControl(arg1, arg2, arg3)
\ No newline at end of file
+format_price_control(remember(PriceControl, arg1, arg2, arg3))
\ No newline at end of file
@@ -1,4 +1,14 @@
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class SubsidyDiscreteResult(NamedTuple):
+    # Equilibrium under the subsidy, as read from the table; format_subsidy_discrete gives the Excel text
+    consumer_price: float
+    producer_price: float
+    units_transacted: float
+    gov_subsidy: float
 
 def SubsidyDiscrete(subsidy, df):
 
@@ -47,12 +57,18 @@ def SubsidyDiscrete(subsidy, df):
                 units_transacted = quantity_demanded
                 gov_subsidy = units_transacted * subsidy
 
-                return (f"Price paid by consumer: {price_consumer}, "
-                        f"Price received by producer: {price_producer}, "
-                        f"Units transacted: {units_transacted}, "
-                        f"Gov Subsidy Expense: {gov_subsidy}")
+                return SubsidyDiscreteResult(price_consumer, price_producer, units_transacted, gov_subsidy)
 
     return ""
 
+def format_subsidy_discrete(result):
+    if not isinstance(result, SubsidyDiscreteResult):
+        return result
+
+    return (f"Price paid by consumer: {result.consumer_price}, "
+            f"Price received by producer: {result.producer_price}, "
+            f"Units transacted: {result.units_transacted}, "
+            f"Gov Subsidy Expense: {result.gov_subsidy}")
+
 
-SubsidyDiscrete(arg1, arg2)
\ No newline at end of file
+format_subsidy_discrete(remember(SubsidyDiscrete, arg1, arg2))
\ No newline at end of file
@@ -1,4 +1,14 @@
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class TaxDiscreteResult(NamedTuple):
+    # Equilibrium under the tax, as read from the table; format_tax_discrete gives the Excel text
+    consumer_price: float
+    producer_price: float
+    units_transacted: float
+    gov_revenue: float
 
 def TaxDiscrete(tax, df):
 
@@ -29,11 +39,17 @@ def TaxDiscrete(tax, df):
             units_transacted = quantity_demanded
             gov_revenue = units_transacted * tax
 
-            return (f"Price paid by consumer: {price_consumer}, "
-                    f"Price received by producer: {price_producer}, "
-                    f"Units transacted: {units_transacted}, "
-                    f"Gov Revenue: {gov_revenue}")
+            return TaxDiscreteResult(price_consumer, price_producer, units_transacted, gov_revenue)
 
     return ""
 
-TaxDiscrete(arg1, arg2)
\ No newline at end of file
+def format_tax_discrete(result):
+    if not isinstance(result, TaxDiscreteResult):
+        return result
+
+    return (f"Price paid by consumer: {result.consumer_price}, "
+            f"Price received by producer: {result.producer_price}, "
+            f"Units transacted: {result.units_transacted}, "
+            f"Gov Revenue: {result.gov_revenue}")
+
+format_tax_discrete(remember(TaxDiscrete, arg1, arg2))
\ No newline at end of file
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+# Synthetic inputs for every Excel entry point.
+# make(n) builds the arguments for input size n (rows of the table, customers, firms,
+# processes, guarantee prices or simulated paths). Tables are built the way xl() hands them
+# to the scripts: an object DataFrame whose first row holds the headers.
+
+SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+
+class Case:
+    def __init__(self, name, script, function, make, sizes=SIZES, libraries=(), reset=None):
+        self.name = name
+        self.script = script
+        self.function = function
+        self.make = make
+        self.sizes = sizes
+        # Library cells that must run before the script (Market.py, Workforce.py)
+        self.libraries = libraries
+        # Called before every timed run, e.g. to empty get_market's cache
+        self.reset = reset
+
+def excel_table(header, columns):
+    # Header row on top, values below, all in one object array like an Excel range
+    values = np.empty((len(columns[0]) + 1, len(header)), dtype=object)
+    values[0] = header
+    for j, column in enumerate(columns):
+        values[1:, j] = column.tolist() if isinstance(column, np.ndarray) else column
+    return pd.DataFrame(values)
+
+def rng():
+    return np.random.default_rng(1210)
+
+# chapter_1
+
+def production_table(n, lines=3):
+    # Cumulative output of each line for 1..n workers, with diminishing marginal products
+    marginal = np.sort(rng().integers(1, 10 * n + 1, size=(n, lines)), axis=0)[::-1]
+    output = np.cumsum(marginal, axis=0)
+    header = ['Number of Workers'] + [f"Line {chr(65 + j)}" for j in range(lines)]
+    return excel_table(header, [np.arange(1, n + 1)] + [output[:, j] for j in range(lines)]), output
+
+def allocate_maximize_output(n):
+    table, _ = production_table(n)
+    return (n, table, None)
+
+def allocate_maximize_output_at_least(n):
+    table, output = production_table(n)
+    return (n, table, int(output[-1].sum() // 2))
+
+def allocate_minimize_cost(n, workers=3):
+    # Cumulative cost of 1..n hours per worker, with rising marginal costs
+    marginal = np.sort(rng().integers(1, 10 * n + 1, size=(n, workers)), axis=0)
+    cost = np.cumsum(marginal, axis=0)
+    header = ['Number of Hours'] + [f"Worker {j + 1}" for j in range(workers)]
+    table = excel_table(header, [np.arange(1, n + 1)] + [cost[:, j] for j in range(workers)])
+    return (n, table, int(np.median(marginal)))
+
+# Productivity
+
+def people_table(n, goods=('Hat', 'Scarf')):
+    # Minutes per item (or items per hour) for each person
+    values = rng().integers(1, 61, size=(n, len(goods))).astype(float)
+    return excel_table(['Person'] + list(goods), [[f"P{i}" for i in range(n)]] + [values[:, j] for j in range(len(goods))]), values
+
+def production_via_oc(n):
+    table, _ = people_table(n)
+    return (480, n // 2, 'Hat', table)
+
+def production_via_oc_alt(n):
+    # CalculateProduction_via_oc_alt reads the 'hat' and 'tie' columns by name
+    table, _ = people_table(n, ('hat', 'tie'))
+    return (8, n // 2, 'hat', table)
+
+def production_via_item_count(n):
+    table, minutes = people_table(n)
+    return (480, 'Hat', float((480 / minutes[:, 0]).sum() / 2), table)
+
+def frontier(n):
+    table, _ = people_table(n)
+    return (480, 'Hat', table)
+
+def assign(n):
+    table, _ = people_table(n, ('Hat', 'Scarf', 'Glove'))
+    return (480, table, None, None)
+
+# TaxSubsidyPriceCeilingFloorDISCRETE
+
+def schedule(n):
+    # Prices 1..n with Qd = n - P and Qs = P, so every policy below has an exact row match
+    n = n + n % 2
+    prices = np.arange(1, n + 1)
+    return n, excel_table(['Price', 'Quantity Demanded', 'Quantity Supplied'], [prices, n - prices, prices])
+
+def price_control(n):
+    n, table = schedule(n)
+    return (n // 4, 3 * n // 4, table)
+
+def tax_discrete(n):
+    _, table = schedule(n)
+    return (2, table)
+
+def subsidy_discrete(n):
+    _, table = schedule(n)
+    return (2, table)
+
+# PriceDiscrimination
+
+def wtp_table(n):
+    wtp = rng().integers(1, 10 * n + 1, size=n)
+    return excel_table(['Customer', 'WTP'], [np.arange(1, n + 1), wtp]), wtp
+
+def price_discrimination(n):
+    table, wtp = wtp_table(n)
+    return (table, float(np.mean(wtp)) / 4, 0, None)
+
+def price_discrimination_coupon(n):
+    table, wtp = wtp_table(n)
+    return (table, float(np.mean(wtp)) / 4, 0, float(np.median(wtp)))
+
+def perfect_price_discrimination(n):
+    table, wtp = wtp_table(n)
+    return (table, float(np.mean(wtp)) / 4, 0, float(np.median(wtp)))
+
+def combo(n):
+    wtp = rng().integers(0, 10 * n + 1, size=(n, 2))
+    table = excel_table(['Customer', 'Book', 'Movie'], [np.arange(1, n + 1), wtp[:, 0], wtp[:, 1]])
+    return (table, 0, float(np.mean(wtp)) / 4, 0)
+
+# Externalities
+
+def negotiation(n):
+    values = rng().integers(0, 1000, size=(2, n))
+    header = [''] + [f"Process {j + 1}" for j in range(n)]
+    columns = [['Beneficiary', 'Affected']] + [values[:, j] for j in range(n)]
+    return (excel_table(header, columns), 10, 10)
+
+def pollution(n):
+    generator = rng()
+    a = generator.integers(100, 1000, size=n)
+    b = generator.integers(1, 50, size=n) / 10
+    initial = generator.integers(100, 1000, size=n)
+    equations = [f"MC = {a_i} + {b_i}x" for a_i, b_i in zip(a, b)]
+    table = excel_table(['Firm', 'Initial', 'MC Equation', 'permits'], [[f"Firm {i}" for i in range(n)], initial, equations, initial // 2])
+    return (table, True, 0)
+
+# TaxSubsidyPriceCeilingFloorContinous: one market, so size 1 is a cold solve of it
+
+DEMAND = "Q = 500 - 2P"
+SUPPLY = "Q = 3P^2"
+
+def clear_markets(namespace):
+    namespace['get_market'].cache_clear()
+
+def guarantee_symbolic(n):
+    # The symbolic path needs inverse curves sympy can confirm are real
+    return ("Q = 3040 - 25P", "Q = 1.8 + 9P", 100, 5)
+
+def guarantee_sweep(n):
+    return (DEMAND, SUPPLY, np.linspace(13, 200, n), 5)
+
+def guarantee_simulation(n):
+    return (DEMAND, SUPPLY, 14, 5, 10, n)
+
+MARKET = ('TaxSubsidyPriceCeilingFloorContinous/Market.py',)
+CONTINUOUS = 'TaxSubsidyPriceCeilingFloorContinous/'
+
+CASES = [
+    Case('AllocateMaximizeOutput', 'chapter_1/AllocateMaximizeOutput.py', 'AllocateMaximizeOutput', allocate_maximize_output),
+    Case('AllocateMaximizeOutput[ProduceAtleast]', 'chapter_1/AllocateMaximizeOutput.py', 'AllocateMaximizeOutput', allocate_maximize_output_at_least),
+    Case('AllocateMinimizeCost', 'chapter_1/AllocateMinimizeCost.py', 'AllocateMinimizeCost', allocate_minimize_cost),
+    Case('calculate_production[oc]', 'Productivity/CalculateProduction_via_oc.py', 'calculate_production', production_via_oc),
+    Case('calculate_total_production', 'Productivity/CalculateProduction_via_oc_alt.py', 'calculate_total_production', production_via_oc_alt),
+    Case('calculate_production[item_count]', 'Productivity/Calculate_production_via_item_count.py', 'calculate_production', production_via_item_count),
+    Case('production_frontier', 'Productivity/ProductionFrontier.py', 'production_frontier', frontier),
+    Case('assign_production', 'Productivity/AssignProduction.py', 'assign_production', assign),
+    Case('PriceControl', 'TaxSubsidyPriceCeilingFloorDISCRETE/price_control_discrete.py', 'PriceControl', price_control),
+    Case('TaxDiscrete', 'TaxSubsidyPriceCeilingFloorDISCRETE/tax_discrete.py', 'TaxDiscrete', tax_discrete),
+    Case('SubsidyDiscrete', 'TaxSubsidyPriceCeilingFloorDISCRETE/subsidy_discrete.py', 'SubsidyDiscrete', subsidy_discrete),
+    Case('PriceDiscrimination', 'PriceDiscrimination/NonPerfectPriceDiscrimination.py', 'PriceDiscrimination', price_discrimination),
+    Case('PriceDiscrimination[coupon]', 'PriceDiscrimination/NonPerfectPriceDiscrimination.py', 'PriceDiscrimination', price_discrimination_coupon),
+    Case('PerfectPriceDiscrimination', 'PriceDiscrimination/PerfectPriceDiscrimination.py', 'PerfectPriceDiscrimination', perfect_price_discrimination),
+    Case('compute_profit_details', 'PriceDiscrimination/combo.py', 'compute_profit_details', combo),
+    Case('Negotiation', 'Externalities/Negotiation.py', 'Negotiation', negotiation),
+    Case('calculate_equilibrium', 'Externalities/pollution.py', 'calculate_equilibrium', pollution),
+    Case('Tax', CONTINUOUS + 'TaxKnown.py', 'Tax', lambda n: (DEMAND, SUPPLY, 5, 'P'), (1,), MARKET, clear_markets),
+    Case('Subsidy', CONTINUOUS + 'SubsidyKnown.py', 'Subsidy', lambda n: (DEMAND, SUPPLY, 5, 'C'), (1,), MARKET, clear_markets),
+    Case('CalculateTax', CONTINUOUS + 'TaxUnknown.py', 'CalculateTax', lambda n: (DEMAND, SUPPLY, 10, None, 1000), (1,), MARKET, clear_markets),
+    Case('CalculateSubsidy', CONTINUOUS + 'SubsidyUnknown.py', 'CalculateSubsidy', lambda n: (DEMAND, SUPPLY, 10, None, 1000), (1,), MARKET, clear_markets),
+    Case('PriceGuarantee[symbolic]', CONTINUOUS + 'PriceGuarantee.py', 'PriceGuaranteeSymbolic', guarantee_symbolic, (1,), MARKET, clear_markets),
+    Case('PriceGuarantee', CONTINUOUS + 'PriceGuarantee.py', 'PriceGuarantee', guarantee_sweep, libraries=MARKET, reset=clear_markets),
+    Case('PriceGuaranteeSimulation', CONTINUOUS + 'PriceGuaranteeSimulation.py', 'PriceGuaranteeSimulation', guarantee_simulation, libraries=MARKET, reset=clear_markets),
+]
@@ -0,0 +1,128 @@
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.integrate import quad
+from scipy.optimize import brentq
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from econ1210 import memo
+
+# Surplus checks for the continuous calculators on nonlinear markets.
+#   python benchmarks/check.py            exit status 1 if any output is off
+# The references do not use Market.py: the inverse curves are found by brentq on plain Python
+# curves, within the price range where each curve is the economic one, and the surplus integrals
+# by quad. A calculator integrating the wrong branch of an inverted curve (the negative root of
+# "Q = 3P^2") fails here.
+
+TOLERANCE = 1e-6
+
+class Reference:
+    def __init__(self, demand_eq, supply_eq, demand, supply, demand_prices, supply_prices):
+        self.demand_eq, self.supply_eq = demand_eq, supply_eq
+        self.demand, self.supply = demand, supply
+        self.demand_prices, self.supply_prices = demand_prices, supply_prices
+        self.P0 = brentq(lambda P: demand(P) - supply(P), max(demand_prices[0], supply_prices[0]),
+                         min(demand_prices[1], supply_prices[1]))
+        self.Q0 = demand(self.P0)
+        self.TS0 = sum(self.surplus(self.P0, self.P0, self.Q0))
+
+    def inverse_demand(self, q):
+        return brentq(lambda P: self.demand(P) - q, *self.demand_prices)
+
+    def inverse_supply(self, q):
+        return brentq(lambda P: self.supply(P) - q, *self.supply_prices)
+
+    def surplus(self, buyer_price, seller_price, quantity):
+        # CS and PS of quantity units going to the buyers who value them most, from the cheapest sellers
+        CS = quad(self.inverse_demand, 0, quantity)[0] - buyer_price * quantity
+        PS = seller_price * quantity - quad(self.inverse_supply, 0, quantity)[0]
+        return CS, PS
+
+    def control(self, price):
+        # A ceiling or floor at price: the short side trades
+        Q = min(self.demand(price), self.supply(price))
+        CS, PS = self.surplus(price, price, Q)
+        return Q, CS, PS, self.TS0 - CS - PS
+
+    def policy(self, wedge, ceiling=np.inf, floor=-np.inf):
+        # A wedge Pb - Ps (tax less subsidy) with a ceiling or floor on the buyers' price
+        free_price = brentq(lambda P: self.demand(P) - self.supply(P - wedge), self.demand_prices[0],
+                            min(self.demand_prices[1], self.supply_prices[1] + wedge))
+        Pb = min(max(free_price, floor), ceiling)
+        Q = min(self.demand(Pb), self.supply(Pb - wedge))
+        CS, PS = self.surplus(Pb, Pb - wedge, Q)
+        return Q, CS, PS, self.TS0 - CS - PS - wedge * Q
+
+REFERENCES = [
+    Reference("Q = 500 - 2P", "Q = 3P^2", lambda P: 500 - 2 * P, lambda P: 3 * P ** 2, (0, 250), (0, 250)),
+    Reference("Q = 1000 - 0.5P^2", "Q = 4P + 10", lambda P: 1000 - 0.5 * P ** 2, lambda P: 4 * P + 10,
+              (0, np.sqrt(2000)), (-2.5, 1000)),
+]
+
+failures = []
+
+def compare(name, actual, expected):
+    for label, a, e in zip(('quantity', 'CS', 'PS', 'DWL'), actual, expected):
+        if not abs(float(a) - e) <= TOLERANCE * (1 + abs(e)):
+            failures.append(f"{name} {label}: {float(a):.6f}, expected {e:.6f}")
+
+def check_tax_and_subsidy(reference):
+    from econ1210.continuous import Subsidy, Tax
+    D, S = reference.demand_eq, reference.supply_eq
+    for tax in (2.0, 5.0):
+        result = Tax(D, S, tax, 'P')
+        CS, PS = reference.surplus(result.buyer_price, result.seller_price, result.quantity)
+        expected = (reference.demand(result.buyer_price), CS, PS, reference.TS0 - CS - PS - tax * result.quantity)
+        compare(f"Tax({D!r}, {S!r}, {tax})", (result.quantity, result.consumer_surplus, result.producer_surplus, result.DWL), expected)
+        row = Tax(D, S, [tax], 'P').iloc[0]
+        compare(f"Tax({D!r}, {S!r}, [{tax}])", (row['Quantity'], row['Consumer Surplus'], row['Producer Surplus'], row['DWL']), expected)
+    for subsidy in (2.0, 5.0):
+        result = Subsidy(D, S, subsidy, 'P')
+        CS, PS = reference.surplus(result.buyer_price, result.seller_price, result.quantity)
+        expected = (reference.demand(result.buyer_price), CS, PS, reference.TS0 - CS - PS + subsidy * result.quantity)
+        compare(f"Subsidy({D!r}, {S!r}, {subsidy})", (result.quantity, result.consumer_surplus, result.producer_surplus, result.DWL), expected)
+
+def check_price_controls(reference):
+    from econ1210.continuous import PriceControlContinuous
+    D, S = reference.demand_eq, reference.supply_eq
+    for ceiling in (0.5 * reference.P0, 0.8 * reference.P0):
+        outcome = PriceControlContinuous(D, S, ceiling, None).ceiling
+        compare(f"PriceControlContinuous({D!r}, {S!r}, ceiling={ceiling:.4f})",
+                (outcome.quantity, outcome.consumer_surplus, outcome.producer_surplus, outcome.DWL), reference.control(ceiling))
+    choke = reference.demand_prices[1]
+    for floor in (reference.P0 + 0.2 * (choke - reference.P0), reference.P0 + 0.6 * (choke - reference.P0)):
+        outcome = PriceControlContinuous(D, S, None, floor).floor
+        compare(f"PriceControlContinuous({D!r}, {S!r}, floor={floor:.4f})",
+                (outcome.quantity, outcome.consumer_surplus, outcome.producer_surplus, outcome.DWL), reference.control(floor))
+
+def check_policy_surface(reference):
+    from econ1210.continuous import PolicySurface
+    D, S = reference.demand_eq, reference.supply_eq
+    taxes = np.array([0.0, 2.0, 5.0])
+    ceilings = reference.P0 * np.array([0.6, 0.9, 1.1, 2.0])
+    result = PolicySurface(D, S, 'tax', taxes, 'ceiling', ceilings)
+    for i, tax in enumerate(taxes):
+        for j, ceiling in enumerate(ceilings):
+            compare(f"PolicySurface({D!r}, {S!r}, tax={tax}, ceiling={ceiling:.4f})",
+                    (result.quantity[i, j], result.consumer_surplus[i, j], result.producer_surplus[i, j], result.DWL[i, j]),
+                    reference.policy(tax, ceiling=ceiling))
+
+CHECKS = [check_tax_and_subsidy, check_price_controls, check_policy_surface]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the continuous calculators' surplus on nonlinear markets.")
+    parser.parse_args(argv)
+    memo.disable()
+    for reference in REFERENCES:
+        for check in CHECKS:
+            check(reference)
+    for failure in failures:
+        print(failure)
+    print(f"{len(failures)} mismatches")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
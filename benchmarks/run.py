@@ -0,0 +1,168 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cases import CASES
+from econ1210._loader import load_script
+
+# Benchmark every Excel entry point at growing input sizes.
+#   python benchmarks/run.py                        all cases, sizes 10 to 10^6, results to stdout
+#   python benchmarks/run.py -o bench.json -k Tax   only cases whose name contains "Tax"
+#   python benchmarks/run.py --compare bench.json   fail if anything got slower than that run
+# For each size the wall time is the best of --repeat runs and the peak memory is what the call
+# itself allocates (tracemalloc, measured in a separate run so it does not slow the timing).
+# A case stops growing once its next size is expected to exceed --budget seconds, so the
+# quadratic scans stop early instead of running for hours.
+
+def fresh(args):
+    # The scripts rewrite the headers of the table they are given, so each run gets a copy
+    return tuple(arg.copy() if isinstance(arg, pd.DataFrame) else arg for arg in args)
+
+def call(function, args, case, namespace):
+    if case.reset is not None:
+        case.reset(namespace)
+    # AllocateMaximizeOutput prints the head of its table
+    with contextlib.redirect_stdout(io.StringIO()):
+        function(*args)
+
+def measure(case, namespace, size, repeat):
+    function = namespace[case.function]
+    args = case.make(size)
+
+    seconds = math.inf
+    for _ in range(repeat):
+        run_args = fresh(args)
+        start = time.perf_counter()
+        call(function, run_args, case, namespace)
+        seconds = min(seconds, time.perf_counter() - start)
+        # One run is enough once a call takes a noticeable time
+        if seconds > 1:
+            break
+
+    run_args = fresh(args)
+    tracemalloc.start()
+    call(function, run_args, case, namespace)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak_bytes
+
+def scaling_exponent(sizes, seconds):
+    # Slope of log(time) against log(size) over the three largest sizes, where fixed overhead
+    # no longer dominates: 1 means linear, 2 quadratic
+    if len(sizes) < 2:
+        return None
+    x = np.log(sizes[-3:])
+    y = np.log(np.maximum(seconds[-3:], 1e-9))
+    return float(np.polyfit(x, y, 1)[0])
+
+def run_case(case, repeat, budget, max_size):
+    namespace = load_script(case.script, case.libraries)
+    sizes, seconds, peaks = [], [], []
+    skipped_from = None
+
+    for size in case.sizes:
+        if size > max_size:
+            break
+        # Predict the next time from the scaling seen so far (at least linear)
+        if seconds:
+            exponent = max(scaling_exponent(sizes, seconds) or 1.0, 1.0)
+            if seconds[-1] * (size / sizes[-1]) ** exponent > budget:
+                skipped_from = size
+                break
+        try:
+            elapsed, peak = measure(case, namespace, size, repeat)
+        except Exception as error:
+            return {'case': case.name, 'script': case.script, 'function': case.function,
+                    'sizes': sizes, 'seconds': seconds, 'peak_bytes': peaks,
+                    'exponent': scaling_exponent(sizes, seconds), 'skipped_from': size,
+                    'error': f"{type(error).__name__}: {error}"}
+        sizes.append(size)
+        seconds.append(elapsed)
+        peaks.append(peak)
+
+    return {'case': case.name, 'script': case.script, 'function': case.function,
+            'sizes': sizes, 'seconds': seconds, 'peak_bytes': peaks,
+            'exponent': scaling_exponent(sizes, seconds), 'skipped_from': skipped_from}
+
+def regressions(results, baseline, slowdown, exponent_margin):
+    # Cases that got slower than the baseline run at any size both runs reached,
+    # or whose scaling exponent grew
+    previous = {result['case']: result for result in baseline['results']}
+    found = []
+    for result in results:
+        before = previous.get(result['case'])
+        if before is None:
+            continue
+        times_before = dict(zip(before['sizes'], before['seconds']))
+        for size, seconds in zip(result['sizes'], result['seconds']):
+            # Sub-millisecond timings are too noisy to compare
+            if size in times_before and seconds > 1e-3 and seconds > slowdown * times_before[size]:
+                found.append(f"{result['case']} at size {size}: {times_before[size]:.4g}s -> {seconds:.4g}s")
+        if result['exponent'] is not None and before['exponent'] is not None:
+            if result['exponent'] > before['exponent'] + exponent_margin:
+                found.append(f"{result['case']} scaling exponent: {before['exponent']:.2f} -> {result['exponent']:.2f}")
+        # Running out of budget (or failing) before the size the baseline reached
+        reached = max(result['sizes'], default=0)
+        if result['skipped_from'] is not None and before['sizes'] and reached < max(before['sizes']):
+            found.append(f"{result['case']} only reached size {reached} (was {max(before['sizes'])})")
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ECON1210 Excel functions.")
+    parser.add_argument('-o', '--output', help="write the JSON results to this file")
+    parser.add_argument('-k', '--filter', default='', help="only run cases whose name contains this")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--budget', type=float, default=10.0, help="seconds allowed for one call")
+    parser.add_argument('--max-size', type=int, default=10 ** 6)
+    parser.add_argument('--compare', help="baseline JSON from an earlier run")
+    parser.add_argument('--slowdown', type=float, default=1.5, help="allowed time ratio against the baseline")
+    parser.add_argument('--exponent-margin', type=float, default=0.25)
+    options = parser.parse_args(argv)
+
+    results = []
+    for case in CASES:
+        if options.filter not in case.name:
+            continue
+        result = run_case(case, options.repeat, options.budget, options.max_size)
+        results.append(result)
+        exponent = 'n/a' if result['exponent'] is None else f"{result['exponent']:.2f}"
+        largest = max(result['sizes']) if result['sizes'] else 0
+        print(f"{case.name:42} up to n={largest:<8} {result['seconds'][-1] if result['seconds'] else math.nan:10.4f}s  exponent {exponent}", file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+        found = regressions(results, baseline, options.slowdown, options.exponent_margin)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
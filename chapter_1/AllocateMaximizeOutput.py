@@ -1,64 +1,100 @@
+import heapq
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class MaximizeOutputResult(NamedTuple):
+    # Workers per line and the output they make; when ProduceAtleast is given, the fewest
+    # workers reaching it and their allocation (None otherwise). See format_maximize_output.
+    workers_allocated: dict
+    total_output: float
+    min_workers: int
+    min_allocation: dict
 
 def AllocateMaximizeOutput(NumOfWorkerHired, production_df, ProduceAtleast=None):
 
-    # The first row are the headers
-    production_df.columns = production_df.iloc[0]
-    production_df = production_df[1:]
-
-    # if NumOfWorkerHired is not a number, or is empty, and if production_df is not a dataframe, or is empty, return nothing
-    if not isinstance(NumOfWorkerHired, int) or NumOfWorkerHired <= 0 or not isinstance(production_df, pd.DataFrame) or production_df.empty:
-        return None
-
-    # Check the name of the first column, if it is not 'Number of Workers', then rename it
-    if production_df.columns[0] != 'Number of Workers':
-        production_df.rename(columns={production_df.columns[0]: 'Number of Workers'}, inplace=True)
-    
-    # Parse the input production dataframe
-    lines = production_df.set_index('Number of Workers').to_dict(orient='list')
-    print(production_df.head())
-    # Function to calculate marginal outputs
-    def calculate_marginal_output(workers_allocated):
-        marginal_outputs = {}
-        for line, output in lines.items():
-            current_workers = workers_allocated.get(line, 0)
-            if current_workers < len(output):
-                marginal_outputs[line] = output[current_workers] - (output[current_workers - 1] if current_workers > 0 else 0)
-            else:
-                marginal_outputs[line] = 0
-        return marginal_outputs
-
-    # Allocate workers to maximize output
-    workers_allocated = {line: 0 for line in lines.keys()}
-    for _ in range(NumOfWorkerHired):
-        marginal_outputs = calculate_marginal_output(workers_allocated)
-        best_line = max(marginal_outputs, key=marginal_outputs.get)
-        workers_allocated[best_line] += 1
+    if isinstance(production_df, pd.DataFrame):
+        # The first row are the headers
+        production_df.columns = production_df.iloc[0]
+        production_df = production_df[1:]
+
+        # if NumOfWorkerHired is not a number, or is empty, and if production_df is empty, return nothing
+        if not isinstance(NumOfWorkerHired, int) or NumOfWorkerHired <= 0 or production_df.empty:
+            return None
+
+        # Check the name of the first column, if it is not 'Number of Workers', then rename it
+        if production_df.columns[0] != 'Number of Workers':
+            production_df.rename(columns={production_df.columns[0]: 'Number of Workers'}, inplace=True)
+
+        # Parse the input production dataframe
+        lines = production_df.set_index('Number of Workers').to_dict(orient='list')
+    else:
+        # A prebuilt ResourceTable (ResourceTable.py): its columns are read in place
+        if not isinstance(NumOfWorkerHired, int) or NumOfWorkerHired <= 0 or production_df is None or len(production_df) == 0:
+            return None
+        lines = production_df.columns()
+
+    names = list(lines.keys())
+    outputs = list(lines.values())
+
+    # Marginal output of the next worker on a line (0 once the table runs out)
+    def marginal_output(j, current_workers):
+        output = outputs[j]
+        if current_workers < len(output):
+            return output[current_workers] - (output[current_workers - 1] if current_workers > 0 else 0)
+        return 0
+
+    def total_output_of(workers):
+        return sum(outputs[j][workers[j] - 1] for j in range(len(names)) if workers[j] > 0)
+
+    # Allocate workers to maximize output: each worker goes to the line with the highest
+    # marginal output. The lines wait in a heap ordered by (-marginal output, line position),
+    # so ties go to the first line as with max(), and a step only updates the line that got
+    # the worker.
+    #
+    # The greedy order does not depend on how many workers there are, so the allocation for
+    # n workers is the first n steps: one pass answers both NumOfWorkerHired and the fewest
+    # workers reaching ProduceAtleast.
+    workers = [0] * len(names)
+    heap = [(-marginal_output(j, 0), j) for j in range(len(names))]
+    heapq.heapify(heap)
+
+    workers_allocated = None
+    min_workers_required = None
+    # At most one worker per row of the table when looking for ProduceAtleast
+    limit = sum(len(output) for output in outputs) if ProduceAtleast is not None else 0
+    for n in range(1, max(NumOfWorkerHired, limit) + 1):
+        _, best_line = heapq.heappop(heap)
+        workers[best_line] += 1
+        heapq.heappush(heap, (-marginal_output(best_line, workers[best_line]), best_line))
+
+        if n == NumOfWorkerHired:
+            workers_allocated = dict(zip(names, workers))
+        # Check the minimum workers for producing at least ProduceAtleast output
+        if n <= limit and min_workers_required is None and total_output_of(workers) >= ProduceAtleast:
+            min_workers_required = (n, dict(zip(names, workers)))
+        if workers_allocated is not None and (ProduceAtleast is None or min_workers_required is not None):
+            break
 
     # Calculate the total output
     total_output = sum(lines[line][workers_allocated[line] - 1] for line in workers_allocated if workers_allocated[line] > 0)
 
-    # Check the minimum workers for producing at least ProduceAtleast output
-    min_workers_required = None
-    if ProduceAtleast is not None:
-        for n in range(1, sum(len(v) for v in lines.values()) + 1):
-            temp_workers_allocated = {line: 0 for line in lines.keys()}
-            for _ in range(n):
-                marginal_outputs = calculate_marginal_output(temp_workers_allocated)
-                best_line = max(marginal_outputs, key=marginal_outputs.get)
-                temp_workers_allocated[best_line] += 1
-            temp_total_output = sum(lines[line][temp_workers_allocated[line] - 1] for line in temp_workers_allocated if temp_workers_allocated[line] > 0)
-            if temp_total_output >= ProduceAtleast:
-                min_workers_required = (n, temp_workers_allocated)
-                break
+    min_workers, allocation = min_workers_required if min_workers_required else (None, None)
+    return MaximizeOutputResult(workers_allocated, total_output, min_workers, allocation)
+
+def format_maximize_output(result):
+    if not isinstance(result, MaximizeOutputResult):
+        return result
 
     # Prepare the result string
-    result = ", ".join([f"Allocate {workers_allocated[line]} to {line}" for line in workers_allocated]) + "."
-    if min_workers_required:
-        min_workers, allocation = min_workers_required
+    workers_allocated = result.workers_allocated
+    output = ", ".join([f"Allocate {workers_allocated[line]} to {line}" for line in workers_allocated]) + "."
+    if result.min_workers is not None:
+        allocation = result.min_allocation
         allocation_string = ", ".join([f"{allocation[line]} to {line}" for line in allocation])
-        result += f" | Must allocate at least {min_workers} workers, where {allocation_string}."
+        output += f" | Must allocate at least {result.min_workers} workers, where {allocation_string}."
 
-    return result
+    return output
 
-AllocateMaximizeOutput(arg1, arg2, arg3)
+format_maximize_output(remember(AllocateMaximizeOutput, arg1, arg2, arg3))
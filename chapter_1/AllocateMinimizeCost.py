@@ -1,63 +1,83 @@
+import numpy as np
 import pandas as pd
+from typing import NamedTuple
+
+# Requires the Memo.py cell (remember) to run first
+
+class MinimizeCostResult(NamedTuple):
+    # Hours per worker at least cost and, when BenefitPerResource is given, hours per worker
+    # that maximize economic surplus (None otherwise). See format_minimize_cost.
+    allocation: dict
+    surplus_allocation: dict
 
 def AllocateMinimizeCost(NumOfHours, cost_df, BenefitPerResource=None):
-    # Ensure the input dataframe has proper headers
-    cost_df.columns = cost_df.iloc[0]
-    cost_df = cost_df[1:]
+    if isinstance(cost_df, pd.DataFrame):
+        # Ensure the input dataframe has proper headers
+        cost_df.columns = cost_df.iloc[0]
+        cost_df = cost_df[1:]
+
+        # Validate inputs
+        if not isinstance(NumOfHours, int) or NumOfHours <= 0 or cost_df.empty:
+            return None
 
-    # Validate inputs
-    if not isinstance(NumOfHours, int) or NumOfHours <= 0 or not isinstance(cost_df, pd.DataFrame) or cost_df.empty:
-        return None
+        # Check and rename the first column if necessary
+        if cost_df.columns[0] != 'Number of Hours':
+            cost_df.rename(columns={cost_df.columns[0]: 'Number of Hours'}, inplace=True)
 
-    # Check and rename the first column if necessary
-    if cost_df.columns[0] != 'Number of Hours':
-        cost_df.rename(columns={cost_df.columns[0]: 'Number of Hours'}, inplace=True)
+        workers = list(cost_df.columns[1:])
+        # Calculate marginal costs, one row per worker
+        marginal_costs = cost_df.iloc[:, 1:].diff().fillna(cost_df.iloc[:, 1:]).to_numpy(dtype=np.float64).T
+    else:
+        # A prebuilt ResourceTable (ResourceTable.py): its columns are read in place
+        if not isinstance(NumOfHours, int) or NumOfHours <= 0 or cost_df is None or len(cost_df) == 0:
+            return None
+        workers = cost_df.names
+        costs = cost_df.values
+        marginal_costs = np.diff(costs, axis=1, prepend=0)
 
-    # Calculate marginal costs
-    marginal_costs = cost_df.iloc[:, 1:].diff().fillna(cost_df.iloc[:, 1:])
+    hours = marginal_costs.shape[1]
 
-    # Flatten marginal costs to allocate for minimizing cost
-    flattened_costs = []
-    for col in marginal_costs.columns:
-        flattened_costs.extend([(marginal_costs.iat[i, marginal_costs.columns.get_loc(col)], i + 1, col) for i in range(len(marginal_costs))])
+    # Allocate the cheapest hours first, in the order of sorting every (marginal cost, hour, worker):
+    # by cost, then hour, then worker name
+    worker_rank = np.empty(len(workers), dtype=np.int64)
+    worker_rank[sorted(range(len(workers)), key=lambda j: workers[j])] = np.arange(len(workers))
+    worker_of = np.repeat(np.arange(len(workers)), hours)
+    hour_of = np.tile(np.arange(hours), len(workers))
+    order = np.lexsort((worker_rank[worker_of], hour_of, marginal_costs.ravel()))
+    chosen = np.bincount(worker_of[order[:NumOfHours]], minlength=len(workers))
+    allocation = {worker: int(count) for worker, count in zip(workers, chosen)}
+
+    surplus_allocation = None
+
+    # Economic surplus calculation if BenefitPerResource is provided
+    if BenefitPerResource:
+        # Each worker works the hours up to the first one costing more than the benefit
+        surplus_allocation = {}
+        for j, worker in enumerate(workers):
+            too_costly = ~(BenefitPerResource >= marginal_costs[j])
+            surplus_allocation[worker] = int(np.argmax(too_costly)) if too_costly.any() else hours
 
-    # Sort by marginal cost
-    flattened_costs.sort()
+    return MinimizeCostResult(allocation, surplus_allocation)
 
-    allocation = {worker: 0 for worker in cost_df.columns[1:]}
-    for cost, hour, worker in flattened_costs:
-        if NumOfHours > 0:
-            allocation[worker] += 1
-            NumOfHours -= 1
-        else:
-            break
+def format_minimize_cost(result):
+    if not isinstance(result, MinimizeCostResult):
+        return result
 
     minimize_allocation_result = "To minimize cost allocate " + ", ".join(
         f"{hours} hour{'s' if hours > 1 else ''} to {worker}"
-        for worker, hours in allocation.items()
+        for worker, hours in result.allocation.items()
         if hours > 0
     )
 
     maximize_allocation_result = ""
-
-    # Economic surplus calculation if BenefitPerResource is provided
-    if BenefitPerResource:
-        surplus_allocation = {worker: 0 for worker in cost_df.columns[1:]}  # Reset allocation for surplus
-
-        for worker in cost_df.columns[1:]:
-            for hour in range(len(cost_df)):
-                if BenefitPerResource >= marginal_costs.iat[hour, marginal_costs.columns.get_loc(worker)]:
-                    surplus_allocation[worker] = hour + 1
-                else:
-                    break
-
+    if result.surplus_allocation is not None:
         maximize_allocation_result = "\n | To maximize economic surplus allocate " + ", ".join(
             f"{worker}: {hours} hour{'s' if hours > 1 else ''}"
-            for worker, hours in surplus_allocation.items()
+            for worker, hours in result.surplus_allocation.items()
             if hours > 0
         )
 
     return minimize_allocation_result + maximize_allocation_result
 
 
-AllocateMinimizeCost(arg1, arg2, arg3)
+format_minimize_cost(remember(AllocateMinimizeCost, arg1, arg2, arg3))
@@ -0,0 +1,48 @@
+import json
+from pathlib import Path
+import numpy as np
+
+class ResourceTable:
+    # Parse an allocation table once into one contiguous float64 array per column.
+    # Build it in a cell above the allocators, e.g. tbl = ResourceTable(xl("A1:D20")),
+    # then pass tbl instead of the table to AllocateMaximizeOutput or AllocateMinimizeCost.
+    #
+    # The first column counts the resource (Number of Workers, Number of Hours); every other
+    # column is a production line or worker, with cumulative output or cost per row.
+    #
+    # Outside Excel, tbl.save(path) writes the columns as .npy files in a directory and
+    # ResourceTable.load(path) maps them back read-only: loading takes the same time for any
+    # number of rows, and the allocators read the mapped columns without copying them.
+
+    def __init__(self, df):
+        # The first row are the headers
+        df.columns = df.iloc[0]
+        df = df[1:]
+
+        self.resource = df.columns[0]
+        self.names = list(df.columns[1:])
+        # Column-major: values[j] is column j, contiguous
+        self.values = np.ascontiguousarray(df.iloc[:, 1:].to_numpy(dtype=np.float64).T)
+
+    def __len__(self):
+        return self.values.shape[1]
+
+    def columns(self):
+        # {name: column}, in table order; views of values, not copies
+        return {name: self.values[j] for j, name in enumerate(self.names)}
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / 'values.npy', self.values)
+        (path / 'meta.json').write_text(json.dumps({'resource': self.resource, 'names': self.names}))
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        meta = json.loads((path / 'meta.json').read_text())
+        table = cls.__new__(cls)
+        table.resource = meta['resource']
+        table.names = meta['names']
+        table.values = np.load(path / 'values.npy', mmap_mode='r')
+        return table
@@ -0,0 +1,22 @@
+import importlib
+
+# Importable view of the Python-in-Excel scripts.
+# The scripts in the topic folders stay the source (paste them into Excel as before); each
+# submodule below exposes their functions by name and only runs a script the first time one
+# of its functions is used, so importing a submodule costs next to nothing:
+#
+#   from econ1210.discrete import TaxDiscrete             # runs tax_discrete.py, imports pandas
+#   from econ1210.continuous import PriceGuarantee        # runs Market.py and PriceGuarantee.py
+#
+# sympy is only imported once a market's equations are first parsed.
+# econ1210.instrument times the exported functions phase by phase when profiling is on.
+
+SUBMODULES = ('allocation', 'productivity', 'discrete', 'continuous', 'price_discrimination', 'externalities')
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(SUBMODULES)
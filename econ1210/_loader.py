@@ -0,0 +1,75 @@
+import ast
+import re
+import types
+from functools import lru_cache
+from pathlib import Path
+
+from econ1210 import instrument, memo
+
+# The topic folders stay plain Python-in-Excel cells, pasted into Excel as they are.
+# This loader runs them outside Excel: every calculator ends with a template call such as
+# AllocateMaximizeOutput(arg1, arg2, arg3) whose arg names only exist in the Excel cell, so that
+# last statement is dropped and the rest of the script is executed as-is.
+
+REPO = Path(__file__).resolve().parent.parent
+ARG_NAME = re.compile(r'arg\d+$')
+
+def is_template_call(node):
+    # A top-level expression that refers to Excel's arg1, arg2, ... cell arguments
+    if not isinstance(node, ast.Expr):
+        return False
+    return any(isinstance(name, ast.Name) and ARG_NAME.match(name.id) for name in ast.walk(node))
+
+def compile_script(path):
+    path = Path(path)
+    tree = ast.parse(path.read_text(), filename=str(path))
+    if tree.body and is_template_call(tree.body[-1]):
+        tree.body = tree.body[:-1]
+    return compile(tree, str(path), 'exec')
+
+@lru_cache(maxsize=None)
+def library(*scripts):
+    # Library cells (Market.py, Workforce.py) run once, in order, in one namespace,
+    # so every calculator built on them shares one get_market cache
+    namespace = {'__name__': 'econ1210_cell'}
+    for script in scripts:
+        exec(compile_script(REPO / script), namespace)
+    return namespace
+
+@lru_cache(maxsize=None)
+def load_script(script, libraries=()):
+    # Each calculator gets its own namespace (several define helpers with the same name)
+    # seeded with the library cells it needs, as a cell sees the cells above it in Excel
+    namespace = dict(library(*libraries)) if libraries else {'__name__': 'econ1210_cell'}
+    exec(compile_script(REPO / script), namespace)
+    return namespace
+
+def lazy_exports(module_name, exports, impure=()):
+    # PEP 562 module __getattr__/__dir__: exports maps a public name to
+    # (script, name defined by the script, library cells). Nothing is executed, and so
+    # nothing like pandas or scipy is imported, until one of the names is first used.
+    # Functions are handed out through instrument.wrap, so they can be profiled, and the
+    # calculators through memo.wrap too; impure names the ones called for their effect.
+    wrapped = {}
+
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        if name in wrapped:
+            return wrapped[name]
+        script, defined_name, libraries = exports[name]
+        # Names from a library cell itself (Market, get_market) come from the shared namespace
+        if script in libraries:
+            value = library(*libraries)[defined_name]
+        else:
+            value = load_script(script, libraries)[defined_name]
+        if isinstance(value, types.FunctionType):
+            if not name.startswith('format_') and name not in impure:
+                value = memo.wrap(value)
+            value = wrapped[name] = instrument.wrap(value)
+        return value
+
+    def __dir__():
+        return sorted(exports)
+
+    return __getattr__, __dir__
@@ -0,0 +1,15 @@
+from econ1210._loader import lazy_exports
+
+# chapter_1: allocating workers and hours by marginal output and marginal cost.
+# A ResourceTable (parsed once, or mapped from disk with ResourceTable.load) can be passed
+# instead of the table.
+
+TABLE = ('chapter_1/ResourceTable.py',)
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'ResourceTable': ('chapter_1/ResourceTable.py', 'ResourceTable', TABLE),
+    'AllocateMaximizeOutput': ('chapter_1/AllocateMaximizeOutput.py', 'AllocateMaximizeOutput', ()),
+    'AllocateMinimizeCost': ('chapter_1/AllocateMinimizeCost.py', 'AllocateMinimizeCost', ()),
+    'format_maximize_output': ('chapter_1/AllocateMaximizeOutput.py', 'format_maximize_output', ()),
+    'format_minimize_cost': ('chapter_1/AllocateMinimizeCost.py', 'format_minimize_cost', ()),
+})
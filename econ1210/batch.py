@@ -0,0 +1,263 @@
+import argparse
+import importlib
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Batch runner for scenario spreadsheets: one calculator, many independent rows.
+#
+#   run_batch('continuous.Tax', 'scenarios.csv', 'results.csv')
+#   run_batch('price_discrimination.PriceDiscrimination', 'scenarios.csv', 'results.parquet',
+#             tables={'week1': xl_table, ...})
+#   python -m econ1210.batch continuous.Tax scenarios.csv results.csv --workers 8
+#
+# The scenario columns are the calculator's arguments in order, as arg1, arg2, ... in Excel.
+# A column named table_id is looked up in tables (an Excel-shaped DataFrame per id; from the
+# command line, a directory of header-less CSVs named <table_id>.csv).
+#
+# The file is streamed in chunks. Rows sharing a market (the same equations, or the same
+# table) are sent to a worker together, so Market.py's get_market cache and the compiled
+# script stay warm across them. Each worker loads the calculator once and keeps it for its
+# whole life. Results are appended to the output file chunk by chunk, in scenario order:
+# the scenario columns, then the fields of the result prefixed with "result." (nested results
+# as "result.coupon.list_price", dicts as JSON), then a message column holding any text the
+# calculator returned instead, such as "" for invalid input or "No equilibrium found.".
+# With cache='solutions.sqlite' the continuous calculators share their symbolic solutions
+# through that file, across the workers and across runs (see Market.py's SolutionCache).
+
+_function = None
+_tables = None
+_table_position = None
+
+def resolve(name):
+    # 'continuous.Tax' -> econ1210.continuous.Tax
+    module_name, _, function_name = name.rpartition('.')
+    module = importlib.import_module(f"econ1210.{module_name}")
+    return getattr(module, function_name)
+
+def _start_worker(function_name, tables, table_position, cache=None):
+    global _function, _tables, _table_position
+    if cache is not None:
+        from econ1210.continuous import use_solution_cache
+        use_solution_cache(cache)
+    _function = resolve(function_name)
+    _tables = tables
+    _table_position = table_position
+
+def python_value(value):
+    # Empty cells become None and numpy scalars plain Python numbers, as Excel passes them
+    # (AllocateMaximizeOutput insists on an int)
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        if isinstance(value, float) and np.isnan(value):
+            return None
+    return value
+
+def flatten(result):
+    # One flat record per result, following the NamedTuple's declared fields, so every row
+    # of a batch has the same columns even when a nested result is None
+    if not hasattr(result, '_fields'):
+        return {'message': result if isinstance(result, str) or result is None else repr(result)}
+
+    record = {}
+    annotations = getattr(type(result), '__annotations__', {})
+    for field in result._fields:
+        value = getattr(result, field)
+        nested = annotations.get(field)
+        if isinstance(nested, type) and hasattr(nested, '_fields'):
+            for nested_field in nested._fields:
+                record[f"{field}.{nested_field}"] = None if value is None else getattr(value, nested_field)
+        elif isinstance(value, (dict, tuple, list)):
+            record[field] = json.dumps(value, default=python_value)
+        else:
+            record[field] = python_value(value)
+    record['message'] = None
+    return record
+
+def _run_rows(rows):
+    # rows: [(position, arguments)] for one or more markets, run in the order given
+    records = []
+    for position, arguments in rows:
+        arguments = [python_value(value) for value in arguments]
+        if _table_position is not None:
+            arguments[_table_position] = _tables[arguments[_table_position]].copy()
+        try:
+            records.append((position, flatten(_function(*arguments))))
+        except Exception as error:
+            records.append((position, {'message': f"{type(error).__name__}: {error}"}))
+    return records
+
+def read_chunks(path, chunksize):
+    path = Path(path)
+    if path.suffix == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet scenarios requires pyarrow.")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+class ResultWriter:
+    # Appends chunks to a CSV or Parquet file; the columns are fixed by the first chunk written
+    def __init__(self, path):
+        self.path = Path(path)
+        self.columns = None
+        self.parquet = None
+
+    def write(self, frame):
+        first = self.columns is None
+        if first:
+            self.columns = list(frame.columns)
+        frame = frame.reindex(columns=self.columns)
+        if self.path.suffix == '.parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Writing Parquet results requires pyarrow.")
+            if self.parquet is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                self.parquet = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(frame, schema=self.parquet.schema, preserve_index=False)
+            self.parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if first else 'a', header=first, index=False)
+
+    def close(self):
+        if self.parquet is not None:
+            self.parquet.close()
+
+def group_columns(scenarios, group_by):
+    # Rows are grouped by table_id if there is one, otherwise by the leading text columns
+    # (demand_eq, supply_eq, ...), which is what the solver caches are keyed on
+    if group_by is not None:
+        return list(group_by)
+    if 'table_id' in scenarios.columns:
+        return ['table_id']
+    columns = []
+    for column in scenarios.columns:
+        if scenarios[column].dtype != object:
+            break
+        columns.append(column)
+    return columns
+
+def split_tasks(chunk, start, group_by, tasks):
+    # Whole groups per task, about `tasks` tasks per chunk so every worker gets several
+    keys = chunk[group_by].astype(str).agg('\x1f'.join, axis=1) if group_by else pd.Series(np.arange(len(chunk)) % tasks, index=chunk.index)
+    rows = list(zip(range(start, start + len(chunk)), chunk.itertuples(index=False, name=None)))
+    groups = {}
+    for key, row in zip(keys, rows):
+        groups.setdefault(key, []).append(row)
+
+    # A market with more rows than one task's share is split, so a few big markets still keep
+    # every worker busy (each piece warms its worker's cache once)
+    share = -(-len(rows) // tasks)
+    pieces = [group[i:i + share] for group in groups.values() for i in range(0, len(group), share)]
+
+    # Largest pieces first, each to the task with the fewest rows so far
+    buckets = [[] for _ in range(min(tasks, len(pieces)))]
+    for piece in sorted(pieces, key=len, reverse=True):
+        min(buckets, key=len).extend(piece)
+    return buckets
+
+def assemble(chunk, records):
+    records.sort(key=lambda item: item[0])
+    results = pd.DataFrame([record for _, record in records], index=chunk.index)
+    if 'message' not in results.columns:
+        results['message'] = None
+    # Keep message last whatever order the records' columns came in
+    fields = [column for column in results.columns if column != 'message']
+    results = results[fields].add_prefix('result.').join(results['message'])
+    return pd.concat([chunk, results], axis=1)
+
+def run_batch(function_name, scenarios_path, output_path, tables=None, chunksize=5000, workers=None,
+              group_by=None, tasks_per_worker=4, cache=None):
+    # Returns the number of scenarios written
+    workers = workers or os.cpu_count() or 1
+    chunks = read_chunks(scenarios_path, chunksize)
+    first = next(chunks, None)
+    if first is None:
+        return 0
+
+    # Which argument holds a table id, to be swapped for the table itself in the workers
+    table_position = list(first.columns).index('table_id') if 'table_id' in first.columns else None
+    if table_position is not None and tables is None:
+        raise ValueError("The scenarios have a table_id column but no tables were given.")
+
+    writer = ResultWriter(output_path)
+    buffered = []
+    written = 0
+
+    def finish(chunk, futures):
+        # Results are held back until a chunk has produced a real result, so the file's columns
+        # include the result fields even when the first scenarios were all invalid
+        nonlocal written
+        frame = assemble(chunk, [record for future in futures for record in future.result()])
+        buffered.append(frame)
+        if writer.columns is not None or len(frame.columns) > len(chunk.columns) + 1:
+            for part in buffered:
+                writer.write(part)
+            buffered.clear()
+        written += len(chunk)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                             initargs=(function_name, tables, table_position, cache)) as pool:
+        pending = deque()
+        start = 0
+        for chunk in itertools.chain([first], chunks):
+            columns = group_columns(chunk, group_by)
+            tasks = split_tasks(chunk, start, columns, workers * tasks_per_worker)
+            pending.append((chunk, [pool.submit(_run_rows, task) for task in tasks]))
+            start += len(chunk)
+
+            # Keep two chunks in flight so the workers stay busy while one is written
+            if len(pending) > 1:
+                finish(*pending.popleft())
+        while pending:
+            finish(*pending.popleft())
+
+    for part in buffered:
+        writer.write(part)
+    writer.close()
+    return written
+
+def read_table(path):
+    # An Excel range saved as CSV: header row first, then typed values, all in one object frame
+    header = pd.read_csv(path, header=None, nrows=1)
+    body = pd.read_csv(path, header=None, skiprows=1)
+    return pd.concat([header.astype(object), body.astype(object)], ignore_index=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an ECON1210 calculator over a scenario file.")
+    parser.add_argument('function', help="submodule.name, e.g. continuous.Tax")
+    parser.add_argument('scenarios', help="CSV or Parquet file, one scenario per row")
+    parser.add_argument('output', help="CSV or Parquet file for the results")
+    parser.add_argument('--tables', help="directory of <table_id>.csv files (Excel ranges, header row first)")
+    parser.add_argument('--chunksize', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--group-by', nargs='*', default=None)
+    parser.add_argument('--cache', help="SQLite file for symbolic solutions shared across workers and runs")
+    options = parser.parse_args(argv)
+
+    tables = None
+    if options.tables:
+        tables = {path.stem: read_table(path) for path in Path(options.tables).glob('*.csv')}
+
+    count = run_batch(options.function, options.scenarios, options.output, tables=tables,
+                      chunksize=options.chunksize, workers=options.workers, group_by=options.group_by,
+                      cache=options.cache)
+    print(f"{count} scenarios written to {options.output}")
+
+if __name__ == '__main__':
+    main()
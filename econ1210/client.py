@@ -0,0 +1,106 @@
+import itertools
+import json
+import socket
+import threading
+
+from econ1210.service import decode, encode, load_token, parse_address, resolve
+
+# Thin client for the local calculation service (econ1210/service.py). In a cell, the script's
+# trailing template line, e.g. format_tax(Tax(arg1, arg2, arg3, arg4)), becomes
+#
+#   from econ1210.client import call
+#   call('continuous.Tax', arg1, arg2, arg3, arg4, format='format_tax')
+#
+# which sends the arguments to the running service and returns what the template line would
+# have: the formatted text, or the DataFrame of a table result. Without format the raw result
+# comes back, with result tuples as namedtuples of the same name and fields. When no service
+# is running the calculator runs right here instead, as it would have in the cell. Every
+# connection starts with the user's service token (econ1210.service.TOKEN_PATH, or token_path).
+#
+#   client = Client('127.0.0.1:8765')   # or the ECON1210_SERVICE address by default
+#   client.call('continuous.Tax', "Q = 500 - 2P", "Q = 3P^2", 5, 'P')
+#   client.stats()                      # {'requests': ..., 'batches': ..., 'shared': ..., ...}
+
+class ServiceError(Exception):
+    # The calculator raised on the service side; the message has the error's type and text
+    pass
+
+class Client:
+    def __init__(self, address=None, timeout=None, token_path=None):
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self.token_path = token_path
+        self.connection = None
+        self.lines = None
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def connect(self):
+        token = load_token(self.token_path)
+        if self.address[0] == 'tcp':
+            connection = socket.create_connection(self.address[1:], timeout=self.timeout)
+        else:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            connection.connect(self.address[1])
+        connection.sendall(token.encode() + b'\n')
+        self.connection = connection
+        self.lines = connection.makefile('rb')
+
+    def close(self):
+        if self.connection is not None:
+            self.lines.close()
+            self.connection.close()
+        self.connection = self.lines = None
+
+    def request(self, message):
+        # One request and its answer; a connection the service dropped is opened again once
+        with self.lock:
+            message = dict(message, id=next(self.ids))
+            line = json.dumps(message).encode() + b'\n'
+            for attempt in range(2):
+                try:
+                    if self.connection is None:
+                        self.connect()
+                    self.connection.sendall(line)
+                    answer = self.lines.readline()
+                    if not answer:
+                        raise ConnectionResetError("The service closed the connection.")
+                    break
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close()
+                    if attempt:
+                        raise
+            response = json.loads(answer)
+        if 'error' in response:
+            raise ServiceError(response['error'])
+        return decode(response['result'])
+
+    def call(self, function, *args, format=None, **kwargs):
+        # function is 'submodule.Name', e.g. 'continuous.Tax'; format a format_* function of
+        # the same submodule applied to the result on the service side
+        return self.request({'function': function, 'args': encode(list(args)),
+                             'kwargs': {name: encode(value) for name, value in kwargs.items()},
+                             'format': format})
+
+    def ping(self):
+        return self.request({'command': 'ping'})
+
+    def stats(self):
+        return self.request({'command': 'stats'})
+
+_client = None
+
+def call(function, *args, format=None, **kwargs):
+    # Through the service at the default address when it is running, here otherwise
+    global _client
+    if _client is None:
+        _client = Client()
+    try:
+        return _client.call(function, *args, format=format, **kwargs)
+    except (FileNotFoundError, ConnectionRefusedError):
+        _client.close()
+    result = resolve(function)(*args, **kwargs)
+    if format:
+        result = resolve(f"{function.rpartition('.')[0]}.{format}")(result)
+    return result
@@ -0,0 +1,32 @@
+from econ1210._loader import lazy_exports
+
+# TaxSubsidyPriceCeilingFloorContinous: policies on demand and supply equations.
+# Every calculator here shares the one Market.py namespace, so a market solved for Tax is
+# reused by Subsidy, PriceGuarantee, ... exactly as in a workbook.
+# use_solution_cache('solutions.sqlite') also keeps the symbolic solutions on disk.
+
+MARKET = ('TaxSubsidyPriceCeilingFloorContinous/Market.py',)
+FOLDER = 'TaxSubsidyPriceCeilingFloorContinous/'
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Market': (FOLDER + 'Market.py', 'Market', MARKET),
+    'get_market': (FOLDER + 'Market.py', 'get_market', MARKET),
+    'use_solution_cache': (FOLDER + 'Market.py', 'use_solution_cache', MARKET),
+    'Tax': (FOLDER + 'TaxKnown.py', 'Tax', MARKET),
+    'Subsidy': (FOLDER + 'SubsidyKnown.py', 'Subsidy', MARKET),
+    'CalculateTax': (FOLDER + 'TaxUnknown.py', 'CalculateTax', MARKET),
+    'CalculateSubsidy': (FOLDER + 'SubsidyUnknown.py', 'CalculateSubsidy', MARKET),
+    'PriceGuarantee': (FOLDER + 'PriceGuarantee.py', 'PriceGuarantee', MARKET),
+    'PriceGuaranteeSimulation': (FOLDER + 'PriceGuaranteeSimulation.py', 'PriceGuaranteeSimulation', MARKET),
+    'MarketUncertainty': (FOLDER + 'MarketUncertainty.py', 'MarketUncertainty', MARKET),
+    'MultiMarketTax': (FOLDER + 'MultiMarket.py', 'MultiMarketTax', MARKET),
+    'PriceControlContinuous': (FOLDER + 'PriceControl.py', 'PriceControlContinuous', MARKET),
+    'PolicySurface': (FOLDER + 'PolicySurface.py', 'PolicySurface', MARKET),
+    'format_tax': (FOLDER + 'TaxKnown.py', 'format_tax', MARKET),
+    'format_subsidy': (FOLDER + 'SubsidyKnown.py', 'format_subsidy', MARKET),
+    'format_calculate_tax': (FOLDER + 'TaxUnknown.py', 'format_calculate_tax', MARKET),
+    'format_calculate_subsidy': (FOLDER + 'SubsidyUnknown.py', 'format_calculate_subsidy', MARKET),
+    'format_price_guarantee': (FOLDER + 'PriceGuarantee.py', 'format_price_guarantee', MARKET),
+    'format_price_control_continuous': (FOLDER + 'PriceControl.py', 'format_price_control_continuous', MARKET),
+    'format_policy_surface': (FOLDER + 'PolicySurface.py', 'format_policy_surface', MARKET),
+}, impure=('use_solution_cache',))
@@ -0,0 +1,12 @@
+from econ1210._loader import lazy_exports
+
+# TaxSubsidyPriceCeilingFloorDISCRETE: policies on a price / quantity schedule
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'PriceControl': ('TaxSubsidyPriceCeilingFloorDISCRETE/price_control_discrete.py', 'PriceControl', ()),
+    'SubsidyDiscrete': ('TaxSubsidyPriceCeilingFloorDISCRETE/subsidy_discrete.py', 'SubsidyDiscrete', ()),
+    'TaxDiscrete': ('TaxSubsidyPriceCeilingFloorDISCRETE/tax_discrete.py', 'TaxDiscrete', ()),
+    'format_price_control': ('TaxSubsidyPriceCeilingFloorDISCRETE/price_control_discrete.py', 'format_price_control', ()),
+    'format_subsidy_discrete': ('TaxSubsidyPriceCeilingFloorDISCRETE/subsidy_discrete.py', 'format_subsidy_discrete', ()),
+    'format_tax_discrete': ('TaxSubsidyPriceCeilingFloorDISCRETE/tax_discrete.py', 'format_tax_discrete', ()),
+})
@@ -0,0 +1,15 @@
+from econ1210._loader import lazy_exports
+
+# Externalities: Coase bargaining, tradable pollution permits and Pigouvian taxes (Pigouvian
+# solves its market with the continuous calculators' Market.py cell)
+
+MARKET = ('TaxSubsidyPriceCeilingFloorContinous/Market.py',)
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Negotiation': ('Externalities/Negotiation.py', 'Negotiation', ()),
+    'calculate_equilibrium': ('Externalities/pollution.py', 'calculate_equilibrium', ()),
+    'Pigouvian': ('Externalities/Pigouvian.py', 'Pigouvian', MARKET),
+    'format_negotiation': ('Externalities/Negotiation.py', 'format_negotiation', ()),
+    'format_emissions': ('Externalities/pollution.py', 'format_emissions', ()),
+    'format_pigouvian': ('Externalities/Pigouvian.py', 'format_pigouvian', MARKET),
+})
@@ -0,0 +1,286 @@
+import inspect
+import sys
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import NamedTuple
+
+# Opt-in timing of the calculators, to see where a slow recalculation goes:
+#
+#   from econ1210 import instrument
+#   from econ1210.continuous import Tax
+#   with instrument.profiling():
+#       Tax("Q = 500 - 2P", "Q = 3P^2", 5, 'P')
+#   instrument.records[-1]      # CallRecord(function='Tax', seconds=..., phases={...}, counts={...})
+#   instrument.summary()        # one row per function over every recorded call
+#
+# Every function exported by the econ1210 submodules is wrapped once when it is first looked
+# up. While profiling is off the wrapper only checks a flag, so the overhead is one global
+# lookup per call. While it is on, a top-level call gets a CallRecord: the coarse steps it goes
+# through (sympy.solve, Market's properties, quad, the table copies, ...) are swapped for
+# probes that time them and count them, and are put back when profiling stops.
+#
+# Time goes to the outermost phase it was spent in, so sympy.solve inside
+# Market.equilibrium counts as equilibrium and the phases of one call add up to its
+# total. Whatever the calculator does itself (its loops over the table, its arithmetic) is
+# 'search', or 'format' for the format_* functions.
+#
+# One process, one thread: the records are kept in module globals.
+
+PHASES = ('parse', 'equilibrium', 'inversion', 'integration', 'solve', 'copy', 'search', 'format')
+
+# Names looked up in a script's namespace: name -> (phase, counter)
+NAMESPACE_PROBES = {
+    'parse_equation': ('parse', None),
+    'compile_curve': ('parse', None),
+    'brentq': ('equilibrium', 'scipy.brentq'),
+    'minimize_scalar': ('equilibrium', 'scipy.minimize_scalar'),
+    'quad': ('integration', 'scipy.quad'),
+    'linprog': ('solve', 'scipy.linprog'),
+}
+
+# Market.py's cached properties (their .func) and methods: name -> phase
+MARKET_PROBES = {
+    'Qd_expr': 'parse',
+    'Qs_expr': 'parse',
+    'demand': 'parse',
+    'supply': 'parse',
+    'equilibrium': 'equilibrium',
+    'numeric_equilibrium': 'equilibrium',
+    'inverse_demand': 'inversion',
+    'inverse_supply': 'inversion',
+    'supply_start': 'inversion',
+    'choke_price': 'inversion',
+    'demand_antiderivative': 'integration',
+    'supply_antiderivative': 'integration',
+    'demand_area': 'integration',
+    'supply_area': 'integration',
+    'area_curves': 'integration',
+    'CS0': 'integration',
+    'PS0': 'integration',
+    'coefficients': 'parse',
+    'slopes': 'parse',
+    'term_calculus': 'integration',
+    'inverse_curves': 'inversion',
+    'tax_price': 'solve',
+    'ad_valorem_tax_price': 'solve',
+    'subsidy_price': 'solve',
+}
+
+# Module attributes: (module, attribute) -> (phase, counter). The scripts import sympy inside
+# their functions, so they look sp.solve up on every call and see the probe.
+MODULE_PROBES = {
+    ('sympy', 'solve'): ('solve', 'sympy.solve'),
+    ('sympy', 'nsolve'): ('solve', 'sympy.nsolve'),
+    ('sympy', 'integrate'): ('integration', 'sympy.integrate'),
+}
+
+# DataFrame methods, counted only when a script calls them (pandas calls them internally too)
+TABLE_PROBES = ('copy', 'reset_index')
+
+class CallRecord(NamedTuple):
+    function: str
+    seconds: float
+    phases: dict  # phase -> seconds, adding up to seconds
+    counts: dict  # solver calls and cache hits, e.g. {'sympy.solve': 3, 'get_market hits': 1}
+
+class _Call:
+    __slots__ = ('phase', 'phases', 'counts')
+
+    def __init__(self):
+        self.phase = None
+        self.phases = defaultdict(float)
+        self.counts = defaultdict(int)
+
+_active = False
+_current = None
+_patches = []
+_installed = set()
+
+records = deque(maxlen=10000)
+registry = {}
+
+def wrap(function):
+    # The wrapper every exported function goes through
+    @wraps(function)
+    def call(*args, **kwargs):
+        if not _active or _current is not None:
+            return function(*args, **kwargs)
+        return _record(function, args, kwargs)
+    return call
+
+def _record(function, args, kwargs):
+    global _current
+    # Through memo.wrap's wrapper to the script's own function
+    namespace = inspect.unwrap(function).__globals__
+    _install(namespace)
+    get_market = namespace.get('get_market')
+    before = get_market.cache_info() if hasattr(get_market, 'cache_info') else None
+
+    _current = record = _Call()
+    start = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        _current = None
+        if before is not None:
+            after = get_market.cache_info()
+            record.counts['get_market hits'] += after.hits - before.hits
+            record.counts['get_market misses'] += after.misses - before.misses
+        own = 'format' if function.__name__.startswith('format_') else 'search'
+        record.phases[own] += max(seconds - sum(record.phases.values()), 0.0)
+        _keep(CallRecord(function.__name__, seconds, dict(record.phases), {k: v for k, v in record.counts.items() if v}))
+
+def _keep(call):
+    records.append(call)
+    total = registry.setdefault(call.function, {'calls': 0, 'seconds': 0.0, 'phases': defaultdict(float), 'counts': defaultdict(int)})
+    total['calls'] += 1
+    total['seconds'] += call.seconds
+    for phase, seconds in call.phases.items():
+        total['phases'][phase] += seconds
+    for name, count in call.counts.items():
+        total['counts'][name] += count
+
+def probe(original, phase, counter=None):
+    # Times original under phase (unless an outer phase is already running) and counts it
+    @wraps(original)
+    def call(*args, **kwargs):
+        record = _current
+        if record is None:
+            return original(*args, **kwargs)
+        if counter is not None:
+            record.counts[counter] += 1
+        if phase is None or record.phase is not None:
+            return original(*args, **kwargs)
+        record.phase = phase
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            record.phases[phase] += time.perf_counter() - start
+            record.phase = None
+    call.probed = original
+    return call
+
+def _table_probe(original, name):
+    timed = probe(original, 'copy', f"DataFrame.{name}")
+
+    @wraps(original)
+    def call(*args, **kwargs):
+        if _current is not None and sys._getframe(1).f_globals.get('__name__') == 'econ1210_cell':
+            return timed(*args, **kwargs)
+        return original(*args, **kwargs)
+    call.probed = original
+    return call
+
+def _solution_probe(original):
+    # Market.solution: a name already in the market's memory is a hit
+    @wraps(original)
+    def call(market, name, compute):
+        if _current is not None:
+            _current.counts['solution memory hits' if name in market._solutions else 'solution lookups'] += 1
+        return original(market, name, compute)
+    call.probed = original
+    return call
+
+def _disk_probe(original):
+    # SolutionCache.get: (found, value)
+    @wraps(original)
+    def call(cache, key):
+        found, value = original(cache, key)
+        if _current is not None:
+            _current.counts['solution disk hits' if found else 'solution disk misses'] += 1
+        return found, value
+    call.probed = original
+    return call
+
+def _patch(owner, name, replacement):
+    if isinstance(owner, dict):
+        _patches.append((owner, name, owner[name]))
+        owner[name] = replacement
+    else:
+        _patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+def _install(namespace):
+    # Probes for one script's namespace, and for the Market class it uses, on its first profiled call
+    if id(namespace) in _installed:
+        return
+    _installed.add(id(namespace))
+    for name, (phase, counter) in NAMESPACE_PROBES.items():
+        value = namespace.get(name)
+        if callable(value) and not hasattr(value, 'probed'):
+            _patch(namespace, name, probe(value, phase, counter))
+
+    market = namespace.get('Market')
+    if not isinstance(market, type) or id(market) in _installed:
+        return
+    _installed.add(id(market))
+    for name, phase in MARKET_PROBES.items():
+        attribute = market.__dict__.get(name)
+        if hasattr(attribute, 'func') and hasattr(attribute, 'attrname'):  # cached_property
+            _patch(attribute, 'func', probe(attribute.func, phase))
+        elif callable(attribute):
+            _patch(market, name, probe(attribute, phase))
+    if 'solution' in market.__dict__:
+        _patch(market, 'solution', _solution_probe(market.__dict__['solution']))
+    # Market's methods look parse_equation, brentq, ... up in the library cell's namespace
+    library = market.__init__.__globals__
+    _install(library)
+    cache = library.get('SolutionCache')
+    if isinstance(cache, type):
+        _patch(cache, 'get', _disk_probe(cache.__dict__['get']))
+
+def enable():
+    # sympy is imported up front so the first symbolic call is counted too
+    global _active
+    if _active:
+        return
+    import pandas as pd
+    import sympy
+    for (module_name, name), (phase, counter) in MODULE_PROBES.items():
+        module = sys.modules.get(module_name)
+        if module is not None:
+            _patch(module, name, probe(getattr(module, name), phase, counter))
+    for name in TABLE_PROBES:
+        _patch(pd.DataFrame, name, _table_probe(getattr(pd.DataFrame, name), name))
+    _active = True
+
+def disable():
+    global _active
+    _active = False
+    while _patches:
+        owner, name, original = _patches.pop()
+        if isinstance(owner, dict):
+            owner[name] = original
+        else:
+            setattr(owner, name, original)
+    _installed.clear()
+
+@contextmanager
+def profiling():
+    enable()
+    try:
+        yield
+    finally:
+        disable()
+
+def reset():
+    records.clear()
+    registry.clear()
+
+def summary():
+    # One row per function: calls, total seconds, seconds per phase and summed counts
+    import pandas as pd
+    rows = []
+    for function, total in registry.items():
+        row = {'function': function, 'calls': total['calls'], 'seconds': total['seconds']}
+        row.update({phase: total['phases'].get(phase, 0.0) for phase in PHASES})
+        row.update(total['counts'])
+        rows.append(row)
+    frame = pd.DataFrame(rows, columns=None if rows else ['function', 'calls', 'seconds', *PHASES])
+    counts = [column for column in frame.columns if column not in ('function', 'calls', 'seconds', *PHASES)]
+    frame[counts] = frame[counts].fillna(0).astype(int)
+    return frame.sort_values('seconds', ascending=False, ignore_index=True)
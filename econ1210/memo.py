@@ -0,0 +1,23 @@
+from pathlib import Path
+
+# The memo is the Memo.py library cell at the top of the repository, the one a workbook runs in
+# its first cell; this module runs it once, so Excel and Python share one implementation.
+#
+#   from econ1210 import memo
+#   memo.stats(); memo.clear(); memo.disable(); memo.enable(); memo.set_maxsize(1024)
+
+CELL = Path(__file__).resolve().parent.parent / 'Memo.py'
+
+_cell = {'__name__': 'econ1210_memo'}
+exec(compile(CELL.read_text(), str(CELL), 'exec'), _cell)
+
+Unfingerprintable = _cell['Unfingerprintable']
+fingerprint = _cell['fingerprint']
+code_key = _cell['code_key']
+wrap = _cell['wrap']
+remember = _cell['remember']
+stats = _cell['stats']
+clear = _cell['clear']
+enable = _cell['enable']
+disable = _cell['disable']
+set_maxsize = _cell['set_maxsize']
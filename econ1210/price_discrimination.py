@@ -0,0 +1,17 @@
+from econ1210._loader import lazy_exports
+
+# PriceDiscrimination: single price, coupons, perfect discrimination and bundling, and
+# third-degree discrimination across segments given by demand equations (SegmentPricing parses
+# them with the continuous calculators' Market.py cell)
+
+MARKET = ('TaxSubsidyPriceCeilingFloorContinous/Market.py',)
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'PriceDiscrimination': ('PriceDiscrimination/NonPerfectPriceDiscrimination.py', 'PriceDiscrimination', ()),
+    'PerfectPriceDiscrimination': ('PriceDiscrimination/PerfectPriceDiscrimination.py', 'PerfectPriceDiscrimination', ()),
+    'SegmentPricing': ('PriceDiscrimination/SegmentPricing.py', 'SegmentPricing', MARKET),
+    'compute_profit_details': ('PriceDiscrimination/combo.py', 'compute_profit_details', ()),
+    'format_price_discrimination': ('PriceDiscrimination/NonPerfectPriceDiscrimination.py', 'format_price_discrimination', ()),
+    'format_perfect_price_discrimination': ('PriceDiscrimination/PerfectPriceDiscrimination.py', 'format_perfect_price_discrimination', ()),
+    'format_profit_details': ('PriceDiscrimination/combo.py', 'format_profit_details', ()),
+})
@@ -0,0 +1,21 @@
+from econ1210._loader import lazy_exports
+
+# Productivity: production by opportunity cost, frontiers and multi-good assignment.
+# Both CalculateProduction_via_oc.py and Calculate_production_via_item_count.py define
+# calculate_production; the item-count one is exported as calculate_production_for_items.
+# A Workforce can be saved once with wf.save(path) and mapped back with Workforce.load(path).
+
+WORKFORCE = ('Productivity/Workforce.py',)
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Workforce': ('Productivity/Workforce.py', 'Workforce', WORKFORCE),
+    'calculate_production': ('Productivity/CalculateProduction_via_oc.py', 'calculate_production', ()),
+    'calculate_total_production': ('Productivity/CalculateProduction_via_oc_alt.py', 'calculate_total_production', ()),
+    'calculate_production_for_items': ('Productivity/Calculate_production_via_item_count.py', 'calculate_production', ()),
+    'production_frontier': ('Productivity/ProductionFrontier.py', 'production_frontier', ()),
+    'frontier_output': ('Productivity/ProductionFrontier.py', 'frontier_output', ()),
+    'assign_production': ('Productivity/AssignProduction.py', 'assign_production', ()),
+    'format_production_totals': ('Productivity/CalculateProduction_via_oc.py', 'format_production_totals', ()),
+    'format_total_production': ('Productivity/CalculateProduction_via_oc_alt.py', 'format_total_production', ()),
+    'format_item_count_production': ('Productivity/Calculate_production_via_item_count.py', 'format_item_count_production', ()),
+})
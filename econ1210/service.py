@@ -0,0 +1,394 @@
+import argparse
+import asyncio
+import hmac
+import importlib
+import json
+import os
+import secrets
+import stat
+import sys
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+
+from econ1210 import memo
+
+# Local calculation service: the calculators in long-running worker processes, so the imports,
+# parsed scripts, get_market markets, symbolic solutions and remembered results stay warm
+# across workbook sessions and clients.
+#
+#   python -m econ1210.service                          # UNIX socket in the temp directory
+#   python -m econ1210.service --address 127.0.0.1:8765 --workers 4 --cache solutions.sqlite
+#
+# and in a cell, instead of the script's trailing template line (see econ1210/client.py):
+#
+#   from econ1210.client import call
+#   call('continuous.Tax', arg1, arg2, arg3, arg4, format='format_tax')
+#
+# Trust model: the service runs calculator code on what clients send (equation strings are parsed
+# by sympy), so only the user who started it may talk to it. The first line of every connection,
+# UNIX socket or TCP alike, is the user's secret token from TOKEN_PATH (created on first start,
+# mode 0600, refused if other users can read it); a connection that does not start with it is
+# closed before any request is read. Anyone who can read the token file can run code as the user.
+#
+# The protocol is then one JSON object per line each way, over a UNIX socket or a localhost TCP port:
+#   {"id": 1, "function": "continuous.Tax", "args": [...], "kwargs": {...}, "format": "format_tax"}
+#   {"id": 1, "result": ...}  or  {"id": 1, "error": "ValueError: ..."}
+# plus {"id": 2, "command": "ping"} and {"id": 3, "command": "stats"}. Tables, arrays and result
+# tuples travel as tagged JSON (see encode); nothing is unpickled from a client.
+#
+# Every exported calculator of the econ1210 submodules can be called. Requests on the same market
+# (the same leading equation strings) or the same table always go to the same worker, so its
+# caches are warm for them; requests for one worker arriving within `window` seconds of each
+# other are sent to it as one batch, and identical requests in flight share one calculation.
+# The workers are processes, so a long symbolic solve never holds up the server or the other
+# markets; with workers=0 everything runs in threads of the server process instead.
+
+DEFAULT_ADDRESS = os.environ.get('ECON1210_SERVICE') or (
+    '127.0.0.1:8765' if os.name == 'nt' else str(Path(tempfile.gettempdir()) / 'econ1210.sock'))
+TOKEN_PATH = Path(os.environ.get('ECON1210_SERVICE_TOKEN') or Path.home() / '.econ1210' / 'service.token')
+HANDSHAKE_TIMEOUT = 10.0
+LINE_LIMIT = 2 ** 28
+EXCLUDED = ('use_solution_cache',)
+
+def parse_address(address):
+    # 'host:port' for TCP (only local hosts), anything else is a UNIX socket path
+    address = str(address or DEFAULT_ADDRESS)
+    host, _, port = address.rpartition(':')
+    if port.isdigit() and host:
+        return ('tcp', host, int(port))
+    return ('unix', address)
+
+def load_token(path=None, create=False):
+    # The user's service token; with create a new one is written when there is none yet
+    path = Path(path or TOKEN_PATH)
+    if create and not path.exists():
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(descriptor, 'w') as file:
+                file.write(secrets.token_hex(32))
+    if os.name != 'nt' and path.stat().st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise PermissionError(f"{path} can be read by other users; chmod 600 it.")
+    token = path.read_text().strip()
+    if not token:
+        raise PermissionError(f"{path} is empty.")
+    return token
+
+# Values on the wire
+
+def encode(value):
+    # JSON-ready form of an argument or result: tables, arrays, tuples and result NamedTuples are
+    # tagged so decode gives them back
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return {'__namedtuple__': type(value).__name__, 'fields': list(value._fields),
+                'values': [encode(item) for item in value]}
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {'__tuple__': [encode(item) for item in value]}
+    if isinstance(value, dict):
+        return {'__dict__': [[encode(key), encode(item)] for key, item in value.items()]}
+    # pandas and numpy values can only exist once they are imported, so nothing is imported here
+    pd = sys.modules.get('pandas')
+    np = sys.modules.get('numpy')
+    if pd is not None and isinstance(value, pd.DataFrame):
+        return {'__dataframe__': {
+            'columns': [encode(column) for column in value.columns],
+            'index': encode_values(value.index.to_numpy()),
+            'index_name': encode(value.index.name),
+            'data': [encode_values(value.iloc[:, j].to_numpy()) for j in range(value.shape[1])],
+        }}
+    if pd is not None and isinstance(value, pd.Series):
+        return {'__series__': {'name': encode(value.name), 'index': encode_values(value.index.to_numpy()),
+                               'data': encode_values(value.to_numpy())}}
+    if np is not None and isinstance(value, np.ndarray):
+        return {'__ndarray__': encode_values(value.ravel()), 'dtype': value.dtype.str, 'shape': list(value.shape)}
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"A {type(value).__name__} cannot be sent to the service.")
+
+def encode_values(values):
+    # A 1-D array as a list; numbers go through tolist() in one step, other cells one by one
+    if values.dtype.kind in 'biuf':
+        return values.tolist()
+    return [encode(item) for item in values.tolist()]
+
+@lru_cache(maxsize=None)
+def result_type(name, fields):
+    # Stand-in for a result NamedTuple on the other side, with the same name and fields
+    return namedtuple(name, fields)
+
+def decode(value):
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if '__namedtuple__' in value:
+        return result_type(value['__namedtuple__'], tuple(value['fields']))(*(decode(item) for item in value['values']))
+    if '__tuple__' in value:
+        return tuple(decode(item) for item in value['__tuple__'])
+    if '__dict__' in value:
+        return {decode(key): decode(item) for key, item in value['__dict__']}
+    if '__dataframe__' in value:
+        import pandas as pd
+        frame = value['__dataframe__']
+        table = pd.DataFrame({j: decode(column) for j, column in enumerate(frame['data'])},
+                             index=decode(frame['index']) if frame['data'] else None)
+        table.columns = [decode(column) for column in frame['columns']]
+        table.index.name = decode(frame.get('index_name'))
+        return table
+    if '__series__' in value:
+        import pandas as pd
+        series = value['__series__']
+        return pd.Series(decode(series['data']), index=decode(series['index']), name=decode(series['name']))
+    if '__ndarray__' in value:
+        import numpy as np
+        return np.array(decode(value['__ndarray__']), dtype=np.dtype(value['dtype'])).reshape(value['shape'])
+    return {key: decode(item) for key, item in value.items()}
+
+# The workers
+
+def resolve(function):
+    # 'continuous.Tax' -> the exported function; only the econ1210 submodules' exports
+    from econ1210 import SUBMODULES
+    module_name, _, name = str(function).rpartition('.')
+    if module_name not in SUBMODULES:
+        raise ValueError(f"Unknown module {module_name!r}: use one of {', '.join(SUBMODULES)}.")
+    module = importlib.import_module(f"econ1210.{module_name}")
+    if name not in dir(module) or name in EXCLUDED:
+        raise ValueError(f"Unknown function {function!r}.")
+    return getattr(module, name)
+
+def _start_worker(cache=None):
+    if cache is not None:
+        from econ1210.continuous import use_solution_cache
+        use_solution_cache(cache)
+
+def run_calls(calls):
+    # One batch, in order: [(function, format, args, kwargs)] as they came off the wire.
+    # Returns [('result', encoded result) or ('error', message)]
+    outcomes = []
+    for function, format_name, args, kwargs in calls:
+        try:
+            result = resolve(function)(*decode(args), **{name: decode(value) for name, value in kwargs.items()})
+            if format_name:
+                result = resolve(f"{function.rpartition('.')[0]}.{format_name}")(result)
+            outcomes.append(('result', encode(result)))
+        except Exception as error:
+            outcomes.append(('error', f"{type(error).__name__}: {error}"))
+    return outcomes
+
+# The server
+
+class Service:
+    def __init__(self, workers=None, cache=None, window=0.002, max_batch=64, token=None):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.token = token
+        self.cache = cache
+        self.window = window
+        self.max_batch = max_batch
+        self.pools = []
+        self.pending = {}
+        self.timers = {}
+        self.in_flight = {}
+        self.counts = {'requests': 0, 'batches': 0, 'shared': 0, 'errors': 0}
+
+    def pool(self, slot):
+        # Each slot is a pool of one process, so a market always meets the same warm caches
+        if self.workers == 0:
+            return None
+        while len(self.pools) <= slot:
+            self.pools.append(None)
+        if self.pools[slot] is None:
+            self.pools[slot] = ProcessPoolExecutor(max_workers=1, initializer=_start_worker, initargs=(self.cache,))
+        return self.pools[slot]
+
+    def slot(self, args):
+        # Leading equation strings and any table identify the market a request is about
+        market = []
+        leading = True
+        for value in args:
+            if isinstance(value, dict) and '__dataframe__' in value:
+                market.append(value)
+            elif leading and isinstance(value, str):
+                market.append(value)
+            leading = leading and isinstance(value, str)
+        key = memo.fingerprint(market, {})
+        return int.from_bytes(key[:8], 'big') % max(self.workers, 1)
+
+    async def call(self, function, args=(), kwargs=None, format_name=None):
+        # ('result', encoded result) or ('error', message)
+        args, kwargs = list(args), dict(kwargs or {})
+        self.counts['requests'] += 1
+        try:
+            resolve(function)
+            if format_name:
+                resolve(f"{function.rpartition('.')[0]}.{format_name}")
+            key = (function, format_name, memo.fingerprint(args, kwargs))
+        except (ValueError, memo.Unfingerprintable) as error:
+            self.counts['errors'] += 1
+            return ('error', f"{type(error).__name__}: {error}")
+
+        # The same request already on its way shares its answer
+        if key in self.in_flight:
+            self.counts['shared'] += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        loop = asyncio.get_running_loop()
+        future = self.in_flight[key] = loop.create_future()
+        try:
+            slot = self.slot(args)
+            batch = self.pending.setdefault(slot, [])
+            batch.append(((function, format_name, args, kwargs), future))
+            if len(batch) >= self.max_batch:
+                self.flush(slot)
+            elif slot not in self.timers:
+                self.timers[slot] = loop.call_later(self.window, self.flush, slot)
+            outcome = await asyncio.shield(future)
+        finally:
+            self.in_flight.pop(key, None)
+        if outcome[0] == 'error':
+            self.counts['errors'] += 1
+        return outcome
+
+    def flush(self, slot):
+        timer = self.timers.pop(slot, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.pending.pop(slot, [])
+        if not batch:
+            return
+        self.counts['batches'] += 1
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self.pool(slot), run_calls, [call for call, future in batch])
+
+        def done(job):
+            try:
+                outcomes = job.result()
+            except Exception as error:
+                # A worker that died is replaced for the next batch
+                if isinstance(error, BrokenProcessPool):
+                    self.pools[slot] = None
+                outcomes = [('error', f"{type(error).__name__}: {error}")] * len(batch)
+            for (call, future), outcome in zip(batch, outcomes):
+                if not future.done():
+                    future.set_result(outcome)
+        job.add_done_callback(done)
+
+    async def respond(self, request):
+        command = request.get('command')
+        if command == 'ping':
+            return {'result': 'pong'}
+        if command == 'stats':
+            return {'result': dict(self.counts, workers=self.workers, pending=sum(map(len, self.pending.values())))}
+        if command is not None:
+            return {'error': f"Unknown command {command!r}."}
+        kind, value = await self.call(request.get('function'), request.get('args') or [],
+                                      request.get('kwargs') or {}, request.get('format'))
+        return {kind: value}
+
+    async def authenticate(self, reader):
+        # The token line, read as exactly that many bytes so nothing else is buffered or parsed first
+        expected = self.token.encode() + b'\n'
+        try:
+            line = await asyncio.wait_for(reader.readexactly(len(expected)), HANDSHAKE_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return False
+        return hmac.compare_digest(line, expected)
+
+    async def handle(self, reader, writer):
+        # Requests on one connection are answered as they finish, each with its id
+        try:
+            authenticated = await self.authenticate(reader)
+        except ConnectionError:
+            authenticated = False
+        if not authenticated:
+            try:
+                writer.write(b'{"id": null, "error": "PermissionError: Wrong or missing service token."}\n')
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+            return
+
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            try:
+                request = json.loads(line)
+                response = await self.respond(request)
+                response['id'] = request.get('id')
+            except Exception as error:
+                response = {'id': None, 'error': f"{type(error).__name__}: {error}"}
+            async with lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address=None, ready=None):
+        if self.token is None:
+            self.token = load_token(create=True)
+        kind, *where = parse_address(address)
+        if kind == 'tcp':
+            host, port = where
+            if host not in ('127.0.0.1', 'localhost', '::1'):
+                raise ValueError("The service only listens on localhost.")
+            server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+        else:
+            path = Path(where[0])
+            if path.exists():
+                path.unlink()
+            server = await asyncio.start_unix_server(self.handle, str(path), limit=LINE_LIMIT)
+            os.chmod(path, 0o600)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        for pool in self.pools:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        self.pools = []
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the ECON1210 calculators to workbook clients.")
+    parser.add_argument('--address', default=None, help=f"UNIX socket path or localhost:port (default {DEFAULT_ADDRESS})")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (0 runs in threads)")
+    parser.add_argument('--cache', help="SQLite file for symbolic solutions shared across workers and runs")
+    parser.add_argument('--window', type=float, default=2.0, help="milliseconds to gather a batch")
+    parser.add_argument('--token', default=None, help=f"file with the clients' secret token (default {TOKEN_PATH})")
+    options = parser.parse_args(argv)
+
+    service = Service(workers=options.workers, cache=options.cache, window=options.window / 1000,
+                      token=load_token(options.token, create=True))
+    print(f"Serving on {options.address or DEFAULT_ADDRESS} with {service.workers} workers")
+    try:
+        asyncio.run(service.serve(options.address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+if __name__ == '__main__':
+    main()
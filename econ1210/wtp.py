@@ -0,0 +1,333 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from econ1210._loader import load_script
+
+# Price discrimination on customer files too big for memory.
+#
+#   stream_price_discrimination('customers.parquet', MC=5, CouponBreakPoint=40)
+#   stream_perfect_price_discrimination('wtp.npy', MC=5, CouponBreakPoint=40)
+#   stream_profit_details('bundles.csv', fixed_cost=100, MC=2)
+#
+# The WTP column is read in chunks (CSV, Parquet with pyarrow, or a memory-mapped .npy file)
+# into a WTPSummary: the distinct WTP values with how many customers have each and their sum.
+# Every search in the PriceDiscrimination scripts only asks "how many customers, and how much
+# WTP, at or above this price", which the summary answers from suffix sums, so the results are
+# the scripts' own NamedTuples and format_* gives the same Excel text.
+#
+# The summary stays exact while there are at most max_bins distinct values (prices in cents
+# over any customer count fit easily). Past that it becomes a sketch: neighbouring values are
+# merged into bins holding about the same number of customers, and a bin keeps its lowest
+# value, count and sum. Counts and sums at the bin edges stay exact, so the searches are
+# exact over the edges and only the candidate prices get coarser. Bins never straddle the
+# breakpoints (MC, the coupon break point), so the coupon groups split exactly. Memory is
+# bounded by max_bins and one chunk, whatever the number of customers.
+
+NON_PERFECT = 'PriceDiscrimination/NonPerfectPriceDiscrimination.py'
+PERFECT = 'PriceDiscrimination/PerfectPriceDiscrimination.py'
+COMBO = 'PriceDiscrimination/combo.py'
+
+class WTPSummary:
+    def __init__(self, max_bins=65536, breakpoints=()):
+        self.max_bins = max_bins
+        self.breakpoints = np.sort(np.asarray([b for b in breakpoints if b is not None], dtype=float))
+        self.exact = True
+        # One bin per distinct value while exact: lows == highs
+        self.lows = np.empty(0, dtype=np.int64)
+        self.highs = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.totals = np.empty(0, dtype=np.int64)
+        self._suffix = None
+
+    @classmethod
+    def of(cls, values, **options):
+        summary = cls(**options)
+        summary.add(values)
+        return summary
+
+    def __len__(self):
+        # Number of customers
+        return int(self.counts.sum())
+
+    def add(self, values):
+        values = np.asarray(values).ravel()
+        if values.dtype == object:
+            values = values.astype(float)
+        if values.dtype.kind == 'f':
+            values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        unique, counts = np.unique(values, return_counts=True)
+        self._suffix = None
+
+        # Integer WTP stays integer, so the results print as the scripts print them
+        dtype = np.result_type(self.lows.dtype, unique.dtype)
+        unique = unique.astype(dtype)
+        totals = unique * counts
+        lows, highs = self.lows.astype(dtype), self.highs.astype(dtype)
+        bin_counts, bin_totals = self.counts, self.totals.astype(totals.dtype)
+
+        if not self.exact and len(lows):
+            # Values that land inside a merged bin are counted in it
+            index = np.searchsorted(lows, unique, side='right') - 1
+            inside = (index >= 0) & (unique <= highs[np.maximum(index, 0)])
+            bin_counts = bin_counts.copy()
+            np.add.at(bin_counts, index[inside], counts[inside])
+            np.add.at(bin_totals, index[inside], totals[inside])
+            unique, counts, totals = unique[~inside], counts[~inside], totals[~inside]
+
+        lows = np.concatenate([lows, unique])
+        highs = np.concatenate([highs, unique])
+        bin_counts = np.concatenate([bin_counts, counts])
+        bin_totals = np.concatenate([bin_totals, totals])
+        order = np.argsort(lows, kind='stable')
+        lows, highs, bin_counts, bin_totals = lows[order], highs[order], bin_counts[order], bin_totals[order]
+
+        # The same value seen in an earlier chunk
+        starts = np.flatnonzero(np.r_[True, lows[1:] != lows[:-1]])
+        self.lows = lows[starts]
+        self.highs = np.maximum.reduceat(highs, starts)
+        self.counts = np.add.reduceat(bin_counts, starts)
+        self.totals = np.add.reduceat(bin_totals, starts)
+
+        if len(self.lows) > self.max_bins:
+            self.compress()
+
+    def compress(self):
+        # Merge neighbouring bins into about max_bins / 2 bins of equal customer counts,
+        # never across a breakpoint
+        self.exact = False
+        self._suffix = None
+        segment = np.searchsorted(self.breakpoints, self.lows, side='right')
+        before = np.cumsum(self.counts) - self.counts
+        quantile = np.floor(before / (self.counts.sum() / (self.max_bins // 2)))
+        starts = np.flatnonzero(np.r_[True, (segment[1:] != segment[:-1]) | (quantile[1:] != quantile[:-1])])
+        self.lows = self.lows[starts]
+        self.highs = np.maximum.reduceat(self.highs, starts)
+        self.counts = np.add.reduceat(self.counts, starts)
+        self.totals = np.add.reduceat(self.totals, starts)
+
+    def above(self, price):
+        # (customers, total WTP) with WTP >= price; exact at every value in lows
+        if self._suffix is None:
+            self._suffix = (np.r_[np.cumsum(self.counts[::-1])[::-1], 0],
+                            np.r_[np.cumsum(self.totals[::-1])[::-1], self.totals.dtype.type(0)])
+        index = np.searchsorted(self.lows, price, side='left')
+        return self._suffix[0][index], self._suffix[1][index]
+
+    def max(self):
+        return self.highs[-1].item()
+
+class BundleSummary:
+    # Two products and their combo (the sum of each customer's two WTPs)
+    def __init__(self, products, first, second, combo):
+        self.products = products
+        self.first = first
+        self.second = second
+        self.combo = combo
+
+def read_wtp(path, columns=None, chunksize=1_000_000):
+    # Chunks of WTP as an (n, len(columns)) array. columns are names for CSV and Parquet
+    # and positions for .npy; None reads every column.
+    path = Path(path)
+    if path.suffix == '.npy':
+        values = np.load(path, mmap_mode='r')
+        if values.ndim == 1:
+            values = values[:, None]
+        for start in range(0, len(values), chunksize):
+            chunk = np.asarray(values[start:start + chunksize])
+            yield chunk if columns is None else chunk[:, list(columns)]
+    elif path.suffix == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet WTP files requires pyarrow.")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas().to_numpy()
+    else:
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+            yield (chunk if columns is None else chunk[list(columns)]).to_numpy()
+
+def product_columns(path):
+    # As combo.py: every column but the first (the customer)
+    path = Path(path)
+    if path.suffix == '.npy':
+        width = np.load(path, mmap_mode='r').shape[1]
+        return list(range(1, width)) if width > 2 else list(range(width))
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        names = pq.ParquetFile(path).schema_arrow.names
+    else:
+        names = list(pd.read_csv(path, nrows=0).columns)
+    return names[1:]
+
+def summarize_wtp(path, column='WTP', chunksize=1_000_000, max_bins=65536, breakpoints=()):
+    summary = WTPSummary(max_bins, breakpoints)
+    for chunk in read_wtp(path, None if Path(path).suffix == '.npy' and column == 'WTP' else [column], chunksize):
+        summary.add(chunk[:, 0])
+    return summary
+
+def summarize_bundle(path, products=None, chunksize=1_000_000, max_bins=65536, breakpoints=(), combo_breakpoints=()):
+    # Missing WTPs count as 0, as in combo.py
+    products = list(products) if products is not None else product_columns(path)
+    if len(products) != 2:
+        raise ValueError("A bundle needs exactly two product columns.")
+    first = WTPSummary(max_bins, (0, *breakpoints))
+    second = WTPSummary(max_bins, (0, *breakpoints))
+    combo = WTPSummary(max_bins, combo_breakpoints)
+    for chunk in read_wtp(path, products, chunksize):
+        chunk = np.nan_to_num(chunk.astype(float) if chunk.dtype == object else chunk, nan=0)
+        first.add(chunk[:, 0])
+        second.add(chunk[:, 1])
+        combo.add(chunk[:, 0] + chunk[:, 1])
+    return BundleSummary(tuple(products), first, second, combo)
+
+def price_discrimination(summary, MC, FixedCost=0, CouponBreakPoint=None):
+    # PriceDiscrimination on a WTPSummary
+    script = load_script(NON_PERFECT, ())
+    if FixedCost is None:
+        FixedCost = 0
+
+    # Customers who would buy at MC: the efficient total surplus
+    served, served_total = summary.above(MC)
+    total_potential = served_total - MC * served
+
+    # Single price: the best of the distinct WTPs
+    prices = summary.lows
+    if not len(prices):
+        single = script['SinglePriceResult'](None, 0, -float('inf'), 0, 0, 0)
+        return script['PriceDiscriminationResult'](single, None)
+    buyers, wtp = summary.above(prices)
+    best = int(np.argmax((prices - MC) * buyers - FixedCost))
+    price, Q = prices[best].item(), buyers[best].item()
+    cs = wtp[best].item() - price * Q
+    ps = (price - MC) * Q
+    single = script['SinglePriceResult'](price, Q, (price - MC) * Q - FixedCost, cs, ps, total_potential - (cs + ps))
+
+    if CouponBreakPoint is None:
+        return script['PriceDiscriminationResult'](single, None)
+
+    # Coupon: a list price for WTP >= CouponBreakPoint and a discount price below it. The two
+    # groups' profits are independent, so each price is the best for its own group.
+    list_prices = prices[prices >= CouponBreakPoint]
+    discount_prices = prices[prices < CouponBreakPoint]
+    if not len(list_prices) or not len(discount_prices):
+        return script['PriceDiscriminationResult'](single, None)
+
+    list_buyers, list_wtp = summary.above(list_prices)
+    above_break, above_break_wtp = summary.above(CouponBreakPoint)
+    discount_buyers, discount_wtp = summary.above(discount_prices)
+    discount_buyers, discount_wtp = discount_buyers - above_break, discount_wtp - above_break_wtp
+
+    i = int(np.argmax((list_prices - MC) * list_buyers))
+    j = int(np.argmax((discount_prices - MC) * discount_buyers))
+    lp, dp = list_prices[i].item(), discount_prices[j].item()
+    n_list, n_discount = list_buyers[i].item(), discount_buyers[j].item()
+    Q = n_list + n_discount
+    profit = lp * n_list + dp * n_discount - MC * Q - FixedCost
+    cs = (list_wtp[i].item() - lp * n_list) + (discount_wtp[j].item() - dp * n_discount)
+    ps = (lp - MC) * n_list + (dp - MC) * n_discount
+    coupon = script['CouponPriceResult'](lp, dp, Q, profit, cs, ps, total_potential - (cs + ps))
+    return script['PriceDiscriminationResult'](single, coupon)
+
+def perfect_price_discrimination(summary, MC, FixedCost=None, CouponBreakPoint=None):
+    # PerfectPriceDiscrimination on a WTPSummary
+    script = load_script(PERFECT, ())
+    if FixedCost is None:
+        FixedCost = 0
+
+    served, served_total = summary.above(MC)
+    TS_ppd = served_total.item() - MC * served.item()
+    PS_PPD = TS_ppd - FixedCost
+    if CouponBreakPoint is None:
+        return script['PerfectPriceDiscriminationResult'](PS_PPD, None)
+
+    # Posted price: the lowest WTP at or above the break point (the highest WTP if none is)
+    prices = summary.lows
+    high = prices[prices >= CouponBreakPoint]
+    low = prices[prices < CouponBreakPoint]
+    n_high, high_total = summary.above(CouponBreakPoint)
+    n_high, high_total = n_high.item(), high_total.item()
+    posted_price = high[0].item() if len(high) else summary.max()
+    PS_high = (posted_price - MC) * n_high
+
+    # Coupon discounts that make some low-WTP customer indifferent, in the script's order
+    candidate_discounts = set()
+    for w in low[::-1].tolist():
+        candidate_discounts.add(round(posted_price - w, 10))
+    candidate_discounts.add(0.0)
+
+    best_discount = 0.0
+    best_PS_total = PS_high - FixedCost
+    best_low = (0, 0)
+    for C in candidate_discounts:
+        coupon_price = posted_price - C
+        # Low-group customers with WTP >= coupon_price
+        buyers, wtp = summary.above(coupon_price)
+        buyers, wtp = (buyers - n_high).item(), (wtp - high_total).item()
+        PS_total = PS_high + (coupon_price - MC) * buyers - FixedCost
+        if PS_total > best_PS_total:
+            best_PS_total = PS_total
+            best_discount = C
+            best_low = (buyers, wtp)
+
+    coupon_price = posted_price - best_discount
+    low_buyers, low_total = best_low
+    CS = (high_total - posted_price * n_high) + (low_total - coupon_price * low_buyers)
+    TS_coupon = high_total + low_total - MC * (n_high + low_buyers)
+    coupon = script['CouponDiscountResult'](best_discount, posted_price, coupon_price, best_PS_total, CS,
+                                            TS_coupon, TS_ppd - TS_coupon)
+    return script['PerfectPriceDiscriminationResult'](PS_PPD, coupon)
+
+def best_posted_price(summary, cost, floor):
+    # Highest-profit price among the WTPs above floor; ties go to the higher price, as the
+    # script scans from the top. (price, profit), or None if no WTP is above floor.
+    prices = summary.lows[summary.lows > floor]
+    if not len(prices):
+        return None
+    buyers, _ = summary.above(prices)
+    profits = (prices - cost) * buyers
+    best = len(prices) - 1 - int(np.argmax(profits[::-1]))
+    return prices[best].item(), profits[best].item()
+
+def profit_details(bundle, fixed_cost=None, MC=None, PerComboCost=None):
+    # compute_profit_details on a BundleSummary
+    script = load_script(COMBO, ())
+    fixed_cost = 0 if fixed_cost is None else fixed_cost
+    MC = 0 if MC is None else MC
+    PerComboCost = 0 if PerComboCost is None else PerComboCost
+
+    separate_prices = []
+    separate_profits = []
+    for summary in (bundle.first, bundle.second):
+        best = best_posted_price(summary, MC, 0)
+        separate_prices.append(0 if best is None else best[0])
+        separate_profits.append(0 if best is None else best[1])
+    total_separate_profit = sum(separate_profits) - fixed_cost
+
+    total_cost_combo = 2 * MC + PerComboCost
+    best = best_posted_price(bundle.combo, total_cost_combo, total_cost_combo)
+    if best is None or best[1] < 0:
+        best_combo_price, max_profit_combo = total_cost_combo, 0
+    else:
+        best_combo_price, max_profit_combo = best
+    total_combo_profit = max_profit_combo - fixed_cost
+
+    recommendation = 'as combo' if total_combo_profit > total_separate_profit else 'separately'
+    return script['BundlingResult'](bundle.products, tuple(separate_prices), total_separate_profit,
+                                    best_combo_price, total_combo_profit, recommendation)
+
+def stream_price_discrimination(path, MC, FixedCost=0, CouponBreakPoint=None, column='WTP', chunksize=1_000_000, max_bins=65536):
+    summary = summarize_wtp(path, column, chunksize, max_bins, (MC, CouponBreakPoint))
+    return price_discrimination(summary, MC, FixedCost, CouponBreakPoint)
+
+def stream_perfect_price_discrimination(path, MC, FixedCost=None, CouponBreakPoint=None, column='WTP', chunksize=1_000_000, max_bins=65536):
+    summary = summarize_wtp(path, column, chunksize, max_bins, (MC, CouponBreakPoint))
+    return perfect_price_discrimination(summary, MC, FixedCost, CouponBreakPoint)
+
+def stream_profit_details(path, fixed_cost=None, MC=None, PerComboCost=None, products=None, chunksize=1_000_000, max_bins=65536):
+    combo_cost = 2 * (MC or 0) + (PerComboCost or 0)
+    bundle = summarize_bundle(path, products, chunksize, max_bins, (), (combo_cost,))
+    return profit_details(bundle, fixed_cost, MC, PerComboCost)